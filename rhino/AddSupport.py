@@ -5,9 +5,30 @@ import importlib
 importlib.reload(importlib.import_module('lib.reload'))
 import lib.reload
 import math
+import time
+import numpy as np
 
 modules = {
-    'lib.globals': 'all'
+    'lib.usertext': [],
+    'lib.globals': 'all',
+    'lib.bvh': ['get_bvh'],
+    'lib.raycast': ['sample_ray_grid', 'adaptive_samples'],
+    'lib.heightmap': ['grid_axes', 'rasterize_underside', 'rasterize_top', 'support_top'],
+    'lib.stl': [],
+    'lib.threemf': [],
+    'lib.cache': ['DiskCache'],
+    'lib.pipeline': ['support_mesh'],
+    'lib.surface': ['fit_surface'],
+    'lib.trace': ['stage', 'start_trace', 'stop_trace', 'geometry_counts'],
+    'lib.packing': ['pack_rectangles'],
+    'lib.meshclean': ['clean_mesh'],
+    'lib.stages': ['StageGraph'],
+    'lib.engrave': ['engraving_cutter'],
+    'lib.trimesh': ['TriangleMesh'],
+    'lib.scratch': ['ScratchContext'],
+    'lib.orient': ['best_orientation'],
+    'lib.overhang': ['support_footprint'],
+    'lib.voxel': ['voxel_support'],
 }
 lib.reload.reload_and_import_modules('crowns', modules)
 
@@ -17,6 +38,58 @@ import rhinoscriptsyntax as rs
 import Rhino.Geometry as rg
 import Rhino.Geometry.Intersect as rgi
 from lib.globals import *
+from lib import usertext
+from lib.raycast import sample_ray_grid, adaptive_samples
+from lib.heightmap import grid_axes, rasterize_underside, rasterize_top, support_top
+from lib.pipeline import support_mesh
+from lib.cache import DiskCache
+from lib.surface import fit_surface
+from lib.trace import stage as trace_stage, start_trace, stop_trace, geometry_counts
+from lib.packing import pack_rectangles
+from lib.meshclean import clean_mesh
+from lib.stages import StageGraph
+from lib.engrave import engraving_cutter
+from lib.trimesh import TriangleMesh
+from lib.scratch import ScratchContext
+from lib.orient import best_orientation
+from lib.overhang import support_footprint
+from lib.voxel import voxel_support
+
+# 디버그용 플래그: 단계별 기능 온/오프
+ENABLE_OFFSET_BOOLEAN = True       # product 메쉬를 -Z 방향으로 내린 후 support에서 차집합
+ENABLE_FOOTPRINT = False           # True이면 overhang 영역 아래로만 서포트를 남긴다 (lib.overhang, heightfield 경로)
+ENABLE_PATCH_CUT = True            # 패치 곡면으로 베이스 윗부분을 잘라낼지 여부 (False이면 꽉 찬 박스 유지)
+ENABLE_TRACE = False               # True이면 단계별 시간/형상 수/메모리를 <문서 이름>_trace.json으로 저장
+ENABLE_ORIENT = False              # True이면 고정 X축 180도 뒤집기 대신 unit 별로 출력 방향 탐색 (lib.orient)
+ENABLE_ENGRAVE = False             # True이면 서포트 생성 전에 각 product 내벽에 케이스 ID(객체 이름)를 음각
+ENABLE_EXPORT = False              # True이면 배치 후 플레이트 별로 <문서 이름>_plate<N>.3mf 저장
+EXPORT_STL = False                 # 3MF와 함께 같은 이름의 binary STL도 저장
+
+# 빌드 플레이트 배치 설정 (mm)
+PLATE_SIZE = (140.0, 80.0)         # 플레이트 XY 크기
+PLATE_GAP = 2.0                    # 그룹 사이 최소 간격
+PLATE_MARGIN = 1.0                 # 플레이트 가장자리 여백
+
+# 서포트 파이프라인 파라미터 (lib.stages.StageGraph 입력, Support_graph 참고).
+# 값을 바꾸면 그 값을 읽는 단계와 그 아래 단계만 다시 계산된다.
+SUPPORT_PARAMS = {
+    'sampler': 'rhino',            # 패치 샘플 방식 (Sample_points 참고)
+    'scale_xy': 1.05,              # 서포트 베이스 XY 스케일 (product bbox 중심 기준)
+    'base_height': 5.0,            # 서포트 베이스 박스 높이
+    'inner_scale_x': 1.0,          # 패치 샘플 영역 반폭 배율 X (50% x2)
+    'inner_scale_y': 2.0,          # 패치 샘플 영역 반폭 배율 Y (100% x2)
+    'num_samples_x': 15,           # 패치 샘플 격자 X 개수 (adaptive는 Ray 수 상한 = X x Y)
+    'num_samples_y': 30,           # 패치 샘플 격자 Y 개수
+    'sigma_k': 2.0,                # 샘플 포인트 Z 필터 (k sigma)
+    'patch_lift': 0.2,             # 패치 곡면 +Z 이동량
+    'patch_scale': 1.1,            # 패치 곡면 XY 스케일 (베이스 bbox 기준)
+    'cell': 0.1,                   # heightmap 격자 간격
+    'field_lift': 0.2,             # heightmap 엔진 서포트 윗면 lift
+    'overhang_angle': 45.0,        # 법선과 -Z 사이 각이 이보다 작은 면이 overhang (도)
+    'footprint_margin': 0.5,       # overhang footprint 팽창 폭 (mm)
+    'voxel': 0.05,                 # clearance='voxel'의 voxel 크기 (mm)
+    'offset': 0.0,                 # clearance offset (emit_support에서 설정)
+}
 
 def ScaleXY(bbox, factor):
     center_x = (bbox.Min.X + bbox.Max.X) / 2.0
@@ -31,10 +104,28 @@ def ScaleXY(bbox, factor):
     # 여기서도 동일한 순서로 값을 반환해야 bbox가 올바르게 생성된다.
     return min_x, min_y, max_x, max_y, half_width_x, half_width_y, center_x, center_y
 
-def Sample_points(product_meshes, inner_min_x, inner_max_x, inner_min_y, inner_max_y):
-    # 샘플 개수 (X:10, Y:20 → 최대 200개 Ray)
-    num_samples_x = 15
-    num_samples_y = 30
+def Sample_points(product_meshes, inner_min_x, inner_max_x, inner_min_y, inner_max_y,
+                  sampler='rhino', num_samples_x=15, num_samples_y=30, mesh_arrays=None):
+    # 샘플 개수 (기본 X:15, Y:30 → 최대 450개 Ray)
+    # sampler='numpy' 이면 모든 Ray를 NumPy로 한 번에 교차시킨다 (결과 포인트는 동일 순서)
+    # sampler='bvh' 이면 메쉬 별로 캐시된 BVH로 교차시킨다 (같은 형상이면 offset 루프 간 재사용).
+    #   Ray 수가 면 수의 1% 이하일 때만 'numpy'보다 빠르다 (lib.raycast.first_hits 참고). 기본은 'numpy'
+    # sampler='adaptive' 이면 거친 격자에서 높이 차이가 큰 칸만 분할한다 (Ray 수 상한 = 고정 격자와 동일)
+    # mesh_arrays: 이미 변환한 product TriangleMesh 목록 (없으면 여기서 변환)
+    if sampler in ('adaptive', 'numpy', 'bvh') and mesh_arrays is None:
+        mesh_arrays = [MeshToTriangleMesh(mesh) for mesh in product_meshes if mesh]
+    if sampler == 'adaptive':
+        hits, ray_count = adaptive_samples(mesh_arrays, inner_min_x, inner_max_x, inner_min_y, inner_max_y,
+                                           max_rays=num_samples_x * num_samples_y)
+        print("[create_support] adaptive sampling: rays = {} (fixed grid = {})".format(
+            ray_count, num_samples_x * num_samples_y))
+        return [rg.Point3d(x, y, z) for x, y, z in hits.tolist()]
+
+    if sampler in ('numpy', 'bvh'):
+        hits = sample_ray_grid(mesh_arrays, inner_min_x, inner_max_x, inner_min_y, inner_max_y,
+                               num_samples_x, num_samples_y, use_bvh=(sampler == 'bvh'))
+        return [rg.Point3d(x, y, z) for x, y, z in hits.tolist()]
+
     sample_points = []  # 메모리 상의 샘플 포인트 목록
     cut_brep = None     # 이후 base Brep를 자를 때 사용할 패치 곡면
     cut_brep_id = None  # 문서에 추가된 패치 Brep 객체 id (마지막에 삭제용)
@@ -71,92 +162,52 @@ def Sample_points(product_meshes, inner_min_x, inner_max_x, inner_min_y, inner_m
 
     return sample_points
 
-def Cut_brep(sample_points, min_x, max_x, min_y, max_y, center_x, center_y):
-    if sample_points:
-        try:
-            # Z값 기반 2 sigma 필터링
-            zs = [p.Z for p in sample_points]
-            mean_z = sum(zs) / float(len(zs))
-            var_z = sum((z - mean_z) ** 2 for z in zs) / float(len(zs)) if len(zs) > 1 else 0.0
-            sigma_z = math.sqrt(var_z)
-
-            if sigma_z > 1e-9:
-                threshold = 2.0 * sigma_z
-                filtered_points = [p for p in sample_points if abs(p.Z - mean_z) <= threshold]
-            else:
-                filtered_points = list(sample_points)
-
-            print("[create_support] filtered point count (2 sigma) =", len(filtered_points))
-
-            if len(filtered_points) >= 3:
-                tol = sc.doc.ModelAbsoluteTolerance
-                # 필터된 포인트들을 통과하는 패치 곡면 생성
-                # Point3d를 GeometryBase(Rhino.Geometry.Point)로 래핑해서 전달
-                geo_points = [rg.Point(p) for p in filtered_points]
-                try:
-                    patch_brep = rg.Brep.CreatePatch(geo_points, 36, 36, tol)
-                except Exception as e:
-                    print("[create_support] Warning: Brep.CreatePatch failed:", e)
-                    patch_brep = None
-
-                if patch_brep:
-                    # 곡면을 +Z 방향으로 소량만 이동 (샘플 포인트에 더 근접하게 유지)
-                    move_up = rg.Transform.Translation(0.0, 0.0, 0.2)
-                    patch_brep.Transform(move_up)
-
-                    # support base bbox 크기(X,Y)를 약간만 키워서(1.1배) 과도하게 평탄해지지 않도록 스케일
-                    try:
-                        srf_bbox = patch_brep.GetBoundingBox(True)
-                        if srf_bbox.IsValid:
-                            curr_wx = srf_bbox.Max.X - srf_bbox.Min.X
-                            curr_wy = srf_bbox.Max.Y - srf_bbox.Min.Y
-
-                            target_wx = (max_x - min_x) * 1.1
-                            target_wy = (max_y - min_y) * 1.1
-
-                            sx = target_wx / curr_wx if curr_wx > 1e-6 else 1.0
-                            sy = target_wy / curr_wy if curr_wy > 1e-6 else 1.0
-
-                            origin_z = srf_bbox.Center.Z
-                            origin = rg.Point3d(center_x, center_y, origin_z)
-
-                            # 먼저 Brep을 문서에 추가한 뒤, 해당 객체를 기준으로 스케일
-                            cut_brep_id = sc.doc.Objects.AddBrep(patch_brep)
-                            rs.ScaleObject(cut_brep_id, origin, (sx, sy, 1.0), copy=False)
-                            print("[create_support] patch surface scaled via rs.ScaleObject.")
-
-                            # 잘라내기에 사용할 최종 패치 곡면을 메모리에 보관하고,
-                            # 문서에 추가된 임시 패치 객체는 바로 삭제하여 화면에 남지 않도록 한다.
-                            obj = sc.doc.Objects.Find(cut_brep_id)
-                            if obj and obj.Geometry:
-                                cut_brep = obj.Geometry.DuplicateBrep()
-                                try:
-                                    rs.DeleteObject(cut_brep_id)
-                                except Exception as e:
-                                    print("[create_support] Warning: failed to delete helper patch brep:", e)
-                                return cut_brep
-
-                            # doc에 이미 추가했으므로 아래에서 다시 추가하지 않도록 None 처리
-                            patch_brep = None
-                    except Exception as e:
-                        print("[create_support] Warning: failed to scale patch to target bbox:", e)
-
-                    if patch_brep is not None:
-                        sc.doc.Objects.AddBrep(patch_brep)
-            else:
-                print("[create_support] Warning: not enough filtered points for patch (need >=3).")
-        except Exception as e:
-            print("[create_support] Warning: failed to create in-memory patch surface:", e)
+def Cut_brep(sample_points, min_x, max_x, min_y, max_y, center_x, center_y, lift=0.2, patch_scale=1.1,
+             sigma_k=2.0):
+    """
+    샘플 포인트를 Z 기준 sigma_k sigma 필터 후 thin-plate spline 높이 함수로 맞추고(lib.surface),
+    +Z lift 이동과 support base bbox patch_scale배 XY 스케일을 메모리에서 적용한 패치 Brep을 반환한다.
+    """
+    if not sample_points:
+        return None
+    try:
+        points = np.array([(p.X, p.Y, p.Z) for p in sample_points], dtype=np.float64)
+        surface, count = fit_surface(points, sigma_k=sigma_k)
+        print("[create_support] filtered point count ({} sigma) =".format(sigma_k), count)
+        if surface is None:
+            print("[create_support] Warning: not enough filtered points for patch (need >=3).")
+            return None
+
+        # 곡면을 +Z 방향으로 소량만 이동 (샘플 포인트에 더 근접하게 유지)
+        surface = surface.translated(lift)
+
+        # support base bbox 크기(X,Y)를 약간만 키워서(기본 1.1배) 과도하게 평탄해지지 않도록 스케일
+        x0, y0, x1, y1 = surface.bounds
+        curr_wx = x1 - x0
+        curr_wy = y1 - y0
+        sx = (max_x - min_x) * patch_scale / curr_wx if curr_wx > 1e-6 else 1.0
+        sy = (max_y - min_y) * patch_scale / curr_wy if curr_wy > 1e-6 else 1.0
+        surface = surface.scaled(sx, sy, (center_x, center_y))
+
+        cut_brep = SurfaceToBrep(surface, 36, 36)
+        if cut_brep is None:
+            print("[create_support] Warning: failed to build patch surface from fitted heights.")
+        return cut_brep
+    except Exception as e:
+        print("[create_support] Warning: failed to create in-memory patch surface:", e)
+        return None
 
 def Brep2Mesh(breps):
-    """주어진 Brep 리스트를 메쉬 리스트로 변환하고, 각 메쉬를 용접/노멀 정리 후 반환한다."""
+    """
+    주어진 Brep 리스트를 메쉬로 변환하고, 모든 조각을 합친 뒤 lib.meshclean으로 한 번만
+    용접/방향 통일/정점 법선 계산을 해서 [mesh] 로 반환한다. non-manifold 변이 있으면 경고한다.
+    """
     if not breps:
         return []
 
     mp = rg.MeshingParameters.QualityRenderMesh
-    angle_tolerance = sc.doc.ModelAngleToleranceRadians
 
-    result_meshes = []
+    parts = []
     for b in breps:
         if not b:
             continue
@@ -164,133 +215,70 @@ def Brep2Mesh(breps):
         if not meshes:
             continue
         for mesh in meshes:
-            mesh.Weld(angle_tolerance)
-            mesh.UnifyNormals()
-            mesh.RebuildNormals()
-            result_meshes.append(mesh)
+            parts.append(MeshToTriangleMesh(mesh))
 
-    # 여러 조각이면 하나로 merge해서 반환 (기존 로직 유지)
-    if not result_meshes:
+    if not parts:
         return []
 
-    if len(result_meshes) > 1:
-        base_mesh = result_meshes[0]
-        base_mesh.Append(result_meshes[1:])
-        base_mesh.Weld(angle_tolerance)
-        base_mesh.UnifyNormals()
-        base_mesh.RebuildNormals()
-        return [base_mesh]
+    vertices, faces = TriangleMesh.concatenate(parts)
+    vertices, faces, normals, report = clean_mesh(vertices, faces, tol=sc.doc.ModelAbsoluteTolerance)
+    if faces.shape[0] == 0:
+        return []
 
-    return result_meshes
+    print("[create_support] mesh cleanup | faces = {} | welded = {} | flipped = {} | boundary edges = {} | "
+          "non-manifold edges = {}".format(faces.shape[0], report['welded_vertices'], report['flipped_faces'],
+                                           report['boundary_edges'], report['nonmanifold_edges']))
+    if not report['watertight'] or report['orientation_conflicts']:
+        print("[create_support] Warning: support mesh is not watertight/orientable; it may not be printable.")
+    return [ArraysToMesh(vertices, faces, normals)]
 
-def create_support(product_ids, offset):
+def Split_base(base_bbox, cut_brep):
     """
-    RhinoCommon API를 사용하여 메모리 효율적으로 서포트를 생성합니다.
+    base 박스 Brep을 패치 곡면으로 분할해서 곡면보다 아래 조각만 남긴다.
+    분할할 수 없으면 원래 base Brep을, base Brep을 만들 수 없으면 빈 리스트를 반환한다.
     """
-    # 디버그용 플래그: 단계별 기능 온/오프
-    ENABLE_OFFSET_BOOLEAN = True       # product 메쉬를 -Z 방향으로 내린 후 support에서 차집합
-    ENABLE_PATCH_CUT = True            # 패치 곡면으로 베이스 윗부분을 잘라낼지 여부 (False이면 꽉 찬 박스 유지)
-
-    # --- 1. 입력 메쉬 집합 생성 ---
-    product_meshes = []
-    for obj_id in product_ids:
-        obj = sc.doc.Objects.Find(obj_id)
-        if obj and isinstance(obj.Geometry, rg.Mesh):
-            product_meshes.append(obj.Geometry)
-    
-    if not product_meshes:
-        print("[create_support] Error: No valid mesh objects found.")
-        return None
-
-    # --- 2. 서포트 베이스 박스 메쉬 생성 (메모리 내) ---
-    bbox = rg.BoundingBox.Empty
-    for mesh in product_meshes:
-        bbox.Union(mesh.GetBoundingBox(True))
-
-    if not bbox.IsValid:
-        print("[create_support] Error: Cannot get bounding box for support base.")
-        return None
-
-    # XY 평면에서 중심 기준으로 1.05배 스케일링
-    min_x, min_y, max_x, max_y, half_width_x, half_width_y, center_x, center_y = ScaleXY(bbox, 1.05)
-    base_bbox = rg.BoundingBox(min_x, min_y, 0, max_x, max_y, 5)
-    # 서포트 기본 박스 메쉬 (기본값)
-    support_box_mesh = rg.Mesh.CreateFromBox(base_bbox, 1,1,1)
-    if not support_box_mesh:
-        print("[create_support] Error: Failed to create support base mesh.")
-        return None
-
-    # 패치 컷과 offset Boolean이 모두 꺼져 있으면 단순 박스만 생성하고 바로 리턴
-    if (not ENABLE_PATCH_CUT) and (not ENABLE_OFFSET_BOOLEAN):
-        support_id = sc.doc.Objects.AddMesh(support_box_mesh)
-        try:
-            assign_object([support_id], 'print_support', 'support')
-        except Exception as e:
-            print('[create_support] Warning: failed to assign simple support box to layer:', e)
-        print("[create_support] simple box only | id =", support_id)
-        return [support_id]
-
-    # 비대칭 스케일된 내부 영역 계산 (X:50%, Y:100%)
-    inner_scale_x = 0.5 * 2
-    inner_scale_y = 1.0 * 2
-    inner_half_width_x = half_width_x * inner_scale_x
-    inner_half_width_y = half_width_y * inner_scale_y
-    inner_min_x = center_x - inner_half_width_x
-    inner_max_x = center_x + inner_half_width_x
-    inner_min_y = center_y - inner_half_width_y
-    inner_max_y = center_y + inner_half_width_y
-
-    # --- 2-1. 패치 곡면 샘플 포인트 생성 ---
-    # 1단계: 샘플 포인트는 메모리에서만 보관하고,
-    sample_points = Sample_points(product_meshes, inner_min_x, inner_max_x, inner_min_y, inner_max_y)
-    print("[create_support] in-memory sample point count =", len(sample_points))
-    
-    # 2단계: Z 기준 2 sigma 필터 후, 필터된 포인트들을 통과하는 곡면 패치 생성
-    cut_brep = Cut_brep(sample_points, min_x, max_x, min_y, max_y, center_x, center_y)
-    
-    # base 박스를 Brep으로 생성하고 result_breps 초기화 (cut_brep 및 이후 union에서 사용)
-    base_box = rg.Box(base_bbox)
-    base_brep = rg.Brep.CreateFromBox(base_box)
+    base_brep = rg.Brep.CreateFromBox(rg.Box(base_bbox))
     if not base_brep:
         print("[create_support] Error: Failed to create base Brep, using simple box mesh")
-        support_meshes = [support_box_mesh]
-        result_breps = []
-    else:
-        result_breps = [base_brep]
-        support_meshes = []
-    
-    # --- 2-2. 패치 곡면으로 base Brep 윗부분 잘라내기 ---
-    if cut_brep is not None and ENABLE_PATCH_CUT:
-        tol = sc.doc.ModelAbsoluteTolerance
-        cut_center_z = cut_brep.GetBoundingBox(True).Center.Z
-        cut_result = []
-        for b in result_breps:
-            try:
-                pieces = b.Split(cut_brep, tol)
-            except Exception as e:
-                print("[create_support] Warning: base Brep split by patch failed:", e)
-                pieces = None
+        return []
+    result_breps = [base_brep]
+    if cut_brep is None:
+        return result_breps
+
+    tol = sc.doc.ModelAbsoluteTolerance
+    cut_center_z = cut_brep.GetBoundingBox(True).Center.Z
+    cut_result = []
+    for b in result_breps:
+        try:
+            pieces = b.Split(cut_brep, tol)
+        except Exception as e:
+            print("[create_support] Warning: base Brep split by patch failed:", e)
+            pieces = None
 
-            if not pieces or len(pieces) == 0:
-                cut_result.append(b)
-                continue
+        if not pieces or len(pieces) == 0:
+            cut_result.append(b)
+            continue
 
-            for piece in pieces:
-                bb = piece.GetBoundingBox(True)
-                if not bb.IsValid:
-                    continue
-                # 패치 곡면보다 아래(Z가 더 작은) 조각만 유지
-                if bb.Center.Z < cut_center_z:
-                    cut_result.append(piece)
+        for piece in pieces:
+            bb = piece.GetBoundingBox(True)
+            if not bb.IsValid:
+                continue
+            # 패치 곡면보다 아래(Z가 더 작은) 조각만 유지
+            if bb.Center.Z < cut_center_z:
+                cut_result.append(piece)
 
-        if cut_result:
-            result_breps = cut_result
-            print("[create_support] base Brep cut by patch surface; piece count =", len(result_breps))
-        else:
-            print("[create_support] Warning: patch cut produced no lower pieces; using original result_breps.")
+    if cut_result:
+        result_breps = cut_result
+        print("[create_support] base Brep cut by patch surface; piece count =", len(result_breps))
+    else:
+        print("[create_support] Warning: patch cut produced no lower pieces; using original result_breps.")
+    return result_breps
 
-    # --- 2-3. 패시 서피스를 포함한 Brep 솔리드 생성 후, offset Brep과 boolean 차집합, 마지막에 메쉬 변환 ---
-    # 1) base Brep 결과(result_breps)에 패시 서피스와의 교집합(cap_intersections)을 추가
+def Union_caps(result_breps, cut_brep):
+    """
+    base Brep 조각들에 패치 곡면과의 교집합(cap)을 더해 BooleanUnion으로 합친다.
+    (offset 차집합은 clearance 단계에서 처리)
+    """
     union_sources = list(result_breps)
     if cut_brep is not None and result_breps:
         try:
@@ -303,7 +291,6 @@ def create_support(product_ids, offset):
         if cap_intersections:
             union_sources.extend(cap_intersections)
 
-    # 2) 패시 서피스를 포함한 base Brep들을 BooleanUnion으로 합치기 (offset 차집합은 현재 비활성화)
     try:
         tol_union = sc.doc.ModelAbsoluteTolerance
         union_breps = rg.Brep.CreateBooleanUnion(union_sources, tol_union)
@@ -311,164 +298,559 @@ def create_support(product_ids, offset):
             result_breps = list(union_breps)
     except Exception as e:
         print("[create_support] Warning: BooleanUnion(result_breps + caps) failed:", e)
+    return result_breps
 
-    # 3) 최종 Brep들을 메쉬로 변환
-    support_meshes = Brep2Mesh(result_breps)
-    if not support_meshes:
-        print("Error: Brep->Mesh conversion produced no meshes, using simple box mesh")
-        support_meshes = [support_box_mesh]
+def Support_field(mesh_arrays, scaled_bbox, base_bbox, support_meshes=None, sampler='numpy', cell=0.1, lift=0.2,
+                  cache=None):
+    """
+    서포트 heightfield 중간 결과 (xs, ys, heights, underside)를 만든다.
+
+    mesh_arrays는 product 메쉬의 TriangleMesh (또는 (vertices, faces) 배열) 목록이다.
+    support_meshes가 없으면 (heightmap 엔진) product 아랫면을 bottom-facing Z-buffer로 래스터화해서
+    윗면을 직접 만들고, 있으면 (brep 엔진) 그 메쉬의 윗면을 top-facing Z-buffer로 읽는다.
+    underside는 offset clearance에 쓰는 product 아랫면 heightmap이다 (cache가 있으면 재사용).
+    """
+    min_x, min_y, max_x, max_y = scaled_bbox[:4]
+    use_bvh = (sampler == 'bvh')
+
+    cache_key = None
+    cached = None
+    if cache is not None:
+        cache_key = cache.key(mesh_arrays, {'stage': 'underside', 'cell': cell,
+                                            'bounds': [round(v, 6) for v in (min_x, min_y, max_x, max_y)],
+                                            'base_z': base_bbox.Min.Z})
+        cached = cache.get(cache_key)
+    if cached is not None:
+        xs, ys, underside = cached['xs'], cached['ys'], cached['underside']
+        print("[create_support] cache hit: underside heightmap reused.")
+    else:
+        xs, ys = grid_axes(min_x, max_x, min_y, max_y, cell)
+        underside = rasterize_underside(mesh_arrays, xs, ys, base_bbox.Min.Z, use_bvh=use_bvh)
+        if cache is not None:
+            try:
+                cache.put(cache_key, xs=xs, ys=ys, underside=underside)
+            except Exception as e:
+                print("[create_support] Warning: failed to write support cache:", e)
+
+    if support_meshes is None:
+        heights = support_top(underside, lift=lift, top_z=base_bbox.Max.Z, base_z=base_bbox.Min.Z)
+    else:
+        support_arrays = [MeshToTriangleMesh(mesh) for mesh in support_meshes if mesh]
+        heights = rasterize_top(support_arrays, xs, ys, base_bbox.Max.Z + 1.0, use_bvh=use_bvh)
+        if np.all(np.isnan(heights)):
+            heights = None
+    if heights is None:
+        print("[create_support] Error: heightmap has no hits.")
+        return None
+    print("[create_support] heightmap grid =", heights.shape[1], "x", heights.shape[0])
+    return xs, ys, heights, underside
+
+def Field_mesh(field, offset, base_z=0.0):
+    """
+    heightfield에 offset clearance를 적용해 닫힌 메쉬로 만든다 (문서에 보조 객체를 추가하지 않음).
+
+    offset은 Z 방향 평행이동뿐이므로, 서포트 윗면과 -Z로 내린 product 아랫면의 셀 단위 min이
+    MeshBooleanDifference 결과와 같다.
+    """
+    if field is None:
+        return None
+    vertices, faces = support_mesh(field, offset, base_z=base_z)
+    if faces.shape[0] == 0:
+        print("[create_support] Error: clearance removed the whole support.")
+        return None
+    return ArraysToMesh(vertices, faces)
+
+def _mesh_counts(meshes):
+    vertices, faces = geometry_counts(meshes)
+    return {'vertices': vertices, 'faces': faces}
+
+def Support_graph(product_ids, engine='brep', clearance='heightfield', cache=None, **params):
+    """
+    서포트 생성 단계를 lib.stages.StageGraph로 묶어서 반환한다.
+
+      gather → bounds → sampling → patch_fit → split → intersection_union → brep2mesh → heightmap → footprint
+      → clearance
+
+    각 단계는 읽는 파라미터(SUPPORT_PARAMS 키, params로 덮어쓰기)를 선언하므로 graph.set(offset=...)은
+    clearance만, graph.set(patch_lift=...)은 patch_fit 이후만 다시 계산한다 (샘플링 생략).
+    'split'(ENABLE_PATCH_CUT), 'footprint'(ENABLE_FOOTPRINT), 'clearance'(ENABLE_OFFSET_BOOLEAN)는
+    graph.enable()로 실행 중에 켜고 끌 수 있다. footprint는 heightfield에서 만드는 서포트에만 적용된다
+    (brep 엔진 + boolean clearance는 Brep 서포트를 그대로 쓴다).
+    engine / clearance는 그래프 모양을 정하므로 바꾸려면 그래프를 새로 만든다.
+    product_ids가 가리키는 문서 객체가 바뀌면 graph.invalidate()로 메모를 지운다.
+    """
+    values = dict(SUPPORT_PARAMS)
+    values.update(params)
+    values.update(engine=engine, clearance=clearance)
+    graph = StageGraph(values)
+
+    # --- 1. 입력 메쉬 집합 ---
+    def gather():
+        product_meshes = []
+        mesh_ids = []
+        for obj_id in product_ids:
+            obj = sc.doc.Objects.Find(obj_id)
+            if obj and isinstance(obj.Geometry, rg.Mesh):
+                product_meshes.append(obj.Geometry)
+                mesh_ids.append(obj_id)
+        return product_meshes, mesh_ids
+
+    def mesh_arrays(gathered):
+        return [MeshToTriangleMesh(mesh) for mesh in gathered[0] if mesh]
+
+    # --- 2. 서포트 베이스 박스 (XY 평면에서 중심 기준 scale_xy배) ---
+    def bounds(gathered, scale_xy, base_height):
+        product_meshes, mesh_ids = gathered
+        if not product_meshes:
+            print("[create_support] Error: No valid mesh objects found.")
+            return None
+        bbox = UnionBoundingBox(mesh_ids)
+        if not bbox.IsValid:
+            print("[create_support] Error: Cannot get bounding box for support base.")
+            return None
+        scaled_bbox = ScaleXY(bbox, scale_xy)
+        min_x, min_y, max_x, max_y = scaled_bbox[:4]
+        base_bbox = rg.BoundingBox(min_x, min_y, 0, max_x, max_y, base_height)
+        # 서포트 기본 박스 메쉬 (기본값)
+        support_box_mesh = rg.Mesh.CreateFromBox(base_bbox, 1, 1, 1)
+        if not support_box_mesh:
+            print("[create_support] Error: Failed to create support base mesh.")
+            return None
+        return {'scaled_bbox': scaled_bbox, 'base_bbox': base_bbox, 'support_box_mesh': support_box_mesh}
+
+    # --- 2-1. 패치 곡면 샘플 포인트 (비대칭 스케일된 내부 영역, 기본 X:50% x2, Y:100% x2) ---
+    def sampling(gathered, arrays, box, sampler, inner_scale_x, inner_scale_y, num_samples_x, num_samples_y):
+        min_x, min_y, max_x, max_y, half_width_x, half_width_y, center_x, center_y = box['scaled_bbox']
+        inner_min_x = center_x - half_width_x * inner_scale_x
+        inner_max_x = center_x + half_width_x * inner_scale_x
+        inner_min_y = center_y - half_width_y * inner_scale_y
+        inner_max_y = center_y + half_width_y * inner_scale_y
+
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.key(arrays,
+                                  {'stage': 'samples', 'sampler': 'adaptive' if sampler == 'adaptive' else 'grid',
+                                   'grid': [num_samples_x, num_samples_y], 'inner_scale': [inner_scale_x, inner_scale_y],
+                                   'bounds': [round(v, 6) for v in (min_x, min_y, max_x, max_y)]})
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print("[create_support] cache hit: sample points reused.")
+                return [rg.Point3d(x, y, z) for x, y, z in cached['points'].tolist()]
+
+        sample_points = Sample_points(gathered[0], inner_min_x, inner_max_x, inner_min_y, inner_max_y,
+                                      sampler=sampler, num_samples_x=num_samples_x, num_samples_y=num_samples_y,
+                                      mesh_arrays=arrays if sampler in ('adaptive', 'numpy', 'bvh') else None)
+        print("[create_support] in-memory sample point count =", len(sample_points))
+        if cache_key is not None:
+            points = np.array([(p.X, p.Y, p.Z) for p in sample_points], dtype=np.float64).reshape(-1, 3)
+            try:
+                cache.put(cache_key, points=points)
+            except Exception as e:
+                print("[create_support] Warning: failed to write support cache:", e)
+        return sample_points
+
+    # --- 2-2. sigma 필터 + 곡면 패치 (캐시 키는 샘플 포인트 자체) ---
+    def patch_fit(sample_points, box, sigma_k, patch_lift, patch_scale):
+        min_x, min_y, max_x, max_y, _, _, center_x, center_y = box['scaled_bbox']
+        cache_key = None
+        if cache is not None and sample_points:
+            points = np.array([(p.X, p.Y, p.Z) for p in sample_points], dtype=np.float64)
+            cache_key = cache.key([(points, np.zeros((0, 3), dtype=np.int32))],
+                                  {'stage': 'patch', 'sigma_k': sigma_k, 'lift': patch_lift,
+                                   'patch_scale': patch_scale, 'fit': 'tps',
+                                   'bounds': [round(v, 6) for v in (min_x, min_y, max_x, max_y)]})
+            cached = cache.get(cache_key)
+            if cached is not None:
+                print("[create_support] cache hit: patch surface reused.")
+                return GeometryFromJSON(cached['patch'])
+
+        cut_brep = Cut_brep(sample_points, min_x, max_x, min_y, max_y, center_x, center_y,
+                            lift=patch_lift, patch_scale=patch_scale, sigma_k=sigma_k)
+        if cache_key is not None and cut_brep is not None:
+            try:
+                cache.put(cache_key, patch=GeometryToJSON(cut_brep))
+            except Exception as e:
+                print("[create_support] Warning: failed to write support cache:", e)
+        return cut_brep
+
+    # --- 2-3. 패치 곡면으로 base Brep 윗부분 잘라내기 → cap union → 메쉬 변환 ---
+    def split(box, cut_brep):
+        return Split_base(box['base_bbox'], cut_brep)
+
+    def no_split(box, cut_brep):
+        return Split_base(box['base_bbox'], None)
+
+    def brep2mesh(result_breps, box):
+        support_meshes = Brep2Mesh(result_breps)
+        if not support_meshes:
+            print("Error: Brep->Mesh conversion produced no meshes, using simple box mesh")
+            support_meshes = [box['support_box_mesh']]
+        return support_meshes
+
+    # --- 3. heightfield (heightmap 엔진은 여기서 윗면을 직접 만든다) ---
+    def heightmap(arrays, box, *support, sampler, cell, field_lift):
+        return Support_field(arrays, box['scaled_bbox'], box['base_bbox'], support[0] if support else None,
+                             sampler=sampler, cell=cell, lift=field_lift, cache=cache)
+
+    # --- 3-1. overhang footprint: 서포트가 필요한 영역(lib.overhang) 밖 셀은 nan (기둥을 세우지 않음) ---
+    def footprint(field, arrays, overhang_angle, footprint_margin):
+        if field is None:
+            return None
+        xs, ys, heights, underside = field
+        mask, regions = support_footprint(arrays, xs, ys, overhang_angle, footprint_margin)
+        if not mask.any():
+            print("[create_support] Warning: no overhang found; keeping the full support footprint.")
+            return field
+        print("[create_support] overhang regions = {} | footprint {:.1%} of grid".format(len(regions), mask.mean()))
+        return xs, ys, np.where(mask, heights, np.nan), underside
+
+    def no_footprint(field, arrays, overhang_angle, footprint_margin):
+        return field
+
+    # --- 4. offset clearance ---
+    def clearance_mesh(field, box, offset):
+        return Field_mesh(field, offset, base_z=box['base_bbox'].Min.Z)
+
+    def no_clearance(field, box, offset):
+        return clearance_mesh(field, box, 0.0)
+
+    def voxel_clearance_mesh(field, box, arrays, offset, voxel):
+        # product를 3D로 offset만큼 팽창해서 뺀다 (옆벽에도 offset 그대로의 간격)
+        if field is None:
+            return None
+        xs, ys, heights, _ = field
+        vertices, faces = voxel_support(xs, ys, heights, arrays, offset, base_z=box['base_bbox'].Min.Z, voxel=voxel)
+        if faces.shape[0] == 0:
+            print("[create_support] Error: clearance removed the whole support.")
+            return None
+        return ArraysToMesh(vertices, faces)
+
+    def no_voxel_clearance(field, box, arrays, offset, voxel):
+        return clearance_mesh(field, box, 0.0)
+
+    def support_body(*inputs):
+        if engine != 'heightmap':
+            return inputs[0]
+        field, box = inputs
+        support = Field_mesh(field, 0.0, base_z=box['base_bbox'].Min.Z)
+        return [support] if support else [box['support_box_mesh']]
+
+    graph.add('gather', gather, describe=lambda gathered: _mesh_counts(gathered[0]))
+    graph.add('mesh_arrays', mesh_arrays, deps=['gather'])
+    graph.add('bounds', bounds, deps=['gather'], params=['scale_xy', 'base_height'])
+    field_deps = ['mesh_arrays', 'bounds']
+    if engine != 'heightmap':
+        graph.add('sampling', sampling, deps=['gather', 'mesh_arrays', 'bounds'],
+                  params=['sampler', 'inner_scale_x', 'inner_scale_y', 'num_samples_x', 'num_samples_y'],
+                  describe=lambda points: {'points': len(points)})
+        graph.add('patch_fit', patch_fit, deps=['sampling', 'bounds'],
+                  params=['sigma_k', 'patch_lift', 'patch_scale'],
+                  describe=lambda brep: {'patch': 1})
+        graph.add('split', split, deps=['bounds', 'patch_fit'], enabled=ENABLE_PATCH_CUT, fallback=no_split,
+                  describe=lambda breps: {'pieces': len(breps)})
+        graph.add('intersection_union', Union_caps, deps=['split', 'patch_fit'],
+                  describe=lambda breps: {'breps': len(breps)})
+        graph.add('brep2mesh', brep2mesh, deps=['intersection_union', 'bounds'], describe=_mesh_counts)
+        field_deps.append('brep2mesh')
+    graph.add('heightmap', heightmap, deps=field_deps, params=['sampler', 'cell', 'field_lift'],
+              describe=lambda field: {'cells': int(field[2].size)})
+    graph.add('footprint', footprint, deps=['heightmap', 'mesh_arrays'],
+              params=['overhang_angle', 'footprint_margin'], enabled=ENABLE_FOOTPRINT, fallback=no_footprint,
+              describe=lambda field: {'cells': int(np.count_nonzero(~np.isnan(field[2])))})
+
+    if clearance == 'heightfield':
+        graph.add('clearance', clearance_mesh, deps=['footprint', 'bounds'], params=['offset'],
+                  enabled=ENABLE_OFFSET_BOOLEAN, fallback=no_clearance,
+                  describe=lambda mesh: _mesh_counts([mesh]))
+    elif clearance == 'voxel':
+        graph.add('clearance', voxel_clearance_mesh, deps=['footprint', 'bounds', 'mesh_arrays'],
+                  params=['offset', 'voxel'], enabled=ENABLE_OFFSET_BOOLEAN, fallback=no_voxel_clearance,
+                  describe=lambda mesh: _mesh_counts([mesh]))
+    else:
+        # boolean 경로: 메쉬 Boolean은 offset마다 emit_support에서 실행하고, 적용할 offset만 단계로 둔다
+        graph.add('support_body', support_body,
+                  deps=['brep2mesh'] if engine != 'heightmap' else ['footprint', 'bounds'], describe=_mesh_counts)
+        graph.add('clearance', lambda offset: float(offset), params=['offset'],
+                  enabled=ENABLE_OFFSET_BOOLEAN, fallback=lambda offset: 0.0)
+    return graph
+
+def prepare_support(product_ids, sampler='rhino', engine='brep', clearance='heightfield', cache=None, **params):
+    """
+    Support_graph를 만들고 베이스 bbox까지 확인해서 반환한다 (실패하면 None).
+    나머지 단계는 emit_support에서 처음 필요할 때 계산되고, offset 별로는 clearance만 다시 계산된다.
+
+    sampler: 'rhino' (Ray 별 MeshRay), 'numpy' (격자 전체를 한 번에 교차), 'bvh' (캐시된 BVH 사용,
+             Ray 수가 면 수의 1% 이하일 때만 'numpy'보다 빠름. heightmap 격자에는 쓰지 않는다),
+             'adaptive' (quadtree 적응 샘플링, brep 엔진의 패치 샘플에만 적용)
+    engine: 'brep' (패치 곡면 + Brep 분할/Boolean) 또는 'heightmap' (Z-buffer heightmap으로 메쉬 직접 생성)
+    clearance: 'heightfield' (offset 차집합을 heightfield에서 메모리 내 계산) 또는
+               'boolean' (offset 메쉬 복사본과 Mesh.CreateBooleanDifference, 역시 문서 없이 메모리 내.
+               예전 이름 'command'도 받는다) 또는
+               'voxel' (product를 voxel 거리 변환으로 3D 팽창해서 빼기, lib.voxel. 옆벽 간격도 offset)
+    cache: lib.cache.DiskCache. 있으면 샘플링/패치 곡면/heightmap 결과를 디스크에서 재사용
+    params: SUPPORT_PARAMS 덮어쓰기
+    """
+    if clearance == 'command':
+        clearance = 'boolean'
+    graph = Support_graph(product_ids, engine=engine, clearance=clearance, cache=cache, sampler=sampler, **params)
+    if graph.get('bounds') is None:
+        return None
+    return graph
+
+def emit_support(graph, offset, scratch):
+    """
+    prepare_support 그래프에 offset을 설정하고 서포트 메쉬를 scratch(lib.scratch.ScratchContext)에 담아
+    handle 리스트를 반환한다. 문서에는 scratch.commit()에서 한 번에 추가된다.
+    """
+    box = graph.get('bounds')
+
+    # 패치 컷과 offset Boolean이 모두 꺼져 있으면 단순 박스만 생성
+    patch_cut = graph.is_enabled('split') if 'split' in graph else ENABLE_PATCH_CUT
+    if not patch_cut and not graph.is_enabled('clearance'):
+        handle = scratch.add(box['support_box_mesh'].DuplicateMesh(), layer='print_support', name='support')
+        print("[create_support] simple box only | handle =", handle)
+        return [handle]
 
-    # --- 3. 입력 메쉬들을 Z-방향으로 이동한 복사본 생성 (offset 메쉬: Z축만 사용, 디버그용으로만 문서에 추가) ---
-    offset_meshes = []
     try:
         dz = float(offset)
     except Exception:
         dz = 0.0
-
+    graph.set(offset=dz)
+
+    # --- 3. heightfield clearance: 서포트 윗면과 -Z로 내린 product 아랫면의 셀 단위 min (메모리 내)
+    #        (clearance='voxel'이면 product를 3D로 팽창해서 뺀 voxel 메쉬) ---
+    if graph.params['clearance'] in ('heightfield', 'voxel'):
+        support_mesh = graph.get('clearance')
+        if support_mesh is None:
+            return None
+        # 메모된 단계 결과는 그대로 두고 복사본을 담는다 (배치 변환이 메모를 바꾸지 않도록)
+        return [scratch.add(support_mesh.DuplicateMesh())]
+
+    # --- 3-1. (clearance='boolean') 입력 메쉬들을 Z-방향으로 이동한 메모리 내 복사본 (offset 메쉬: Z축만 사용) ---
+    dz = graph.get('clearance')
+    support_meshes = [mesh.DuplicateMesh() for mesh in graph.get('support_body')]
+    offset_meshes = []
     if abs(dz) > 1e-6:
         move_down = rg.Transform.Translation(0.0, 0.0, -dz)
-
-        for mesh in product_meshes:
+        for mesh in graph.get('gather')[0]:
             if not mesh:
                 continue
             moved = mesh.DuplicateMesh()
-            if not moved:
-                continue
-            moved.Transform(move_down)
-            # 디버그용 offset 메쉬를 문서에 추가하고 id만 보관
-            mid = sc.doc.Objects.AddMesh(moved)
-            offset_meshes.append(mid)
-
-    # --- 4. support_meshes를 문서에 추가하고, moved crown(offset_meshes)과 MeshBooleanDifference 실행 ---
-    support_ids = []
-    for mesh in support_meshes:
-        sid = sc.doc.Objects.AddMesh(mesh)
-        support_ids.append(sid)
-
-    # Rhino 커맨드로 MeshBooleanDifference 실행: support_ids - offset_meshes
-    result_support_ids = support_ids[:]
-    if support_ids and offset_meshes:
-        try:
-            rs.UnselectAllObjects()
-
-            # 첫 번째 집합(A): 서포트 메쉬 선택
-            rs.SelectObjects(support_ids)
-
-            # 두 번째 집합(B): offset 메쉬들은 _SelID로 커맨드 안에서 지정
-            selid_tokens = " ".join("_SelID {}".format(str(mid)) for mid in offset_meshes)
-            cmd = "!_-MeshBooleanDifference _DeleteInput=Yes {} _Enter".format(selid_tokens)
-            rs.Command(cmd, echo=False)
+            if moved and moved.Transform(move_down):
+                offset_meshes.append(moved)
+
+    # --- 4. support_meshes - offset_meshes (Mesh.CreateBooleanDifference, 문서/커맨드 없이) ---
+    with trace_stage('mesh_boolean') as st:
+        result = support_meshes
+        if support_meshes and offset_meshes:
+            difference = rg.Mesh.CreateBooleanDifference(support_meshes, offset_meshes)
+            if difference:
+                result = list(difference)
+            else:
+                print('[create_support] Warning: mesh boolean difference failed; keeping support without clearance.')
+        st.set(offset=dz, mode='boolean', results=len(result))
 
-            # moved crown(offset) 메쉬는 항상 제거해서 장면에 남지 않도록 정리
-            try:
-                rs.DeleteObjects(offset_meshes)
-            except Exception:
-                pass
-        except Exception as e:
-            print('[create_support] Warning: MeshBooleanDifference command failed:', e)
+    return [scratch.add(mesh) for mesh in result]
 
-    return result_support_ids
+def create_support(product_ids, offset, sampler='rhino', engine='brep', clearance='heightfield', cache=None,
+                   scratch=None, **params):
+    """
+    RhinoCommon API를 사용하여 메모리 효율적으로 서포트를 생성합니다.
 
+    인자는 prepare_support 참고. 서포트 id 리스트를 반환하고 실패하면 None.
+    scratch(lib.scratch.ScratchContext)를 주면 commit하지 않고 handle 리스트를 반환한다.
+    """
+    graph = prepare_support(product_ids, sampler=sampler, engine=engine, clearance=clearance, cache=cache, **params)
+    if graph is None:
+        return None
+    if scratch is not None:
+        return emit_support(graph, offset, scratch)
+    scratch = RhinoScratch('create_support')
+    handles = emit_support(graph, offset, scratch)
+    scratch.commit()
+    return scratch.ids(handles) if handles else handles
+
+def create_supports(product_ids, offsets, sampler='rhino', engine='brep', clearance='heightfield', cache=None,
+                    scratch=None, **params):
+    """
+    여러 offset의 서포트를 한 번에 만든다 (sweep).
 
-def engrave_text_on_crown(product_id, bbox, text_to_engrave, text_size, z_ratio, engraving_depth):
+    같은 Support_graph에 offset만 바꿔 가며 emit_support를 호출하므로 샘플링/곡면 피팅/베이스 생성은
+    product 당 한 번만, offset 별로는 clearance 단계만 다시 실행된다.
+    서포트는 scratch(lib.scratch.ScratchContext)에 모인다. scratch를 주면 commit하지 않고 handle을 반환하고
+    (호출한 쪽에서 배치 후 한 번에 commit), 없으면 여기서 한 번에 문서에 추가하고 id를 반환한다.
+    offsets와 같은 순서의 리스트 목록을 반환한다 (실패한 offset은 None). 나머지 인자는 prepare_support 참고.
     """
-    크라운 내부에 텍스트를 음각으로 각인합니다.
+    graph = prepare_support(product_ids, sampler=sampler, engine=engine, clearance=clearance, cache=cache, **params)
+    if graph is None:
+        return [None for _ in offsets]
+    own_scratch = scratch is None
+    if own_scratch:
+        scratch = RhinoScratch('create_supports')
+    support_sets = [emit_support(graph, offset, scratch) for offset in offsets]
+    print("[create_support] stages run:", ", ".join(graph.runs()))
+
+    # 서포트 파라미터/출처를 user text로 기록 (lib.usertext 포맷, commit 때 속성으로 함께 추가)
+    p = graph.params
+    meta = {
+        'sampler': p['sampler'],
+        'engine': p['engine'],
+        'clearance': p['clearance'],
+        'scale_xy': p['scale_xy'],
+        'lift': p['patch_lift'],
+        'patch_scale': p['patch_scale'],
+        'patch_cut': graph.is_enabled('split') if 'split' in graph else ENABLE_PATCH_CUT,
+        'offset_boolean': graph.is_enabled('clearance'),
+        'source': rs.DocumentName() or '',
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    for offset, handles in zip(offsets, support_sets):
+        if handles:
+            scratch.set_user_text(handles, 'support', usertext.encode(dict(meta, offset=float(offset))))
+    if own_scratch:
+        scratch.commit()
+        support_sets = [scratch.ids(handles) if handles else handles for handles in support_sets]
+
+    # product 아랫면 heightmap (격자 범위 + float32 높이, 압축 저장)
+    field = graph.peek('heightmap')
+    if field is not None:
+        xs, ys, _, underside = field
+        set_user_text(list(product_ids), 'underside', {
+            'x': [float(xs[0]), float(xs[-1]), int(xs.shape[0])],
+            'y': [float(ys[0]), float(ys[-1]), int(ys.shape[0])],
+            'z': np.asarray(underside, dtype=np.float32),
+        }, compress=True)
+    return support_sets
+
+
+def engrave_text_on_crown(product_id, bbox, text_to_engrave, text_size, z_ratio, engraving_depth, mirror=False):
     """
-    # 1. 위치 계산 (전달받은 bbox 사용)
+    크라운 내부에 텍스트를 음각으로 각인합니다 (문서 커맨드 없이 메모리 내 메쉬 연산).
 
-    # 텍스트를 생성할 Z 위치 계산
+    bbox 중심축의 z_ratio 높이에서 +X 방향으로 lib.engrave 커터를 내벽에 투영하고
+    Mesh.CreateBooleanDifference 결과로 product 메쉬를 교체한다. 성공하면 True.
+    """
+    obj = sc.doc.Objects.Find(product_id)
+    if not obj or not isinstance(obj.Geometry, rg.Mesh):
+        print("[engrave] Error: product is not a mesh object.")
+        return False
+    mesh = obj.Geometry
+    vertices, faces = MeshToTriangleMesh(mesh)
+
+    # 텍스트 평면: YZ 평면 (bbox 중심축, z_ratio 높이), 투영 방향 +X
     z_pos = bbox.Min.Z + bbox.Diagonal.Z * z_ratio
-    # 텍스트를 생성할 YZ 평면의 X 위치 (X=0)
-    text_origin = rg.Point3d(0, bbox.Center.Y, z_pos)
-
-    # 2. YZ 평면에 텍스트 커브 생성
-    # YZ 평면에 텍스트가 서 있도록 Plane 설정
-    text_plane = rg.Plane(text_origin, rg.Vector3d.YAxis, rg.Vector3d.ZAxis)
-    
-    # 텍스트 객체 생성 (가운데 정렬)
-    temp_text_id = rs.AddText(text_to_engrave, text_plane, height=text_size, font="Arial", font_style=1, justification=2) # 2 = Center
-    if not temp_text_id:
-        print("Error: Failed to create temporary text object.")
-        return
-
-    # 텍스트를 커브로 분해
-    exploded_curves = rs.ExplodeText(temp_text_id)
-    rs.DeleteObject(temp_text_id)
-    if not exploded_curves:
-        print("Error: Failed to explode text into curves.")
-        return
-
-    # 분해된 커브들을 그룹으로 묶음
-    group_name = "temp_text_group"
-    rs.AddGroup(group_name)
-    rs.AddObjectsToGroup(exploded_curves, group_name)
-
-    # 3. _Project 커맨드를 사용하여 크라운 내벽에 커브 투영
-    group_objects = rs.ObjectsByGroup(group_name)
-    if not group_objects:
-        print("Error: No objects found in the group to project.")
-        return
-    rs.SelectObjects(group_objects)
-    rs.SelectObject(product_id)
-    
-    # Project 커맨드 실행 (CPlane Z 방향으로 투영)
-    # 방향을 명시적으로 제어하기 위해 View를 Right 설정하고 투영
-    rs.Command('_-SetActiveViewport Right', echo=False)
-    rs.Command('_-Project _DeleteInput=Yes', echo=False)
-    
-
-    projected_curves = rs.LastCreatedObjects()
-    rs.UnselectAllObjects()
-
-    if not projected_curves:
-        print("Error: Projection resulted in no curves.")
-        rs.DeleteObjects(text_curves)
-        return
-
-    # 4. Z축에 가장 가까운 2개의 커브 선택
-    def distance_to_z_axis(curve_id):
-        center = rs.coercecurve(curve_id).GetBoundingBox(True).Center
-        return center.X**2 + center.Y**2 # Z축과의 거리 제곱 (sqrt 불필요)
-
-    projected_curves.sort(key=distance_to_z_axis)
-    
-    curves_to_loft = projected_curves[:2]
-    curves_to_delete = projected_curves[2:]
-
-    if curves_to_delete:
-        rs.DeleteObjects(curves_to_delete)
-
-    if len(curves_to_loft) < 2:
-        print("Error: Not enough curves found for lofting.")
-        rs.DeleteObjects(text_curves + curves_to_loft)
-        return
+    origin = (bbox.Center.X, bbox.Center.Y, z_pos)
+    cut_vertices, cut_faces, skipped = engraving_cutter(vertices, faces, text_to_engrave, text_size, engraving_depth,
+                                                        origin, mirror=mirror, max_distance=bbox.Diagonal.Length)
+    if skipped:
+        print("[engrave] Warning: characters skipped (no font glyph or no wall hit):", "".join(skipped))
+    if cut_faces.shape[0] == 0:
+        print("[engrave] Error: nothing to engrave.")
+        return False
+
+    cutter = ArraysToMesh(cut_vertices, cut_faces)
+    result = rg.Mesh.CreateBooleanDifference([mesh], [cutter])
+    if not result:
+        print("[engrave] Error: mesh boolean difference failed.")
+        return False
+    engraved = result[0]
+    for piece in result[1:]:
+        engraved.Append(piece)
+    sc.doc.Objects.Replace(product_id, engraved)
+    clear_bbox_cache(product_id)
+    return True
+
+def engrave_products(product_ids, texts, text_size, z_ratio, engraving_depth, mirror=False):
+    """
+    여러 유닛에 각각의 텍스트(케이스 ID 등)를 각인한다. 글자 프리즘은 lib.engrave 캐시에서 재사용된다.
+    각인된 product 수를 반환한다.
+    """
+    count = 0
+    for product_id, text in zip(product_ids, texts):
+        bbox = UnionBoundingBox([product_id])
+        if not bbox.IsValid:
+            continue
+        if engrave_text_on_crown(product_id, bbox, text, text_size, z_ratio, engraving_depth, mirror=mirror):
+            count += 1
+    print("[engrave] engraved {} / {} products".format(count, len(product_ids)))
+    return count
 
-    # 5. 음각 형상 생성 및 적용
-    loft_surface = rs.AddLoftSrf(curves_to_loft, loft_type=0) # 0=Normal
-    if not loft_surface:
-        print("Error: Failed to create loft surface.")
-        rs.DeleteObjects(text_curves + projected_curves)
-        return
+def Orient_products(product_ids, **options):
+    """
+    각 unit을 lib.orient.best_orientation이 고른 방향으로 bbox 중심 기준 회전한다 (서포트 생성 전).
+    options는 best_orientation 인자 (count, refine, weights, overhang_angle). 결과 dict 리스트를 반환한다.
+    """
+    results = []
+    for obj_id in product_ids:
+        mesh = rs.coercemesh(obj_id)
+        if not mesh:
+            results.append(None)
+            continue
+        with trace_stage('orient') as st:
+            result = best_orientation(*MeshToTriangleMesh(mesh), **options)
+            st.set(evaluated=result['evaluated'])
+        center = UnionBoundingBox([obj_id]).Center
+        xform = rg.Transform.Identity
+        for i in range(3):
+            for j in range(3):
+                xform[i, j] = float(result['rotation'][i, j])
+        xform = (rg.Transform.Translation(rg.Vector3d(center)) * xform
+                 * rg.Transform.Translation(-rg.Vector3d(center)))
+        rs.TransformObject(obj_id, xform)
+        results.append(result)
+        d = result['default']
+        print("[orient] {} | up = ({:.2f}, {:.2f}, {:.2f}) | overhang {:.1f} (flip {:.1f}) mm2 | "
+              "support {:.1f} (flip {:.1f}) mm3 | height {:.2f} (flip {:.2f}) mm".format(
+                  rs.ObjectName(obj_id) or obj_id, *result['up'], result['overhang'], d['overhang'],
+                  result['volume'], d['volume'], result['height'], d['height']))
+    clear_bbox_cache(product_ids)
+    return results
+
+def Layout_groups(groups, plate=(140.0, 80.0), gap=2.0, margin=1.0, allow_rotate=True, plate_spacing=10.0,
+                  scratch=None):
+    """
+    (product + 서포트) 그룹들의 XY bbox footprint를 빌드 플레이트에 skyline 패킹(lib.packing)으로 배치한다.
 
-    # 서피스의 법선 방향 계산 (크라운 안쪽을 향하도록)
-    srf_center = rs.SurfaceAreaCentroid(loft_surface)[0]
-    crown_center = bbox.Center
-    extrusion_vector = crown_center - srf_center
-    extrusion_vector.Unitize()
-    extrusion_vector *= engraving_depth
-
-    extrusion_solid = rs.ExtrudeSurface(loft_surface, extrusion_vector)
-    if not extrusion_solid:
-        print("Error: Failed to extrude surface for engraving.")
-        rs.DeleteObjects(text_curves + projected_curves + [loft_surface])
-        return
+    90도 회전이 필요한 그룹은 bbox 중심 기준으로 Z축 회전한다. 플레이트가 여러 장이면
+    X 방향으로 plate_spacing 간격을 두고 나란히 놓는다.
+    scratch(lib.scratch.ScratchContext)를 주면 그룹은 handle 리스트이고 문서 대신 메모리에서 변환한다.
 
-    # 불리언 차집합으로 음각 적용
-    rs.BooleanDifference(product_id, extrusion_solid, delete_input=True)
+    Returns:
+        (배치된 객체 id(handle) 리스트, 플레이트 별 객체 id(handle) 리스트 목록)
+    """
+    if not groups:
+        return [], []
+    stats = [bbox_stats(group) if scratch is None else scratch.bbox_stats(group) for group in groups]
+    sizes = [(st['size'][0], st['size'][1]) for st in stats]
+    placements, result = pack_rectangles(sizes, plate, gap=gap, margin=margin, allow_rotate=allow_rotate)
+
+    placed = []
+    plates = [[] for _ in range(result['plates'])]
+    for group, st, (x, y, rotated, plate_index) in zip(groups, stats, placements.tolist()):
+        if plate_index < 0:
+            print("[layout] Warning: group larger than the build plate; left in place.")
+            placed.extend(group)
+            continue
+        cx, cy = st['centroid'][0], st['centroid'][1]
+        w, h = st['size'][0], st['size'][1]
+        xform = rg.Transform.Identity
+        if rotated:
+            # 중심 기준 90도 회전 후 bbox 최소 모서리 = (cx - h/2, cy - w/2)
+            xform = rg.Transform.Rotation(math.pi / 2.0, rg.Vector3d.ZAxis, rg.Point3d(cx, cy, 0.0))
+            w, h = h, w
+        dx = x + plate_index * (plate[0] + plate_spacing) - (cx - w * 0.5)
+        dy = y - (cy - h * 0.5)
+        xform = rg.Transform.Translation(dx, dy, 0.0) * xform
+        if scratch is None:
+            rs.TransformObjects(group, xform)
+        else:
+            scratch.transform(group, xform)
+        placed.extend(group)
+        plates[int(plate_index)].extend(group)
 
-    # 6. 정리
-    rs.DeleteObjects(projected_curves + [loft_surface])
-    rs.DeleteGroup(group_name)
+    print("[layout] groups = {} | plates = {} | utilization = {}".format(
+        len(groups), result['plates'], ", ".join("{:.1%}".format(u) for u in result['utilization'])))
+    return placed, plates
 
 def main():
     rs.Command(f'!_-SelAll')
@@ -477,87 +859,73 @@ def main():
         print("No objects selected.")
         return
 
-    # 1. 크라운 뒤집기 및 이동
-    rs.RotateObjects(product, (0, 0, 0), 180, (1, 0, 0))
+    # 1. 크라운 뒤집기(또는 방향 탐색) 및 이동
+    if ENABLE_ORIENT:
+        Orient_products(product)
+    else:
+        rs.RotateObjects(product, (0, 0, 0), 180, (1, 0, 0))
     z_min = get_min(product)[2]
     rs.MoveObjects(product, (0, 0, -z_min + 0.5))
     assign_object(product, 'print', 'product')
-    
-    # 2. 여러 offset 값으로 서포트 생성 및 정렬 (한 열만 사용)
+
+    # 1-1. 크라운 내부에 텍스트 각인 (복사본에도 남도록 서포트 생성 전에 적용, product 메쉬를 직접 수정)
+    if ENABLE_ENGRAVE:
+        text_to_engrave = "abc"         # 객체 이름이 없을 때 쓰는 기본 텍스트
+        engraving_text_size = 0.1
+        engraving_z_ratio = 3.0 / 4.0
+        engraving_depth = 0.3           # 음각 깊이
+        texts = [rs.ObjectName(obj_id) or text_to_engrave for obj_id in product]
+        engrave_products(product, texts, engraving_text_size, engraving_z_ratio, engraving_depth)
+
+    # 2. 여러 offset 값으로 서포트 생성 후 빌드 플레이트에 패킹 배치
     # offsets = [0.10]
     offsets = [0.14, 0.16,.18]
-    total_x_shift = 0.0
+    groups = []
     all_created_objects = []
 
+    if ENABLE_TRACE:
+        start_trace('create_supports', rs.DocumentPath() + rs.DocumentName()[:-4] + '_trace.json')
+
     try:
         rs.EnableRedraw(False)
-        for offset_val in offsets:
-            # 각 offset 값에 대해 서포트 한 세트만 생성
-            copy_objs = rs.CopyObjects(product)
-            support_ids = create_support(copy_objs, offset=str(offset_val))
-
-            if support_ids:
-                group = copy_objs + support_ids
-
-                # create_support에서 ENABLE_OFFSET_DEBUG=True 인 경우 생성된 offset 디버그 메쉬도 함께 이동
-                debug_ids = sc.sticky.get("offset_debug_ids", []) if hasattr(sc, "sticky") else []
-                if debug_ids:
-                    group = group + debug_ids
-                bbox = rg.BoundingBox.Empty
-                for obj_id in group:
-                    obj = sc.doc.Objects.Find(obj_id)
-                    if obj:
-                        bbox.Union(obj.Geometry.GetBoundingBox(True))
-
-                if bbox.IsValid:
-                    # 바운딩박스를 이용해 X 이동량 계산
-                    width = bbox.Max.X - bbox.Min.X
-
-                    # X축 정렬 (offset 별로 오른쪽으로 차례대로 배치)
-                    rs.MoveObjects(group, (total_x_shift, 0, 0))
-                    # 이번 offset 세트에 사용한 debug ids는 재사용되지 않도록 초기화
-                    if hasattr(sc, "sticky") and "offset_debug_ids" in sc.sticky:
-                        sc.sticky["offset_debug_ids"] = []
-                    all_created_objects.extend(group)
-
-                    # 다음 offset을 위한 X축 이동량 갱신
-                    total_x_shift += width + 2.0  # 서포트 사이 2mm 간격
+        # product 복사/서포트/배치 변환은 메모리(scratch)에서 하고, 최종 결과만 한 번에 문서에 추가한다
+        scratch = RhinoScratch('AddSupport')
+        # 샘플링/곡면 피팅/베이스 생성은 한 번만 하고 offset 별로 clearance만 다시 계산 (sweep)
+        support_sets = create_supports(product, offsets, cache=DiskCache(), scratch=scratch)
+        for offset_val, support_handles in zip(offsets, support_sets):
+            # 각 offset 값에 대해 product 복사본 + 서포트 한 세트를 그룹으로 모은다
+            if support_handles:
+                copies = [h for h in (scratch.load(obj_id) for obj_id in product) if h is not None]
+                group = copies + support_handles
+                if scratch.bbox_stats(group) is not None:
+                    groups.append(group)
                 else:
-                    rs.DeleteObjects(group)
-            else:
-                # 서포트 생성 실패 시 복사본 제거
-                rs.DeleteObjects(copy_objs)
+                    scratch.discard(group)
 
-        # 각 루프 후 Undo 기록 삭제하여 메모리 확보
-        rs.Command('-_CommandHistory _Purge _Enter', False)
+        placed, plates = Layout_groups(groups, PLATE_SIZE, gap=PLATE_GAP, margin=PLATE_MARGIN, scratch=scratch)
+
+        # 배치까지 끝난 결과를 한 번에 문서에 추가 (Undo 기록 하나)
+        with trace_stage('commit') as st:
+            scratch.commit()
+            all_created_objects = scratch.ids(placed)
+            plates = [scratch.ids(plate_handles) for plate_handles in plates]
+            st.set(objects=len(all_created_objects), failed=len(scratch.failed))
+
+        # 3. 플레이트 별 3MF (+ 선택적으로 STL) 내보내기
+        if ENABLE_EXPORT:
+            base = rs.DocumentPath() + rs.DocumentName()[:-4]
+            for index, plate_objs in enumerate(plates):
+                ExportPlate(plate_objs, '{}_plate{}.3mf'.format(base, index + 1), stl=EXPORT_STL,
+                            title='{} plate {}'.format(rs.DocumentName(), index + 1))
 
     finally:
         rs.EnableRedraw(True)
+        stop_trace()
 
     # 원본 product 숨기기
     rs.HideObjects(product)
 
 
-    # 3. 크라운 내부에 텍스트 각인
-    # 각인 관련 파라미터
-    text_to_engrave = "abc"
-    engraving_text_size = 0.1
-    engraving_z_ratio = 3.0 / 4.0
-    engraving_depth = 0.3 # 음각 깊이
-
-    # # 3. 크라운 내부에 텍스트 각인
-    # # 각인 기능을 사용하려면 아래 코드의 주석을 해제하세요.
-    # # 주의: 이 기능은 product 객체를 직접 수정합니다.
-    # if product:
-    #     # 각인 전에 바운딩 박스 계산
-    #     crown_geom = rs.coercegeometry(product[0])
-    #     if crown_geom:
-    #         bbox = crown_geom.GetBoundingBox(True)
-    #         if bbox.IsValid:
-    #             engrave_text_on_crown(product[0], bbox, text_to_engrave, engraving_text_size, engraving_z_ratio, engraving_depth)
-    #     else:
-    #         print("Error: Invalid crown geometry for engraving.")
-
 if __name__ == "__main__":
     print("AddSupport_v2 started.")
     main()
@@ -0,0 +1,79 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+
+# Rhino 없이 폴더 안의 크라운 STL들에 서포트를 만들어 STL로 내보내는 배치 스크립트.
+#
+#   python BatchSupport.py <input_dir> <output_dir> --offsets 0.14 0.16 0.18 --workers 8
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lib.pipeline import DEFAULT_PARAMS, process_file
+
+
+def _run(task):
+    path, out_dir, offsets, params = task
+    return process_file(path, out_dir, offsets, params)
+
+
+def stl_paths(folder):
+    """folder 안의 .stl 파일 (확장자 대소문자 무관, 이름 순). 대소문자를 구분하지 않는 파일 시스템에서도 한 번씩만."""
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                  if name.lower().endswith('.stl') and os.path.isfile(os.path.join(folder, name)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate print supports for a folder of crown meshes.')
+    parser.add_argument('input_dir', help='folder with input .stl files')
+    parser.add_argument('output_dir', help='folder for the supported .stl files')
+    parser.add_argument('--offsets', type=float, nargs='+', default=[0.14, 0.16, 0.18],
+                        help='Z clearance values; one output file per offset')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes')
+    parser.add_argument('--cell', type=float, default=DEFAULT_PARAMS['cell'],
+                        help='heightmap grid spacing in mm')
+    parser.add_argument('--bvh', action='store_true',
+                        help='use the BVH ray index (slower than the default binned sampler '
+                             'unless rays are under ~1%% of the faces)')
+    parser.add_argument('--footprint', action='store_true',
+                        help='build support only under overhanging regions instead of the whole bounding box')
+    parser.add_argument('--voxel', type=float, default=None,
+                        help='voxel size in mm; applies the offset as a true 3D clearance instead of a Z shift')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = stl_paths(args.input_dir)
+    if not paths:
+        print('No .stl files found in', args.input_dir)
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    params = {'cell': args.cell, 'use_bvh': args.bvh, 'footprint': args.footprint, 'voxel': args.voxel}
+    tasks = [(path, args.output_dir, args.offsets, params) for path in paths]
+
+    start = time.time()
+    failed = 0
+    workers = max(1, min(args.workers, len(tasks)))
+    with multiprocessing.Pool(workers) as pool:
+        for i, result in enumerate(pool.imap_unordered(_run, tasks), 1):
+            name = os.path.basename(result['input'])
+            if result['error']:
+                failed += 1
+                print('[{}/{}] {} failed: {}'.format(i, len(tasks), name, result['error']))
+            else:
+                print('[{}/{}] {} | faces = {} | outputs = {} | {:.2f}s'.format(
+                    i, len(tasks), name, result['faces'], len(result['outputs']), result['seconds']))
+
+    print('done: {} files, {} failed, {:.1f}s'.format(len(tasks), failed, time.time() - start))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
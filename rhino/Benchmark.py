@@ -0,0 +1,197 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+
+# 가상 크라운/브릿지 메쉬로 서포트 파이프라인 커널 성능을 재는 벤치마크 (Rhino 없이 NumPy만 사용).
+#
+#   python Benchmark.py --sizes 32 64 128 256 --bridge 3 --output bench/2025-11-30.json
+#   python Benchmark.py --compare bench/2025-11-30.json       # 이전 결과와 비교
+#   --output이 없으면 ~/.cache/3d_print/benchmarks/에 저장한다 (작업 트리를 더럽히지 않도록)
+#
+# 측정 커널:
+#   sample_points (격자 Ray / BVH / adaptive), cut_brep (2 sigma + TPS fit + 36x36 평가),
+#   bvh_build, support_field (heightmap), support_mesh (offset 3개), voxel_clearance (3D offset 1개), support_footprint (overhang 영역), orient (방향 탐색), export (STL 쓰기), export_3mf, read_stl
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from lib.bvh import BVH
+from lib.cache import DEFAULT_CACHE_DIR
+from lib.orient import best_orientation
+from lib.overhang import support_footprint
+from lib.pipeline import DEFAULT_PARAMS, flip_and_drop, scaled_bounds, support_field, support_mesh
+from lib.raycast import sample_ray_grid, adaptive_samples
+from lib.stl import StlWriter, read_stl
+from lib.surface import fit_surface
+from lib.synthetic import crown_mesh, bridge_mesh
+from lib.threemf import write_3mf
+from lib.voxel import VOXEL, voxel_support
+
+
+OFFSETS = [0.14, 0.16, 0.18]
+# --output가 없을 때 결과 JSON 폴더 (저장소 밖, lib.cache와 같은 사용자 캐시 폴더)
+DEFAULT_OUTPUT_DIR = os.path.join(DEFAULT_CACHE_DIR, 'benchmarks')
+
+
+def _time(fn, repeat):
+    """fn을 repeat번 실행해 (최소 시간, 평균 시간, 마지막 결과)를 반환한다."""
+    times = []
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), sum(times) / len(times), result
+
+
+def _inner_bounds(meshes):
+    """Support_graph sampling 단계와 같은 패치 샘플 영역 (ScaleXY 1.05, X 50% x2 / Y 100% x2 = bbox와 동일 폭)."""
+    min_x, min_y, max_x, max_y = scaled_bounds(meshes, 1.05)
+    return min_x, max_x, min_y, max_y
+
+
+def bench_case(name, vertices, faces, repeat, out_dir):
+    """메쉬 하나에 대해 모든 커널을 측정한 결과 레코드 목록."""
+    vertices = flip_and_drop(vertices, DEFAULT_PARAMS['drop_z'])
+    meshes = [(vertices, faces)]
+    params = dict(DEFAULT_PARAMS)
+    records = []
+
+    def record(kernel, fn, **extra):
+        best, mean, result = _time(fn, repeat)
+        rec = {'case': name, 'faces': int(faces.shape[0]), 'kernel': kernel, 'best': best, 'mean': mean}
+        rec.update(extra)
+        records.append(rec)
+        print('  {:<24} best {:8.4f}s  mean {:8.4f}s'.format(kernel, best, mean))
+        return result
+
+    bounds = _inner_bounds(meshes)
+    points = record('sample_points.grid', lambda: sample_ray_grid(meshes, *bounds))
+    record('bvh_build', lambda: BVH(vertices, faces))
+    record('sample_points.bvh', lambda: sample_ray_grid(meshes, *bounds, use_bvh=True))
+    adaptive, rays = record('sample_points.adaptive', lambda: adaptive_samples(meshes, *bounds, max_rays=450))
+    records[-1]['rays'] = int(rays)
+
+    def cut_brep():
+        surface, _ = fit_surface(points, sigma_k=params['sigma_k'])
+        x0, y0, x1, y1 = surface.translated(params['lift']).bounds
+        return surface.grid(np.linspace(x0, x1, 36), np.linspace(y0, y1, 36))
+    record('cut_brep', cut_brep)
+
+    field = record('support_field', lambda: support_field(meshes, params), cell=params['cell'])
+    supports = record('support_mesh', lambda: [support_mesh(field, offset, params['base_z']) for offset in OFFSETS],
+                      offsets=len(OFFSETS))
+    record('voxel_clearance', lambda: voxel_support(field[0], field[1], field[2], meshes, OFFSETS[0],
+                                                    params['base_z'], voxel=VOXEL), voxel=VOXEL)
+    mask, _ = record('support_footprint', lambda: support_footprint(meshes, field[0], field[1],
+                                                                  params['overhang_angle'], params['footprint_margin']))
+    records[-1]['footprint'] = float(mask.mean())
+    orient = record('orient', lambda: best_orientation(vertices, faces))
+    records[-1]['candidates'] = int(orient['evaluated'])
+
+    path = os.path.join(out_dir, name + '.stl')
+
+    def export():
+        with StlWriter(path) as writer:
+            writer.add(vertices, faces)
+            for sv, sf in supports:
+                writer.add(sv, sf)
+    record('export', export)
+    parts = [('product', vertices, faces, None)] + [('support-{}'.format(i), sv, sf, {'offset': offset})
+                                                    for i, ((sv, sf), offset) in enumerate(zip(supports, OFFSETS))]
+    record('export_3mf', lambda: write_3mf(os.path.join(out_dir, name + '.3mf'), parts))
+    record('read_stl', lambda: read_stl(path))
+    return records
+
+
+def cases(sizes, bridge_units):
+    """(이름, vertices, faces) 생성기: 크기 별 크라운 + 브릿지."""
+    for size in sizes:
+        v, f = crown_mesh(size)
+        yield 'crown-{}'.format(size), v, f
+    if bridge_units > 1:
+        for size in sizes:
+            v, f = bridge_mesh(bridge_units, size)
+            yield 'bridge{}-{}'.format(bridge_units, size), v, f
+
+
+def _version():
+    """git 커밋 (없으면 'unknown')."""
+    try:
+        here = os.path.dirname(os.path.abspath(__file__))
+        out = subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=here,
+                                      stderr=subprocess.DEVNULL)
+        return out.decode('ascii').strip()
+    except Exception:
+        return 'unknown'
+
+
+def compare(previous, current):
+    """같은 (case, kernel)의 best 시간을 비교해 출력한다 (>1 이면 빨라짐)."""
+    before = {(r['case'], r['kernel']): r['best'] for r in previous['results']}
+    print('\ncompared with {} ({})'.format(previous['meta'].get('version'), previous['meta'].get('date')))
+    for r in current['results']:
+        key = (r['case'], r['kernel'])
+        if key in before and r['best'] > 0:
+            print('  {:<14} {:<24} {:8.4f}s -> {:8.4f}s  x{:.2f}'.format(
+                r['case'], r['kernel'], before[key], r['best'], before[key] / r['best']))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the support kernels on synthetic crowns and bridges.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[32, 64, 128, 256],
+                        help='crown resolution (about size^2 triangles per unit)')
+    parser.add_argument('--bridge', type=int, default=3, help='units per bridge case (0 or 1 to skip)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per kernel; the best time is reported')
+    parser.add_argument('--output', default=None,
+                        help='result JSON path (default: ~/.cache/3d_print/benchmarks/<version>_<date>.json)')
+    parser.add_argument('--compare', default=None, help='previous result JSON to compare against')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    version = _version()
+    date = time.strftime('%Y-%m-%dT%H:%M:%S')
+    meta = {
+        'version': version,
+        'date': date,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for name, v, f in cases(args.sizes, args.bridge):
+            print('{} | faces = {}'.format(name, f.shape[0]))
+            results.extend(bench_case(name, v, f, args.repeat, out_dir))
+
+    report = {'meta': meta, 'results': results}
+    output = args.output or os.path.join(DEFAULT_OUTPUT_DIR,
+                                         '{}_{}.json'.format(version, time.strftime('%Y%m%d-%H%M%S')))
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w') as fp:
+        json.dump(report, fp, indent=2)
+    print('saved:', output)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(json.load(fp), report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
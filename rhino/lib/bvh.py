@@ -0,0 +1,406 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 삼각형 배열 위의 BVH(bounding volume hierarchy) 공간 인덱스.
+# 빌드는 Morton 코드 정렬 한 번 + 레벨 단위 분할(LBVH)이고, 질의는 (질의, 노드) 쌍의 frontier를 한 레벨씩
+# 내려가며 처리하므로 Python 루프 횟수는 트리 깊이에 비례한다.
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+DET_EPS = 1e-12
+MAX_CACHED_BVH = 16
+MORTON_MAX = (1 << 21) - 1
+
+_BVH_CACHE = OrderedDict()
+
+
+def mesh_key(vertices, faces):
+    """vertices/faces 버퍼 내용으로 만든 해시 키 (문서 객체 id가 바뀌어도 같은 형상이면 같은 키)."""
+    h = hashlib.sha1()
+    v = np.ascontiguousarray(vertices, dtype=np.float64)
+    f = np.ascontiguousarray(faces, dtype=np.int64)
+    h.update(np.array(v.shape + f.shape, dtype=np.int64).tobytes())
+    h.update(v.tobytes())
+    h.update(f.tobytes())
+    return h.hexdigest()
+
+
+def get_bvh(vertices, faces, leaf_size=8):
+    """메쉬 별 BVH를 캐시에서 찾고 없으면 빌드한다 (최근 MAX_CACHED_BVH 개 유지)."""
+    key = (mesh_key(vertices, faces), leaf_size)
+    bvh = _BVH_CACHE.get(key)
+    if bvh is not None:
+        _BVH_CACHE.move_to_end(key)
+        return bvh
+    bvh = BVH(vertices, faces, leaf_size)
+    _BVH_CACHE[key] = bvh
+    while len(_BVH_CACHE) > MAX_CACHED_BVH:
+        _BVH_CACHE.popitem(last=False)
+    return bvh
+
+
+def clear_bvh_cache():
+    _BVH_CACHE.clear()
+
+
+def _ranges(starts, counts):
+    """[start, start+count) 구간들을 이어붙인 인덱스 배열과 구간 시작 오프셋을 반환한다."""
+    offsets = np.cumsum(counts) - counts
+    owner = np.repeat(np.arange(counts.shape[0], dtype=np.int64), counts)
+    idx = starts[owner] + np.arange(owner.shape[0], dtype=np.int64) - offsets[owner]
+    return idx, offsets, owner
+
+
+def _first_per_query(q, key, *values):
+    """q 별로 key가 가장 작은 항목만 남긴다."""
+    order = np.lexsort((key, q))
+    q = q[order]
+    first = np.ones(q.shape[0], dtype=bool)
+    first[1:] = q[1:] != q[:-1]
+    return (q[first], key[order][first]) + tuple(v[order][first] for v in values)
+
+
+def _spread_bits(x):
+    """21비트 정수의 비트 사이에 0을 두 개씩 끼워 넣는다 (Morton 코드용)."""
+    x = x.astype(np.uint64) & np.uint64(0x1fffff)
+    for shift, mask in ((32, 0x1f00000000ffff), (16, 0x1f0000ff0000ff), (8, 0x100f00f00f00f00f),
+                        (4, 0x10c30c30c30c30c3), (2, 0x1249249249249249)):
+        x = (x | (x << np.uint64(shift))) & np.uint64(mask)
+    return x
+
+
+def _morton_codes(points):
+    """점들을 bbox 기준 축 별 21비트로 양자화한 63비트 Morton 코드 (N,) uint64."""
+    if points.shape[0] == 0:
+        return np.zeros(0, dtype=np.uint64)
+    lo = points.min(axis=0)
+    span = np.maximum(points.max(axis=0) - lo, 1e-12)
+    q = ((points - lo) / span * float(MORTON_MAX)).astype(np.uint64)
+    return _spread_bits(q[:, 0]) | (_spread_bits(q[:, 1]) << np.uint64(1)) | (_spread_bits(q[:, 2]) << np.uint64(2))
+
+
+def closest_point_on_triangles(p, a, b, c):
+    """점 p와 삼각형 (a, b, c) 쌍들에 대한 최근접점을 일괄 계산한다 (Ericson, RTCD 5.1.5)."""
+    ab = b - a
+    ac = c - a
+    ap = p - a
+    d1 = np.einsum('ij,ij->i', ab, ap)
+    d2 = np.einsum('ij,ij->i', ac, ap)
+    bp = p - b
+    d3 = np.einsum('ij,ij->i', ab, bp)
+    d4 = np.einsum('ij,ij->i', ac, bp)
+    cp = p - c
+    d5 = np.einsum('ij,ij->i', ab, cp)
+    d6 = np.einsum('ij,ij->i', ac, cp)
+
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    # 기본: 면 내부
+    denom = va + vb + vc
+    denom = np.where(np.abs(denom) > DET_EPS, denom, 1.0)
+    v = vb / denom
+    w = vc / denom
+    result = a + ab * v[:, None] + ac * w[:, None]
+    done = np.zeros(p.shape[0], dtype=bool)
+
+    def assign(mask, value):
+        mask = mask & ~done
+        result[mask] = value[mask]
+        done[mask] = True
+
+    assign((d1 <= 0) & (d2 <= 0), a)
+    assign((d3 >= 0) & (d4 <= d3), b)
+    assign((d6 >= 0) & (d5 <= d6), c)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.nan_to_num(d1 / (d1 - d3))
+        assign((vc <= 0) & (d1 >= 0) & (d3 <= 0), a + ab * t[:, None])
+        t = np.nan_to_num(d2 / (d2 - d6))
+        assign((vb <= 0) & (d2 >= 0) & (d6 <= 0), a + ac * t[:, None])
+        t = np.nan_to_num((d4 - d3) / ((d4 - d3) + (d5 - d6)))
+        assign((va <= 0) & ((d4 - d3) >= 0) & ((d5 - d6) >= 0), b + (c - b) * t[:, None])
+
+    return result
+
+
+class BVH:
+    """
+    삼각형 메쉬용 BVH.
+
+    Args:
+        vertices: (V, 3) 정점 배열
+        faces: (F, 3) 삼각형 인덱스 배열
+        leaf_size: 리프 노드 당 최대 삼각형 수
+    """
+
+    def __init__(self, vertices, faces, leaf_size=8):
+        self.vertices = np.asarray(vertices, dtype=np.float64)
+        self.faces = np.asarray(faces, dtype=np.int64)
+        self.leaf_size = max(1, int(leaf_size))
+        self._build()
+
+    # ------------------------------------------------------------------ build
+    def _build(self):
+        """
+        LBVH 빌드: 삼각형 AABB 중심의 Morton 코드로 한 번만 정렬한 뒤, 각 노드를 구간 양 끝 코드가
+        처음 달라지는 비트 위치에서 나눈다 (코드가 같으면 절반). 노드 AABB는 리프부터 위로 합친다.
+        """
+        tri = self.vertices[self.faces]
+        tri_min = tri.min(axis=1)
+        tri_max = tri.max(axis=1)
+        n = self.faces.shape[0]
+
+        # Ray-삼각형 교차에 쓰는 (a, e1, e2)를 미리 계산해 둔다 (질의 때 정점을 다시 모으지 않음)
+        self.tri_a = tri[:, 0].copy()
+        self.tri_e1 = tri[:, 1] - tri[:, 0]
+        self.tri_e2 = tri[:, 2] - tri[:, 0]
+
+        code = _morton_codes((tri_min + tri_max) * 0.5)
+        perm = np.argsort(code, kind='stable')
+        code = code[perm]
+
+        # 노드 수는 최대 2n-1 개이므로 미리 할당해 두고 레벨 단위로 채운다
+        size = max(1, 2 * n - 1)
+        node_start = np.zeros(size, dtype=np.int64)
+        node_count = np.zeros(size, dtype=np.int64)
+        node_left = np.full(size, -1, dtype=np.int64)
+        node_count[0] = n
+        total = 1
+
+        levels = []
+        active = np.array([0], dtype=np.int64)
+        while active.shape[0] and n:
+            levels.append(active)
+            split = node_count[active] > self.leaf_size
+            if not np.any(split):
+                break
+            parents = active[split]
+            s = node_start[parents]
+            c = node_count[parents]
+            first = code[s]
+            diff = first ^ code[s + c - 1]
+            differs = diff > 0
+            # 가장 높은 다른 비트 h: 구간 앞쪽은 h가 0, 뒤쪽은 1인 첫 위치에서 나눈다
+            h = np.zeros(parents.shape[0], dtype=np.uint64)
+            h[differs] = np.floor(np.log2(diff[differs].astype(np.float64))).astype(np.uint64)
+            h[differs & ((diff >> h) == 0)] -= np.uint64(1)      # float 반올림 보정
+            h[differs & ((diff >> h) > 1)] += np.uint64(1)
+            target = ((first >> h) | np.uint64(1)) << h
+            half = np.where(differs, np.searchsorted(code, target) - s, c // 2)
+
+            left = total + 2 * np.arange(parents.shape[0], dtype=np.int64)
+            node_left[parents] = left
+            node_start[left] = s
+            node_count[left] = half
+            node_start[left + 1] = s + half
+            node_count[left + 1] = c - half
+            total += 2 * parents.shape[0]
+            active = np.concatenate((left, left + 1))
+
+        # 리프는 정렬된 삼각형 AABB 구간에서, 내부 노드는 두 자식에서 (깊은 레벨부터)
+        node_min = np.zeros((max(total, 1), 3))
+        node_max = np.zeros((max(total, 1), 3))
+        sorted_min = tri_min[perm]
+        sorted_max = tri_max[perm]
+        for nodes in reversed(levels):
+            left = node_left[nodes]
+            leaf = nodes[left < 0]
+            if leaf.shape[0]:
+                idx, offsets, _ = _ranges(node_start[leaf], node_count[leaf])
+                node_min[leaf] = np.minimum.reduceat(sorted_min[idx], offsets, axis=0)
+                node_max[leaf] = np.maximum.reduceat(sorted_max[idx], offsets, axis=0)
+            inner = nodes[left >= 0]
+            child = node_left[inner]
+            node_min[inner] = np.minimum(node_min[child], node_min[child + 1])
+            node_max[inner] = np.maximum(node_max[child], node_max[child + 1])
+
+        self.perm = perm
+        self.node_start = node_start[:total]
+        self.node_count = node_count[:total]
+        self.node_left = node_left[:total]
+        self.node_min = node_min[:total]
+        self.node_max = node_max[:total]
+        self.tri_min = tri_min
+        self.tri_max = tri_max
+
+    @property
+    def node_total(self):
+        return self.node_start.shape[0]
+
+    def _children(self, q, nodes):
+        """내부 노드 쌍은 자식 쌍으로, 리프 노드 쌍은 (질의, 삼각형) 쌍으로 전개한다."""
+        left = self.node_left[nodes]
+        inner = left >= 0
+        q_in = np.repeat(q[inner], 2)
+        n_in = np.repeat(left[inner], 2)
+        n_in[1::2] += 1
+
+        leaf_q = q[~inner]
+        leaf_n = nodes[~inner]
+        idx, _, owner = _ranges(self.node_start[leaf_n], self.node_count[leaf_n])
+        return (q_in, n_in), (leaf_q[owner], self.perm[idx])
+
+    # ------------------------------------------------------------------ rays
+    def intersect_rays(self, origins, directions, t_max=np.inf):
+        """
+        여러 Ray를 한 번에 교차시켜 첫 hit을 찾는다.
+
+        Returns:
+            (t, tri): (R,) 파라미터 배열 (miss는 inf), (R,) 삼각형 인덱스 (miss는 -1)
+        """
+        origins = np.atleast_2d(np.asarray(origins, dtype=np.float64))
+        directions = np.atleast_2d(np.asarray(directions, dtype=np.float64))
+        if directions.shape[0] == 1 and origins.shape[0] > 1:
+            directions = np.repeat(directions, origins.shape[0], axis=0)
+        r = origins.shape[0]
+        best_t = np.full(r, float(t_max))
+        best_tri = np.full(r, -1, dtype=np.int64)
+        if self.faces.shape[0] == 0 or r == 0:
+            return best_t, best_tri
+
+        with np.errstate(divide='ignore'):
+            inv_dir = 1.0 / directions
+
+        q = np.arange(r, dtype=np.int64)
+        nodes = np.zeros(r, dtype=np.int64)
+        while q.shape[0]:
+            # slab 테스트 (현재까지의 최선 hit보다 먼 노드는 제외)
+            o, inv = origins[q], inv_dir[q]
+            with np.errstate(invalid='ignore'):
+                t0 = (self.node_min[nodes] - o) * inv
+                t1 = (self.node_max[nodes] - o) * inv
+            lo = np.minimum(t0, t1)
+            hi = np.maximum(t0, t1)
+            # 0 * inf (축에 평행한 Ray가 slab 평면 위) 인 nan은 fmax/fmin이 무시한다
+            t_near = np.fmax(np.fmax(lo[:, 0], lo[:, 1]), lo[:, 2])
+            t_far = np.fmin(np.fmin(hi[:, 0], hi[:, 1]), hi[:, 2])
+            keep = (t_near <= t_far) & (t_far >= 0.0) & (t_near <= best_t[q])
+            q, nodes = q[keep], nodes[keep]
+
+            (q, nodes), (tq, ti) = self._children(q, nodes)
+            if tq.shape[0]:
+                t = self._ray_triangle(origins[tq], directions[tq], ti)
+                hit = t < best_t[tq]
+                if np.any(hit):
+                    tq, t, ti = _first_per_query(tq[hit], t[hit], ti[hit])
+                    best_t[tq] = t
+                    best_tri[tq] = ti
+
+        best_t[best_tri < 0] = np.inf
+        return best_t, best_tri
+
+    def _ray_triangle(self, o, d, ti):
+        """Möller–Trumbore (양면). miss는 inf."""
+        a = self.tri_a[ti]
+        e1 = self.tri_e1[ti]
+        e2 = self.tri_e2[ti]
+        p = np.cross(d, e2)
+        det = np.einsum('ij,ij->i', e1, p)
+        ok = np.abs(det) > DET_EPS
+        inv = np.where(ok, 1.0 / np.where(ok, det, 1.0), 0.0)
+        s = o - a
+        u = np.einsum('ij,ij->i', s, p) * inv
+        qv = np.cross(s, e1)
+        v = np.einsum('ij,ij->i', d, qv) * inv
+        t = np.einsum('ij,ij->i', e2, qv) * inv
+        hit = ok & (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0) & (t >= 0.0)
+        return np.where(hit, t, np.inf)
+
+    # ------------------------------------------------------------- closest
+    def closest_points(self, points):
+        """
+        각 점에 대한 메쉬 위 최근접점을 찾는다.
+
+        Returns:
+            (closest (Q,3), distance (Q,), tri (Q,))
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        n = points.shape[0]
+        best_d2 = np.full(n, np.inf)
+        best_pt = np.full((n, 3), np.nan)
+        best_tri = np.full(n, -1, dtype=np.int64)
+        if self.faces.shape[0] == 0 or n == 0:
+            return best_pt, np.sqrt(best_d2), best_tri
+
+        def box_d2(p, lo, hi):
+            return np.sum((p - np.clip(p, lo, hi)) ** 2, axis=1)
+
+        def update(tq, ti):
+            # 삼각형 AABB 하한으로 한 번 더 거른 뒤 정확한 거리 계산
+            near = box_d2(points[tq], self.tri_min[ti], self.tri_max[ti]) <= best_d2[tq]
+            tq, ti = tq[near], ti[near]
+            if not tq.shape[0]:
+                return
+            tri = self.faces[ti]
+            cp = closest_point_on_triangles(points[tq], self.vertices[tri[:, 0]],
+                                            self.vertices[tri[:, 1]], self.vertices[tri[:, 2]])
+            d2 = np.sum((cp - points[tq]) ** 2, axis=1)
+            tq, d2, ti, cp = _first_per_query(tq, d2, ti, cp)
+            better = d2 < best_d2[tq]
+            best_d2[tq[better]] = d2[better]
+            best_pt[tq[better]] = cp[better]
+            best_tri[tq[better]] = ti[better]
+
+        # 1) 가까운 자식만 따라 리프까지 내려가 초기 상한을 만든다
+        nodes = np.zeros(n, dtype=np.int64)
+        while True:
+            left = self.node_left[nodes]
+            inner = left >= 0
+            if not np.any(inner):
+                break
+            p = points[inner]
+            l = left[inner]
+            dl = box_d2(p, self.node_min[l], self.node_max[l])
+            dr = box_d2(p, self.node_min[l + 1], self.node_max[l + 1])
+            nodes[inner] = np.where(dl <= dr, l, l + 1)
+        idx, _, owner = _ranges(self.node_start[nodes], self.node_count[nodes])
+        update(owner, self.perm[idx])
+
+        # 2) 상한보다 가까울 수 있는 노드만 frontier로 탐색
+        q = np.arange(n, dtype=np.int64)
+        nodes = np.zeros(n, dtype=np.int64)
+        while q.shape[0]:
+            keep = box_d2(points[q], self.node_min[nodes], self.node_max[nodes]) <= best_d2[q]
+            q, nodes = q[keep], nodes[keep]
+            (q, nodes), (tq, ti) = self._children(q, nodes)
+            if tq.shape[0]:
+                update(tq, ti)
+
+        return best_pt, np.sqrt(best_d2), best_tri
+
+    # ----------------------------------------------------------------- boxes
+    def overlap_boxes(self, box_min, box_max):
+        """
+        AABB들과 겹치는 삼각형을 찾는다 (삼각형의 AABB 기준).
+
+        Returns:
+            (box_index, tri_index) 쌍 배열
+        """
+        box_min = np.atleast_2d(np.asarray(box_min, dtype=np.float64))
+        box_max = np.atleast_2d(np.asarray(box_max, dtype=np.float64))
+        empty = np.zeros(0, dtype=np.int64)
+        if self.faces.shape[0] == 0 or box_min.shape[0] == 0:
+            return empty, empty
+
+        q = np.arange(box_min.shape[0], dtype=np.int64)
+        nodes = np.zeros(q.shape[0], dtype=np.int64)
+        out_q, out_t = [], []
+        while q.shape[0]:
+            keep = np.all((self.node_min[nodes] <= box_max[q]) & (self.node_max[nodes] >= box_min[q]), axis=1)
+            q, nodes = q[keep], nodes[keep]
+            (q, nodes), (tq, ti) = self._children(q, nodes)
+            if tq.shape[0]:
+                hit = np.all((self.tri_min[ti] <= box_max[tq]) & (self.tri_max[ti] >= box_min[tq]), axis=1)
+                out_q.append(tq[hit])
+                out_t.append(ti[hit])
+
+        if not out_q:
+            return empty, empty
+        return np.concatenate(out_q), np.concatenate(out_t)
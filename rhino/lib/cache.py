@@ -0,0 +1,110 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 샘플 포인트 / heightmap / 패치 곡면 같은 중간 결과를 디스크에 저장하는 content-addressed 캐시.
+# 키는 product 메쉬 버퍼 해시 + 파라미터이고, 전체 크기가 max_bytes를 넘으면 오래 안 쓴 것부터 지운다.
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from lib.bvh import mesh_key
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', '3d_print')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+class DiskCache:
+    """
+    .npz 파일 단위의 LRU 디스크 캐시. 값은 이름 → NumPy 배열 또는 문자열 dict.
+
+    Args:
+        root: 캐시 폴더 (처음 저장할 때 생성)
+        max_bytes: 캐시 폴더 전체 크기 상한
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, meshes, params):
+        """메쉬 (vertices, faces) 목록과 파라미터 dict로 캐시 키를 만든다."""
+        h = hashlib.sha1()
+        for vertices, faces in meshes:
+            h.update(mesh_key(vertices, faces).encode('ascii'))
+        h.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key + '.npz')
+
+    def get(self, key):
+        """캐시된 dict를 반환한다 (없거나 읽을 수 없으면 None). 적중하면 LRU 순서를 갱신한다."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                value = {}
+                for name in data.files:
+                    arr = data[name]
+                    value[name] = str(arr) if arr.dtype.kind == 'U' and arr.ndim == 0 else arr
+            os.utime(path, None)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, **values):
+        """값들을 원자적으로 저장한 뒤 크기 상한을 넘으면 오래된 항목을 지운다."""
+        os.makedirs(self.root, exist_ok=True)
+        arrays = {name: (np.array(v) if isinstance(v, str) else np.asarray(v)) for name, v in values.items()}
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.evict()
+
+    def evict(self):
+        """전체 크기가 max_bytes 이하가 될 때까지 가장 오래 사용하지 않은 항목부터 지운다."""
+        try:
+            names = [n for n in os.listdir(self.root) if n.endswith('.npz')]
+        except OSError:
+            return 0
+        entries = []
+        for name in names:
+            path = os.path.join(self.root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            if name.endswith('.npz'):
+                os.remove(os.path.join(self.root, name))
@@ -0,0 +1,240 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 메쉬 배열 위에서 텍스트 음각용 커터 메쉬를 만드는 모듈 (AddText / ExplodeText / Project / Loft 커맨드 대체).
+#   1. 글자 별 5x7 도트 글꼴을 닫힌 프리즘 메쉬로 한 번만 분할해 (글자, 크기, 깊이) 별로 캐시
+#   2. 글자 평면 위 정점에서 direction 방향 Ray를 BVH(lib.bvh)로 쏴서 크라운 내벽에 투영
+#   3. 프리즘 앞/뒷면을 hit 지점 기준 -margin / +depth 위치에 놓아 벽을 파고드는 커터를 만든다
+# 커터와의 Boolean 차집합은 호출하는 쪽에서 메모리 내 메쉬 연산으로 적용한다 (AddSupport.engrave_text_on_crown).
+
+import numpy as np
+
+from lib.bvh import get_bvh
+
+
+FONT_ROWS = 7
+FONT_COLS = 5
+ADVANCE = 6                 # 글자 간격 (도트 단위, 5 + 1)
+CUT_MARGIN = 0.05           # 커터 앞면을 벽 바깥(공기 쪽)으로 띄우는 거리 (mm)
+
+# 5x7 도트 글꼴 (위 행부터). 소문자는 대문자로 그린다.
+FONT = {
+    '0': '01110 10001 10011 10101 11001 10001 01110',
+    '1': '00100 01100 00100 00100 00100 00100 01110',
+    '2': '01110 10001 00001 00010 00100 01000 11111',
+    '3': '11111 00010 00100 00010 00001 10001 01110',
+    '4': '00010 00110 01010 10010 11111 00010 00010',
+    '5': '11111 10000 11110 00001 00001 10001 01110',
+    '6': '00110 01000 10000 11110 10001 10001 01110',
+    '7': '11111 00001 00010 00100 01000 01000 01000',
+    '8': '01110 10001 10001 01110 10001 10001 01110',
+    '9': '01110 10001 10001 01111 00001 00010 01100',
+    'A': '01110 10001 10001 11111 10001 10001 10001',
+    'B': '11110 10001 10001 11110 10001 10001 11110',
+    'C': '01110 10001 10000 10000 10000 10001 01110',
+    'D': '11100 10010 10001 10001 10001 10010 11100',
+    'E': '11111 10000 10000 11110 10000 10000 11111',
+    'F': '11111 10000 10000 11110 10000 10000 10000',
+    'G': '01110 10001 10000 10111 10001 10001 01111',
+    'H': '10001 10001 10001 11111 10001 10001 10001',
+    'I': '01110 00100 00100 00100 00100 00100 01110',
+    'J': '00111 00010 00010 00010 00010 10010 01100',
+    'K': '10001 10010 10100 11000 10100 10010 10001',
+    'L': '10000 10000 10000 10000 10000 10000 11111',
+    'M': '10001 11011 10101 10101 10001 10001 10001',
+    'N': '10001 10001 11001 10101 10011 10001 10001',
+    'O': '01110 10001 10001 10001 10001 10001 01110',
+    'P': '11110 10001 10001 11110 10000 10000 10000',
+    'Q': '01110 10001 10001 10001 10101 10010 01101',
+    'R': '11110 10001 10001 11110 10100 10010 10001',
+    'S': '01111 10000 10000 01110 00001 00001 11110',
+    'T': '11111 00100 00100 00100 00100 00100 00100',
+    'U': '10001 10001 10001 10001 10001 10001 01110',
+    'V': '10001 10001 10001 10001 10001 01010 00100',
+    'W': '10001 10001 10001 10101 10101 10101 01010',
+    'X': '10001 10001 01010 00100 01010 10001 10001',
+    'Y': '10001 10001 10001 01010 00100 00100 00100',
+    'Z': '11111 00001 00010 00100 01000 10000 11111',
+    '-': '00000 00000 00000 11111 00000 00000 00000',
+    '_': '00000 00000 00000 00000 00000 00000 11111',
+    '.': '00000 00000 00000 00000 00000 01100 01100',
+    '/': '00000 00001 00010 00100 01000 10000 00000',
+    '#': '01010 01010 11111 01010 11111 01010 01010',
+    ' ': '00000 00000 00000 00000 00000 00000 00000',
+}
+
+# (글자, 크기, 깊이) → (vertices (2M, 3) [u, v, w], faces (F, 3)). 앞 M개는 앞면(w=-margin), 뒤 M개는 뒷면(w=depth).
+_GLYPH_CACHE = {}
+
+
+def clear_glyph_cache():
+    _GLYPH_CACHE.clear()
+
+
+def _tessellate(rows):
+    """
+    도트 비트맵을 닫힌 프리즘으로 분할한다 (도트 격자 단위, w는 0=앞면 / 1=뒷면 층 번호).
+
+    채워진 칸마다 앞/뒷면 사각형 2개, 채워진 칸과 빈 칸 사이 변마다 옆면 사각형 1개를 만든다.
+    (u, v, w) 오른손 좌표계에서 면 법선이 바깥을 향한다.
+
+    Returns:
+        (uv (M, 2), faces (F, 3)) — faces는 앞면 정점 i, 뒷면 정점 M + i
+    """
+    fill = np.array([[c == '1' for c in row] for row in rows], dtype=bool)
+    nr, nc = fill.shape
+    if not fill.any():
+        return np.zeros((0, 2)), np.zeros((0, 3), dtype=np.int64)
+    r, c = np.nonzero(fill)
+    cols = nc + 1
+    n = (nr + 1) * cols
+    # 칸 모서리 (u 오른쪽, v 위쪽 기준 반시계): 왼아래, 오른아래, 오른위, 왼위
+    bl = (r + 1) * cols + c
+    br = (r + 1) * cols + c + 1
+    tr = r * cols + c + 1
+    tl = r * cols + c
+
+    # 대각선으로만 닿는 두 칸의 공유 모서리는 정점을 나눠서 non-manifold 변을 만들지 않는다
+    padded = np.zeros((nr + 2, nc + 2), dtype=bool)
+    padded[1:-1, 1:-1] = fill
+    top_l, top_r, bot_l, bot_r = padded[:-1, :-1], padded[:-1, 1:], padded[1:, :-1], padded[1:, 1:]
+    diag_a = top_l & bot_r & ~top_r & ~bot_l
+    diag_b = top_r & bot_l & ~top_l & ~bot_r
+    lattice = np.arange(n)                      # 정점 → 격자점 (나눈 정점은 같은 격자점을 가리킨다)
+    for corner, mask in ((tl, diag_a[r, c]), (tr, diag_b[r, c + 1])):
+        shared = corner[mask]
+        corner[mask] = lattice.shape[0] + np.arange(shared.shape[0])
+        lattice = np.concatenate((lattice, shared))
+    total = lattice.shape[0]
+
+    # 뒷면(+w)은 반시계, 앞면(-w)은 시계 방향
+    back = np.concatenate([np.stack((bl, br, tr), 1), np.stack((bl, tr, tl), 1)]) + total
+    front = np.concatenate([np.stack((bl, tr, br), 1), np.stack((bl, tl, tr), 1)])
+
+    # 옆면: 반시계 변 a → b 의 바깥쪽 이웃이 비어 있으면 (a0, b0, b1), (a0, b1, a1)
+    sides = []
+    for a, b, dr, dc in ((bl, br, 1, 0), (br, tr, 0, 1), (tr, tl, -1, 0), (tl, bl, 0, -1)):
+        open_side = ~padded[r + 1 + dr, c + 1 + dc]
+        a, b = a[open_side], b[open_side]
+        sides.append(np.stack((a, b, b + total), 1))
+        sides.append(np.stack((a, b + total, a + total), 1))
+    faces = np.concatenate([front, back] + sides)
+
+    # 쓰지 않는 격자점 제거
+    used = np.unique(faces % total)
+    remap = np.full(total, -1, dtype=np.int64)
+    remap[used] = np.arange(used.shape[0])
+    m = used.shape[0]
+    faces = np.where(faces >= total, remap[faces - total] + m, remap[faces % total])
+    node = lattice[used]
+    uv = np.stack((node % cols, nr - node // cols), 1).astype(np.float64)
+    return uv, faces
+
+
+def glyph_mesh(char, size, depth):
+    """
+    글자 하나의 커터 프리즘 (캐시). size는 글자 높이(7도트), 원점은 글자 칸의 왼아래.
+
+    Returns:
+        (vertices (2M, 3) [u, v, w], faces (F, 3)) 또는 글꼴에 없는 글자이면 None
+    """
+    key = (char, float(size), float(depth))
+    cached = _GLYPH_CACHE.get(key)
+    if cached is not None:
+        return cached
+    rows = FONT.get(char.upper())
+    if rows is None:
+        return None
+    uv, faces = _tessellate(rows.split())
+    pitch = float(size) / FONT_ROWS
+    m = uv.shape[0]
+    vertices = np.zeros((2 * m, 3))
+    vertices[:m, :2] = uv * pitch
+    vertices[m:, :2] = uv * pitch
+    vertices[:m, 2] = -CUT_MARGIN
+    vertices[m:, 2] = float(depth)
+    _GLYPH_CACHE[key] = (vertices, faces)
+    return vertices, faces
+
+
+def text_layout(text, size, depth, spacing=1.0):
+    """
+    글자 프리즘을 가운데 정렬(MiddleCenter)로 이어 붙인다.
+
+    Returns:
+        (vertices (N, 3) [u, v, w], faces, glyph (N,) 정점 별 글자 번호, 글꼴에 없어 빠진 글자 목록)
+    """
+    pitch = float(size) / FONT_ROWS
+    advance = ADVANCE * pitch * spacing
+    width = advance * (len(text) - 1) + FONT_COLS * pitch if text else 0.0
+    parts = []
+    skipped = []
+    base = 0
+    for i, char in enumerate(text):
+        glyph = glyph_mesh(char, size, depth)
+        if glyph is None:
+            skipped.append(char)
+            continue
+        v, f = glyph
+        if f.shape[0] == 0:
+            continue
+        v = v + (i * advance - width * 0.5, -size * 0.5, 0.0)
+        parts.append((v, f + base, np.full(v.shape[0], i, dtype=np.int64)))
+        base += v.shape[0]
+    if not parts:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64), np.zeros(0, dtype=np.int64), skipped
+    return (np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]),
+            np.concatenate([p[2] for p in parts]), skipped)
+
+
+def engraving_cutter(vertices, faces, text, size, depth, origin, u_axis=(0.0, 1.0, 0.0), v_axis=(0.0, 0.0, 1.0),
+                     direction=(1.0, 0.0, 0.0), mirror=False, spacing=1.0, max_distance=np.inf):
+    """
+    메쉬 (vertices, faces) 벽에 투영한 텍스트 음각 커터를 만든다.
+
+    텍스트는 origin을 중심으로 u_axis(글자 진행), v_axis(위쪽) 평면에 놓이고, 각 정점에서 direction
+    방향으로 쏜 Ray의 첫 hit(크라운 내벽)에 붙는다. 커터 앞면은 벽에서 CUT_MARGIN만큼 띄우고
+    뒷면은 depth만큼 direction 방향으로 벽 안쪽에 둔다. 벽에 닿지 않는 정점이 있는 글자는 뺀다.
+
+    Returns:
+        (cut_vertices (N, 3), cut_faces (F, 3), 빠진 글자 목록) — 면 법선은 바깥쪽
+    """
+    origin = np.asarray(origin, dtype=np.float64)
+    u = np.array(u_axis, dtype=np.float64)
+    v = np.array(v_axis, dtype=np.float64)
+    d = np.array(direction, dtype=np.float64)
+    u /= np.linalg.norm(u)
+    v /= np.linalg.norm(v)
+    d /= np.linalg.norm(d)
+    if mirror:
+        u = -u
+
+    local, cut_faces, glyph, skipped = text_layout(text, size, depth, spacing)
+    if cut_faces.shape[0] == 0:
+        return np.zeros((0, 3)), cut_faces, skipped
+
+    # 같은 (u, v)의 앞/뒷면 정점은 Ray 하나를 공유한다
+    uv_key, node = np.unique(np.round(local[:, :2], 9), axis=0, return_inverse=True)
+    node = node.ravel()
+    starts = origin + uv_key[:, :1] * u + uv_key[:, 1:2] * v
+    t, _ = get_bvh(vertices, faces).intersect_rays(starts, d[None, :], t_max=max_distance)
+    hit = np.isfinite(t)
+
+    # 벽에 닿지 않은 정점이 있는 글자 제거
+    missed = np.unique(glyph[~hit[node]])
+    if missed.shape[0]:
+        skipped = skipped + [text[i] for i in missed.tolist()]
+        keep_vertex = ~np.isin(glyph, missed)
+        keep_face = keep_vertex[cut_faces].all(axis=1)
+        remap = np.cumsum(keep_vertex) - 1
+        cut_faces = remap[cut_faces[keep_face]]
+        local, node = local[keep_vertex], node[keep_vertex]
+        if cut_faces.shape[0] == 0:
+            return np.zeros((0, 3)), cut_faces, skipped
+
+    cut_vertices = starts[node] + (t[node] + local[:, 2])[:, None] * d
+    # (u, v, direction)가 왼손 좌표계이면 면 방향을 뒤집어 법선을 바깥으로 유지
+    if np.dot(np.cross(u, v), d) < 0.0:
+        cut_faces = cut_faces[:, ::-1]
+    return cut_vertices, np.ascontiguousarray(cut_faces), skipped
@@ -2,79 +2,154 @@
 # env: /Users/joonholee/Joon/1-Project/3d_print/rhino
 # r: numpy
 
-# 이것도 캐쉬 리셋
-import gc
-gc.collect()
-
 import Rhino
 import rhinoscriptsyntax as rs
 import scriptcontext as sc
 from Rhino.Geometry import *
+import clr
+from System import Array, Int32, Int64, IntPtr, Single
+from System.Runtime.InteropServices import GCHandle, GCHandleType, Marshal
 import numpy as np
-import pickle
-import base64
 
+from lib import usertext
+
+
+
+# 객체 id → (RuntimeSerialNumber, (2, 3) [min, max]) 캐시.
+# Rhino는 객체 형상이 바뀌면(이동/변형/교체) 같은 id에 새 RuntimeSerialNumber를 주므로 그때 다시 계산한다.
+_bbox_cache = {}
+
+
+def _as_id_list(objs):
+    if objs is None:
+        return []
+    if isinstance(objs, (list, tuple, set)):
+        return list(objs)
+    return [objs]
+
+
+def BoundingBoxes(objs):
+    """
+    객체들의 world bbox를 한 번에 (N, 2, 3) [min, max] 배열로 반환한다.
+    찾을 수 없는 객체의 행은 nan. 결과는 형상이 바뀔 때까지 객체 별로 캐시된다.
+    """
+    ids = _as_id_list(objs)
+    boxes = np.full((len(ids), 2, 3), np.nan)
+    for i, obj_id in enumerate(ids):
+        guid = rs.coerceguid(obj_id)
+        obj = sc.doc.Objects.FindId(guid) if guid else None
+        if obj is None or obj.Geometry is None:
+            continue
+        key = str(guid)
+        serial = obj.RuntimeSerialNumber
+        cached = _bbox_cache.get(key)
+        if cached is not None and cached[0] == serial:
+            boxes[i] = cached[1]
+            continue
+        bb = obj.Geometry.GetBoundingBox(True)
+        if not bb.IsValid:
+            continue
+        box = np.array([(bb.Min.X, bb.Min.Y, bb.Min.Z), (bb.Max.X, bb.Max.Y, bb.Max.Z)])
+        _bbox_cache[key] = (serial, box)
+        boxes[i] = box
+    return boxes
+
+
+def clear_bbox_cache(objs=None):
+    """bbox 캐시를 비운다 (objs를 주면 해당 객체만)."""
+    if objs is None:
+        _bbox_cache.clear()
+        return
+    for obj_id in _as_id_list(objs):
+        _bbox_cache.pop(str(rs.coerceguid(obj_id)), None)
+
+
+def bbox_stats(objs):
+    """
+    객체(들) 전체를 감싸는 bbox의 min/max/size/centroid를 한 번에 계산한다.
+
+    Returns:
+        {'min', 'max', 'size', 'centroid'} (각 (3,) 배열). 유효한 객체가 없으면 None.
+    """
+    boxes = BoundingBoxes(objs)
+    valid = ~np.isnan(boxes[:, 0, 0])
+    if not np.any(valid):
+        return None
+    lo = boxes[valid, 0].min(axis=0)
+    hi = boxes[valid, 1].max(axis=0)
+    return {'min': lo, 'max': hi, 'size': hi - lo, 'centroid': (lo + hi) * 0.5}
+
+
+def UnionBoundingBox(items):
+    """
+    객체 id 또는 메모리 내 형상(GeometryBase) 목록을 모두 감싸는 Rhino BoundingBox.
+    id는 bbox 캐시를 사용한다. 비어 있으면 BoundingBox.Empty.
+    """
+    ids = []
+    boxes = []
+    for item in items or []:
+        if isinstance(item, GeometryBase):
+            bb = item.GetBoundingBox(True)
+            if bb.IsValid:
+                boxes.append(((bb.Min.X, bb.Min.Y, bb.Min.Z), (bb.Max.X, bb.Max.Y, bb.Max.Z)))
+        elif item is not None:
+            ids.append(item)
+    boxes = np.concatenate((np.array(boxes, dtype=np.float64).reshape(-1, 2, 3), BoundingBoxes(ids)))
+    boxes = boxes[~np.isnan(boxes[:, 0, 0])]
+    if boxes.shape[0] == 0:
+        return BoundingBox.Empty
+    lo = boxes[:, 0].min(axis=0)
+    hi = boxes[:, 1].max(axis=0)
+    return BoundingBox(lo[0], lo[1], lo[2], hi[0], hi[1], hi[2])
 
 
 def get_centroid(obj):
-    bb = rs.BoundingBox(obj)
-    pts = [(pt.X, pt.Y, pt.Z) for pt in bb]
-    vectors = np.array(pts)
-    return np.mean(vectors, axis=0)
-    # bb = rs.BoundingBox(obj)
-    # return bb.Center
+    stats = bbox_stats(obj)
+    return None if stats is None else stats['centroid']
 
 
 def get_size(obj):
-    bb = rs.BoundingBox(obj)
-    x = [100, -100]
-    y = [100, -100]
-    z = [100, -100]
-    for box in bb:
-        x[0] = min([x[0], box[0]])
-        x[1] = max([x[1], box[0]])
-        y[0] = min([y[0], box[1]])
-        y[1] = max([y[1], box[1]])
-        z[0] = min([z[0], box[2]])
-        z[1] = max([z[1], box[2]])
-    return np.array([x[1]-x[0], y[1] - y[0], z[1] - z[0]])
+    stats = bbox_stats(obj)
+    return None if stats is None else stats['size']
 
 
 def get_max(obj):
-    bb = rs.BoundingBox(obj)
-    x = -100
-    y = -100
-    z = -100
-    for box in bb:
-        x = max([x, box[0]])
-        y = max([y, box[1]])
-        z = max([z, box[2]])
-    return np.array([x, y, z])
+    stats = bbox_stats(obj)
+    return None if stats is None else stats['max']
 
 
 def get_min(obj):
-    bb = rs.BoundingBox(obj)
-    x = 100
-    y = 100
-    z = 100
-    for box in bb:
-        x = min([x, box[0]])
-        y = min([y, box[1]])
-        z = min([z, box[2]])
-    return np.array([x, y, z])
-
-
-def set_user_text(obj, key, value):
-    data = pickle.dumps(value)
-    text = base64.b64encode(data).decode('ascii')
-    rs.SetUserText(obj, key, text)
+    stats = bbox_stats(obj)
+    return None if stats is None else stats['min']
+
+
+def set_user_text(obj, key, value, compress=None):
+    """
+    값을 lib.usertext 바이너리 포맷(타입 지정, 선택적 zlib 압축)으로 user text에 저장한다.
+    obj가 id 리스트이면 한 번만 인코딩해서 모든 객체에 넣는다. 저장한 문자열을 반환한다.
+    """
+    text = usertext.encode(value, compress)
+    for obj_id in (obj if isinstance(obj, (list, tuple)) else [obj]):
+        rs.SetUserText(obj_id, key, text)
     return text
 
 
-def get_user_text(obj, key):
+def get_user_text(obj, key, lazy=True, allow_pickle=False):
+    """
+    set_user_text로 저장한 값을 읽는다. 키가 없으면 None.
+    dict는 lazy=True이면 접근한 항목만 해석하는 LazyDict로 반환된다.
+    예전 pickle+base64 값은 allow_pickle=True일 때만 읽는다 (신뢰하는 파일에서만 사용).
+    """
     text = rs.GetUserText(obj, key)
-    data = base64.b64decode(text)
-    return pickle.loads(data)
+    if text is None:
+        return None
+    if usertext.is_encoded(text):
+        return usertext.decode(text, lazy)
+    if not allow_pickle:
+        raise ValueError('user text {!r} is in the legacy pickle format; pass allow_pickle=True to read it'.format(key))
+    import base64
+    import pickle
+    return pickle.loads(base64.b64decode(text))
 
 
 def assign_object(obj, layer, name):
@@ -89,6 +164,41 @@ def assign_group(obj, group_name):
     rs.AddObjectsToGroup(obj, group_name)
 
 
+def ObjectAttributesFromSpec(spec, base=None):
+    """
+    lib.scratch 속성 spec({'layer', 'name', 'user_text'}) → Rhino ObjectAttributes.
+    base(복사한 객체의 속성)가 있으면 그 위에 덮어쓴다. 레이어가 없으면 만든다.
+    """
+    attributes = base.Duplicate() if base is not None else Rhino.DocObjects.ObjectAttributes()
+    layer = spec.get('layer')
+    if layer:
+        if not rs.IsLayer(layer):
+            rs.AddLayer(layer)
+        attributes.LayerIndex = sc.doc.Layers.FindByFullPath(layer, -1)
+    if spec.get('name') is not None:
+        attributes.Name = spec['name']
+    for key, text in spec.get('user_text', {}).items():
+        attributes.SetUserString(key, text)
+    return attributes
+
+
+def ScratchGeometryToRhino(geometry):
+    """commit 직전 형상 변환: TriangleMesh는 Rhino Mesh로, 나머지는 그대로."""
+    from lib.trimesh import TriangleMesh
+
+    if isinstance(geometry, TriangleMesh):
+        return TriangleMeshToMesh(geometry)
+    return geometry
+
+
+def RhinoScratch(undo_label='scratch commit'):
+    """현재 문서에 commit하는 lib.scratch.ScratchContext."""
+    from lib.scratch import ScratchContext
+
+    return ScratchContext(sc.doc, make_attributes=ObjectAttributesFromSpec,
+                          prepare_geometry=ScratchGeometryToRhino, undo_label=undo_label)
+
+
 
 def BrepToMesh(brep_id):
     brep = rs.coercebrep(brep_id)
@@ -106,6 +216,166 @@ def BrepToMesh(brep_id):
         return mesh
 
 
+def _numpy_to_net(values, net_type):
+    """연속 NumPy 배열을 같은 원소형의 .NET 배열(float[] / int[])로 memcpy 한다."""
+    flat = np.ascontiguousarray(values).ravel()
+    out = Array.CreateInstance(clr.GetClrType(net_type), flat.size)
+    if flat.size:
+        Marshal.Copy(IntPtr(Int64(flat.ctypes.data)), out, 0, flat.size)
+    return out
+
+
+def _net_to_numpy(values, dtype):
+    """.NET float[] / int[]를 NumPy 배열로 memcpy 한다 (원소 단위 변환 없음)."""
+    out = np.empty(values.Length, dtype=dtype)
+    if out.size:
+        Marshal.Copy(values, 0, IntPtr(Int64(out.ctypes.data)), out.size)
+    return out
+
+
+def _struct_array(values, struct_type, net_type):
+    """
+    (N, k) NumPy 배열을 메모리 배치가 같은 .NET struct 배열(Point3f[] / MeshFace[] / Vector3f[])로 만든다.
+    float[] / int[]로 복사한 뒤 고정(pin)한 struct 배열에 그대로 memcpy 한다.
+    """
+    staging = _numpy_to_net(values, net_type)
+    out = Array.CreateInstance(clr.GetClrType(struct_type), values.shape[0])
+    if staging.Length:
+        handle = GCHandle.Alloc(out, GCHandleType.Pinned)
+        try:
+            Marshal.Copy(staging, 0, handle.AddrOfPinnedObject(), staging.Length)
+        finally:
+            handle.Free()
+    return out
+
+
+def MeshToArrays(mesh):
+    """RhinoCommon Mesh를 (vertices (V,3) float64, faces (F,3) int64) 배열로 변환한다. 쿼드는 삼각형으로 분할."""
+    vertices = _net_to_numpy(mesh.Vertices.ToFloatArray(), np.float32).astype(np.float64).reshape(-1, 3)
+    faces = _net_to_numpy(mesh.Faces.ToIntArray(True), np.int32).astype(np.int64).reshape(-1, 3)
+    return vertices, faces
+
+
+def ArraysToMesh(vertices, faces, normals=None):
+    """
+    (vertices, faces) 배열로 RhinoCommon Mesh를 만든다. normals가 없으면 Rhino에서 계산.
+    정점/면/법선은 Point3f / MeshFace / Vector3f 배열로 memcpy 해서 한 번에 추가한다 (원소마다 .NET 객체를 만들지 않음).
+    """
+    mesh = Rhino.Geometry.Mesh()
+    v = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+    f = np.asarray(faces, dtype=np.int32).reshape(-1, 3)
+    quads = np.column_stack((f, f[:, 2]))           # MeshFace (A, B, C, D), 삼각형은 D = C
+    mesh.Vertices.Capacity = v.shape[0]
+    mesh.Vertices.AddVertices(_struct_array(v, Point3f, Single))
+    mesh.Faces.Capacity = f.shape[0]
+    mesh.Faces.AddFaces(_struct_array(quads, MeshFace, Int32))
+    if normals is None:
+        mesh.Normals.ComputeNormals()
+    else:
+        n = np.asarray(normals, dtype=np.float32).reshape(-1, 3)
+        mesh.Normals.AddRange(_struct_array(n, Vector3f, Single))
+        mesh.FaceNormals.ComputeFaceNormals()
+    mesh.Compact()
+    return mesh
+
+
+def MeshToTriangleMesh(mesh):
+    """RhinoCommon Mesh → lib.trimesh.TriangleMesh (float[] / int[] 버퍼를 memcpy, 쿼드는 삼각형으로 분할)."""
+    from lib.trimesh import TriangleMesh
+
+    vertices = _net_to_numpy(mesh.Vertices.ToFloatArray(), np.float32)
+    faces = _net_to_numpy(mesh.Faces.ToIntArray(True), np.int32)
+    return TriangleMesh(vertices, faces)
+
+
+def TriangleMeshToMesh(tri_mesh, normals=None):
+    """lib.trimesh.TriangleMesh → RhinoCommon Mesh (문서에 추가하기 직전에만 사용)."""
+    return ArraysToMesh(tri_mesh.vertices, tri_mesh.faces, normals)
+
+
+def WriteSTL(objs, filename=None):
+    """
+    문서의 메쉬 객체들을 커맨드/선택 없이 하나의 binary STL로 저장한다 (객체 단위로 흘려 씀).
+    filename이 없으면 ExportToSTL과 같이 문서 이름으로 저장한다.
+    """
+    from lib.stl import StlWriter
+
+    if filename is None:
+        filename = rs.DocumentPath() + rs.DocumentName()[:-4] + '.stl'
+    with StlWriter(filename) as writer:
+        for obj in objs:
+            mesh = rs.coercemesh(obj)
+            if mesh:
+                writer.add(*MeshToArrays(mesh))
+    return filename
+
+
+def _export_parts(objs):
+    """문서 메쉬 객체를 하나씩 (이름, vertices, faces, 메타데이터)로 바꾸는 생성기 (한 번에 한 파트만 메모리에 둔다)."""
+    for index, obj in enumerate(objs):
+        mesh = rs.coercemesh(obj)
+        if not mesh:
+            continue
+        layer = rs.ObjectLayer(obj) or ''
+        name = rs.ObjectName(obj) or 'part'
+        meta = {'layer': layer, 'id': str(obj)}
+        try:
+            support = get_user_text(obj, 'support')
+        except ValueError:
+            support = None
+        if support is not None:
+            for key in support:
+                value = support[key]
+                if isinstance(value, (bool, int, float, str)):
+                    meta[key] = value
+        vertices, faces = MeshToArrays(mesh)
+        yield '{}-{}'.format(name, index + 1), vertices, faces, meta
+
+
+def ExportPlate(objs, filename=None, stl=False, title=None):
+    """
+    문서의 메쉬 객체들(product + 서포트)을 커맨드 없이 하나의 3MF로 저장한다 (lib.threemf).
+    정점을 공유하고 객체 별 이름/레이어/서포트 파라미터를 메타데이터로 남기며, 객체 단위로 흘려 쓴다.
+    stl=True이면 같은 이름의 binary STL도 함께 쓴다. filename이 없으면 문서 이름으로 저장한다.
+
+    Returns:
+        (3MF 경로, STL 경로 또는 None)
+    """
+    from lib.threemf import write_3mf
+
+    if filename is None:
+        filename = rs.DocumentPath() + rs.DocumentName()[:-4] + '.3mf'
+    stl_path = filename[:-4] + '.stl' if stl else None
+    count, triangles = write_3mf(filename, _export_parts(objs), title=title or rs.DocumentName(),
+                                 stl_path=stl_path)
+    print("[export] {} | objects = {} | triangles = {}".format(filename, count, triangles))
+    return filename, stl_path
+
+
+def GeometryToJSON(geometry):
+    """RhinoCommon 형상을 JSON 문자열로 직렬화한다 (캐시 저장용)."""
+    return geometry.ToJSON(Rhino.FileIO.SerializationOptions())
+
+
+def GeometryFromJSON(text):
+    """GeometryToJSON으로 만든 문자열에서 형상을 복원한다."""
+    return Rhino.Runtime.CommonObject.FromJSON(str(text))
+
+
+def SurfaceToBrep(surface, num_u=36, num_v=36):
+    """
+    lib.surface.HeightSurface를 bounds 범위의 num_u x num_v 격자로 계산해
+    그 점들을 지나는 NURBS 곡면 Brep으로 만든다 (CreatePatch 대신 보간만 수행).
+    """
+    min_x, min_y, max_x, max_y = surface.bounds
+    xs = np.linspace(min_x, max_x, num_u)
+    ys = np.linspace(min_y, max_y, num_v)
+    zs = surface.grid(xs, ys)        # (num_v, num_u)
+    points = [Point3d(x, y, zs[j, i]) for i, x in enumerate(xs.tolist()) for j, y in enumerate(ys.tolist())]
+    srf = NurbsSurface.CreateThroughPoints(points, num_u, num_v, 3, 3, False, False)
+    return srf.ToBrep() if srf else None
+
+
 def ExportToSTL(objs):
     rs.UnselectAllObjects()
     rs.SelectObjects(objs)
@@ -0,0 +1,192 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 아래에서 위(+Z)를 바라보는 Z-buffer heightmap으로 서포트 윗면을 만드는 모듈.
+# heightmap은 (ny, nx) 배열이며 행은 Y, 열은 X 방향이다. 값이 없는 셀은 nan.
+
+import numpy as np
+
+from lib.raycast import first_hits
+
+
+def grid_axes(min_x, max_x, min_y, max_y, cell):
+    """cell 간격 이하가 되도록 양 끝을 포함하는 X/Y 격자 좌표를 만든다."""
+    nx = max(2, int(np.ceil((max_x - min_x) / float(cell))) + 1)
+    ny = max(2, int(np.ceil((max_y - min_y) / float(cell))) + 1)
+    return np.linspace(min_x, max_x, nx), np.linspace(min_y, max_y, ny)
+
+
+def rasterize_underside(meshes, xs, ys, z0=0.0, use_bvh=False):
+    """
+    격자 노드마다 z0에서 +Z로 본 가장 낮은 표면 높이를 기록한다 (bottom-facing Z-buffer).
+
+    Args:
+        meshes: (vertices, faces) 튜플 리스트
+    Returns:
+        (len(ys), len(xs)) heightmap, 표면이 없는 셀은 nan
+    """
+    gx, gy = np.meshgrid(xs, ys)
+    z = first_hits(meshes, gx.ravel(), gy.ravel(), z0, use_bvh)
+    return z.reshape(gx.shape)
+
+
+def rasterize_top(meshes, xs, ys, z_top, use_bvh=False):
+    """격자 노드마다 z_top에서 -Z로 본 가장 높은 표면 높이를 기록한다 (top-facing Z-buffer)."""
+    mirrored = [(np.asarray(v, dtype=np.float64) * (1.0, 1.0, -1.0), f) for v, f in meshes]
+    return -rasterize_underside(mirrored, xs, ys, -z_top, use_bvh)
+
+
+def triangle_nodes(triangles, xs, ys, strict=False):
+    """
+    삼각형들의 XY 투영 안에 드는 격자 노드를 한 번에 찾는다 (삼각형 bbox 안의 노드 후보를 펼쳐 barycentric 검사).
+
+    Args:
+        triangles: (F, 3, 2 또는 3) 꼭짓점 좌표
+        strict: True이면 변 위의 노드는 제외 (Ray 교차 개수 세기용)
+    Returns:
+        (owner (K,) 삼각형 번호, ci (K,) X 인덱스, cj (K,) Y 인덱스, bary (K, 3) 무게중심 좌표)
+    """
+    tri = np.asarray(triangles, dtype=np.float64)[:, :, :2]
+    dx, dy = xs[1] - xs[0], ys[1] - ys[0]
+    nx, ny = xs.shape[0], ys.shape[0]
+    lo = tri.min(axis=1)
+    hi = tri.max(axis=1)
+    i0 = np.clip(np.ceil((lo[:, 0] - xs[0]) / dx - 1e-9), 0, nx).astype(np.int64)
+    i1 = np.clip(np.floor((hi[:, 0] - xs[0]) / dx + 1e-9), -1, nx - 1).astype(np.int64)
+    j0 = np.clip(np.ceil((lo[:, 1] - ys[0]) / dy - 1e-9), 0, ny).astype(np.int64)
+    j1 = np.clip(np.floor((hi[:, 1] - ys[0]) / dy + 1e-9), -1, ny - 1).astype(np.int64)
+    w = np.maximum(i1 - i0 + 1, 0)
+    h = np.maximum(j1 - j0 + 1, 0)
+    counts = w * h
+    owner = np.repeat(np.arange(tri.shape[0]), counts)
+    local = np.arange(owner.shape[0]) - np.repeat(np.cumsum(counts) - counts, counts)
+    ci = i0[owner] + local % w[owner]
+    cj = j0[owner] + local // w[owner]
+
+    a, b, c = tri[owner, 0], tri[owner, 1], tri[owner, 2]
+    px, py = xs[ci], ys[cj]
+    d = (b[:, 1] - c[:, 1]) * (a[:, 0] - c[:, 0]) + (c[:, 0] - b[:, 0]) * (a[:, 1] - c[:, 1])
+    d = np.where(np.abs(d) < 1e-18, 1e-18, d)
+    l0 = ((b[:, 1] - c[:, 1]) * (px - c[:, 0]) + (c[:, 0] - b[:, 0]) * (py - c[:, 1])) / d
+    l1 = ((c[:, 1] - a[:, 1]) * (px - c[:, 0]) + (a[:, 0] - c[:, 0]) * (py - c[:, 1])) / d
+    l2 = 1.0 - l0 - l1
+    if strict:
+        inside = (l0 > 0) & (l1 > 0) & (l2 > 0)
+    else:
+        inside = (l0 >= -1e-9) & (l1 >= -1e-9) & (l2 >= -1e-9)
+    return owner[inside], ci[inside], cj[inside], np.column_stack((l0, l1, l2))[inside]
+
+
+def apply_clearance(heights, underside, offset, base_z=0.0, min_thickness=1e-3):
+    """
+    product를 -Z로 offset 만큼 내린 것과의 차집합을 셀 단위 min으로 계산한다.
+
+    offset이 Z 방향 평행이동뿐이므로 MeshBooleanDifference와 같은 결과를 heightfield에서
+    직접 얻을 수 있다. 두께가 min_thickness 이하로 줄어든 셀은 nan(서포트 없음)으로 만든다.
+    heights가 nan인 셀(footprint 밖 등)은 차집합이므로 그대로 nan이다.
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    limit = np.asarray(underside, dtype=np.float64) - float(offset)
+    out = np.where(np.isnan(limit), heights, np.minimum(heights, limit))
+    out[out <= base_z + min_thickness] = np.nan
+    return out
+
+
+def sigma_filter(heights, k=2.0):
+    """평균에서 k 시그마를 벗어나는 셀을 nan으로 바꾼다 (Cut_brep의 2 sigma 필터와 동일 기준)."""
+    out = np.array(heights, dtype=np.float64)
+    valid = ~np.isnan(out)
+    if np.count_nonzero(valid) < 2:
+        return out
+    zs = out[valid]
+    sigma = zs.std()
+    if sigma > 1e-9:
+        out[valid & (np.abs(out - zs.mean()) > k * sigma)] = np.nan
+    return out
+
+
+def fill_holes(heights):
+    """nan 셀을 이웃 유효 셀 평균으로 바깥쪽으로 번져가며 채운다 (모두 nan이면 그대로 반환)."""
+    out = np.array(heights, dtype=np.float64)
+    missing = np.isnan(out)
+    if missing.all():
+        return out
+
+    while missing.any():
+        padded = np.pad(out, 1, mode='constant', constant_values=np.nan)
+        stack = np.stack([padded[1 + di:padded.shape[0] - 1 + di, 1 + dj:padded.shape[1] - 1 + dj]
+                          for di, dj in ((-1, 0), (1, 0), (0, -1), (0, 1),
+                                         (-1, -1), (-1, 1), (1, -1), (1, 1))])
+        count = np.sum(~np.isnan(stack), axis=0)
+        total = np.nansum(stack, axis=0)
+        grow = missing & (count > 0)
+        out[grow] = total[grow] / count[grow]
+        missing &= ~grow
+    return out
+
+
+def support_top(underside, lift=0.2, top_z=5.0, sigma_k=2.0, base_z=0.0):
+    """
+    underside heightmap으로 서포트 윗면 높이를 만든다.
+
+    패치 곡면 경로와 같은 순서로 2 sigma 필터 → 빈 셀 채우기 → +lift 후,
+    베이스 박스 높이(base_z ~ top_z) 범위로 자른다. 유효 셀이 없으면 None.
+    """
+    filtered = sigma_filter(underside, sigma_k)
+    if np.all(np.isnan(filtered)):
+        return None
+    heights = fill_holes(filtered) + lift
+    return np.clip(heights, base_z, top_z)
+
+
+def heightfield_to_mesh(xs, ys, heights, base_z=0.0, mask=None):
+    """
+    heightfield 기둥을 닫힌(watertight) 삼각형 메쉬로 만든다.
+
+    노드 4개가 모두 mask 안에 있는 격자 칸만 사용하며, 윗면/바닥면과
+    경계를 따라 세운 옆벽으로 구성된다. 법선은 바깥을 향한다.
+
+    Returns:
+        (vertices (V,3), faces (F,3))
+    """
+    heights = np.asarray(heights, dtype=np.float64)
+    ny, nx = heights.shape
+    if mask is None:
+        mask = ~np.isnan(heights)
+    else:
+        mask = np.asarray(mask, dtype=bool) & ~np.isnan(heights)
+
+    quad = mask[:-1, :-1] & mask[:-1, 1:] & mask[1:, :-1] & mask[1:, 1:]
+    qi, qj = np.nonzero(quad)
+    if qi.shape[0] == 0:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64)
+
+    # 노드 id: 윗면 i*nx+j, 바닥면 n+i*nx+j. 사각형 a-b-c-d는 +Z에서 볼 때 반시계 방향
+    n = nx * ny
+    a = qi * nx + qj
+    b = a + 1
+    c = a + nx + 1
+    d = a + nx
+    top = np.concatenate((np.column_stack((a, b, c)), np.column_stack((a, c, d))))
+    bottom = np.concatenate((np.column_stack((a, c, b)), np.column_stack((a, d, c)))) + n
+
+    # 경계 변: 반대 방향 변이 없는 방향 변 (내부는 변의 왼쪽)
+    edges = np.concatenate((np.column_stack((a, b)), np.column_stack((b, c)),
+                            np.column_stack((c, d)), np.column_stack((d, a))))
+    fwd = edges[:, 0] * n + edges[:, 1]
+    rev = edges[:, 1] * n + edges[:, 0]
+    boundary = edges[~np.isin(fwd, rev)]
+    u, v = boundary[:, 0], boundary[:, 1]
+    walls = np.concatenate((np.column_stack((u, u + n, v + n)), np.column_stack((u, v + n, v))))
+
+    faces = np.concatenate((top, bottom, walls))
+    gx, gy = np.meshgrid(xs, ys)
+    vertices = np.concatenate((
+        np.column_stack((gx.ravel(), gy.ravel(), heights.ravel())),
+        np.column_stack((gx.ravel(), gy.ravel(), np.full(n, float(base_z)))),
+    ))
+
+    # 사용된 노드만 남기도록 인덱스 압축
+    used, inverse = np.unique(faces, return_inverse=True)
+    return vertices[used], inverse.reshape(faces.shape).astype(np.int64)
@@ -0,0 +1,157 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 출력 방향(회전) 탐색 모듈. 후보 회전 수백 개를 면 법선/면적 행렬 곱으로 한 번에 평가한다.
+# Z축 기준 회전은 점수에 영향이 없으므로 후보는 "+Z로 보낼 모델 좌표 방향(up)" 단위 벡터 하나로 나타낸다.
+#   - overhang: 서포트가 필요한 아래 방향 면의 XY 투영 면적 (mm^2)
+#   - volume:   그 면들 아래 기둥 부피 ≈ Σ 투영 면적 x 최저점으로부터의 높이 (mm^3)
+#   - height:   빌드 높이 (레이어 수에 비례, mm)
+# 자기 가림(위쪽 면이 아래 면의 서포트를 막는 경우)은 무시한 근사다.
+#
+#   result = best_orientation(vertices, faces)
+#   R = result['rotation']          # (3, 3), R @ result['up'] = +Z
+
+import numpy as np
+
+
+OVERHANG_ANGLE = 45.0           # 면 법선과 -Z 사이 각이 이보다 작으면 서포트가 필요한 면 (도)
+WEIGHTS = {'overhang': 1.0, 'volume': 1.0, 'height': 0.5}
+DEFAULT_UP = (0.0, 0.0, -1.0)   # main()의 X축 180도 뒤집기 (모델 -Z → +Z)
+CHUNK_ELEMENTS = 1 << 22        # (면 수 x 후보 수) 임시 행렬 원소 상한
+
+
+def sphere_directions(count):
+    """단위 구 위에 거의 균일한 count개 방향 (피보나치 격자, (count, 3))."""
+    i = np.arange(count, dtype=np.float64) + 0.5
+    z = 1.0 - 2.0 * i / count
+    r = np.sqrt(np.maximum(0.0, 1.0 - z * z))
+    phi = i * np.pi * (3.0 - np.sqrt(5.0))
+    return np.column_stack((r * np.cos(phi), r * np.sin(phi), z))
+
+
+def cone_directions(axis, radius, count):
+    """axis 주변 반각 radius(라디안) 원뿔 안의 count개 방향 (axis 포함, (count + 1, 3))."""
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    helper = np.array((1.0, 0.0, 0.0)) if abs(axis[0]) < 0.9 else np.array((0.0, 1.0, 0.0))
+    e1 = np.cross(axis, helper)
+    e1 /= np.linalg.norm(e1)
+    e2 = np.cross(axis, e1)
+    i = np.arange(count, dtype=np.float64) + 0.5
+    t = radius * np.sqrt(i / count)
+    phi = i * np.pi * (3.0 - np.sqrt(5.0))
+    dirs = (np.cos(t)[:, None] * axis
+            + np.sin(t)[:, None] * (np.cos(phi)[:, None] * e1 + np.sin(phi)[:, None] * e2))
+    return np.concatenate((axis[None], dirs))
+
+
+def rotation_to_up(up):
+    """모델 좌표 방향 up을 +Z로 보내는 최소 회전 (3, 3). up이 -Z이면 main()과 같은 X축 180도 회전."""
+    u = np.asarray(up, dtype=np.float64)
+    u = u / np.linalg.norm(u)
+    z = np.array((0.0, 0.0, 1.0))
+    c = float(u @ z)
+    if c < -1.0 + 1e-9:
+        return np.diag((1.0, -1.0, -1.0))
+    k = np.cross(u, z)
+    kx = np.array(((0.0, -k[2], k[1]), (k[2], 0.0, -k[0]), (-k[1], k[0], 0.0)))
+    return np.eye(3) + kx + kx @ kx / (1.0 + c)
+
+
+def _face_data(vertices, faces):
+    v = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    f = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    tri = v[f]
+    cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    area = np.linalg.norm(cross, axis=1) * 0.5
+    ok = area > 0
+    normals = cross[ok] / (2.0 * area[ok, None])
+    centroids = tri[ok].mean(axis=1)
+    return v, normals.astype(np.float32), area[ok].astype(np.float32), centroids.astype(np.float32)
+
+
+def score_directions(vertices, faces, ups, overhang_angle=OVERHANG_ANGLE):
+    """
+    후보 방향들(ups (K, 3), +Z로 보낼 모델 방향)의 overhang / volume / height를 한 번에 계산한다.
+
+    Returns:
+        {'overhang', 'volume', 'height'} 각 (K,) 배열
+    """
+    v, normals, area, centroids = _face_data(vertices, faces)
+    ups = np.asarray(ups, dtype=np.float64).reshape(-1, 3)
+    ups = ups / np.linalg.norm(ups, axis=1, keepdims=True)
+    limit = np.float32(np.cos(np.radians(overhang_angle)))
+
+    # 빌드 높이/최저점: 정점 투영의 min/max
+    heights = v @ ups.T
+    z_min = heights.min(axis=0)
+    height = heights.max(axis=0) - z_min
+
+    k = ups.shape[0]
+    overhang = np.zeros(k)
+    volume = np.zeros(k)
+    step = max(1, CHUNK_ELEMENTS // max(1, normals.shape[0]))
+    ups32 = ups.astype(np.float32)
+    for start in range(0, k, step):
+        block = ups32[start:start + step].T                     # (3, Kc)
+        down = -(normals @ block)                               # (F, Kc) 면 법선의 -Z 성분
+        projected = np.where(down > limit, down * area[:, None], np.float32(0.0))
+        lift = centroids @ block - z_min[start:start + step].astype(np.float32)
+        overhang[start:start + step] = projected.sum(axis=0, dtype=np.float64)
+        volume[start:start + step] = np.einsum('fk,fk->k', projected, lift, dtype=np.float64)
+    return {'overhang': overhang, 'volume': volume, 'height': height}
+
+
+def _combine(terms, weights, scale):
+    total = 0.0
+    for key, w in weights.items():
+        lo, span = scale[key]
+        total = total + w * (terms[key] - lo) / span
+    return total
+
+
+def best_orientation(vertices, faces, count=256, refine=2, weights=None, overhang_angle=OVERHANG_ANGLE,
+                     default_up=DEFAULT_UP):
+    """
+    점수가 가장 낮은 출력 방향을 찾는다.
+
+    구 전체 count개 후보(+ default_up)를 평가한 뒤, 최적 후보 주변 원뿔을 refine번 (반각을 절반씩 줄이며)
+    count/4개씩 다시 평가한다. 각 항은 첫 단계 후보들의 [최소, 최대] 범위로 정규화해서 weights로 더한다.
+
+    Returns:
+        {'up', 'rotation', 'score', 'overhang', 'volume', 'height', 'evaluated',
+         'default': default_up 후보의 같은 항목 (비교용)}
+    """
+    weights = dict(WEIGHTS if weights is None else weights)
+    ups = np.concatenate((np.asarray(default_up, dtype=np.float64).reshape(1, 3), sphere_directions(count)))
+    terms = score_directions(vertices, faces, ups, overhang_angle)
+    scale = {}
+    for key in weights:
+        lo, hi = float(terms[key].min()), float(terms[key].max())
+        scale[key] = (lo, hi - lo if hi - lo > 1e-12 else 1.0)
+    scores = _combine(terms, weights, scale)
+    default = {key: float(terms[key][0]) for key in terms}
+    default['score'] = float(scores[0])
+
+    best = int(np.argmin(scores))
+    best_up, best_score = ups[best], float(scores[best])
+    best_terms = {key: float(terms[key][best]) for key in terms}
+    evaluated = ups.shape[0]
+
+    radius = 2.0 * np.sqrt(4.0 * np.pi / max(count, 1))        # 후보 간격의 약 2배
+    for _ in range(refine):
+        local = cone_directions(best_up, radius, max(8, count // 4))
+        local_terms = score_directions(vertices, faces, local, overhang_angle)
+        local_scores = _combine(local_terms, weights, scale)
+        evaluated += local.shape[0]
+        i = int(np.argmin(local_scores))
+        if local_scores[i] < best_score:
+            best_up, best_score = local[i] / np.linalg.norm(local[i]), float(local_scores[i])
+            best_terms = {key: float(local_terms[key][i]) for key in local_terms}
+        radius *= 0.5
+
+    result = {'up': best_up, 'rotation': rotation_to_up(best_up), 'score': best_score, 'evaluated': evaluated,
+              'default': default}
+    result.update(best_terms)
+    return result
@@ -0,0 +1,134 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 서포트가 필요한 곳만 찾는 overhang / 접촉 영역 분석 모듈 (뒤집고 내린 product 기준, +Z가 위).
+#   1. 면 법선의 -Z 성분으로 overhang 면을 한 번에 분류 (lib.orient와 같은 각도 기준)
+#   2. 면 인접(공유 변) 연결 요소로 overhang 영역을 묶고 영역 별 면적/범위 계산
+#   3. 영역 면을 heightmap 격자 노드에 래스터화 + margin 팽창 → 서포트 footprint mask
+# footprint 밖 셀을 nan으로 만들면 heightfield_to_mesh가 그 셀에는 기둥을 세우지 않는다.
+#
+#   mask, regions = support_footprint(meshes, xs, ys, overhang_angle=45.0, margin=0.5)
+#   heights = np.where(mask, heights, np.nan)
+
+import numpy as np
+
+from lib.heightmap import triangle_nodes
+from lib.meshclean import face_components
+from lib.orient import OVERHANG_ANGLE
+
+
+def classify_faces(vertices, faces, overhang_angle=OVERHANG_ANGLE):
+    """
+    면 별 (overhang 여부 (F,) bool, 면적 (F,), 법선의 -Z 성분 (F,))을 계산한다.
+    법선과 -Z 사이 각이 overhang_angle보다 작은 면이 overhang이다.
+    """
+    v = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    f = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    tri = v[f]
+    cross = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    length = np.linalg.norm(cross, axis=1)
+    down = np.zeros(f.shape[0])
+    ok = length > 0
+    down[ok] = -cross[ok, 2] / length[ok]
+    return down > np.cos(np.radians(overhang_angle)), length * 0.5, down
+
+
+def overhang_regions(vertices, faces, overhang_angle=OVERHANG_ANGLE, min_area=0.0):
+    """
+    overhang 면을 공유 변으로 묶은 영역들.
+
+    Args:
+        min_area: 투영 면적(mm^2)이 이보다 작은 영역은 버린다 (스캔 잡음 등)
+    Returns:
+        (labels (F,) — 영역 번호, overhang이 아니거나 버린 면은 -1,
+         [{'faces', 'area', 'projected', 'bounds' (min_x, min_y, max_x, max_y), 'z_min'}, ...])
+    """
+    v = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    f = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    overhang, area, down = classify_faces(v, f, overhang_angle)
+    labels = face_components(f, overhang)
+    count = int(labels.max()) + 1 if labels.size else 0
+    if count == 0:
+        return labels, []
+
+    sel = labels >= 0
+    lab = labels[sel]
+    tri = v[f[sel]]
+    projected = np.bincount(lab, weights=area[sel] * down[sel], minlength=count)
+    lo = np.full((count, 3), np.inf)
+    hi = np.full((count, 3), -np.inf)
+    np.minimum.at(lo, lab, tri.min(axis=1))
+    np.maximum.at(hi, lab, tri.max(axis=1))
+
+    keep = projected >= min_area
+    remap = np.full(count, -1, dtype=np.int64)
+    remap[keep] = np.arange(int(np.count_nonzero(keep)))
+    labels = np.where(sel, remap[np.maximum(labels, 0)], -1)
+
+    face_counts = np.bincount(lab, minlength=count)
+    face_area = np.bincount(lab, weights=area[sel], minlength=count)
+    regions = [{'faces': int(face_counts[i]), 'area': float(face_area[i]), 'projected': float(projected[i]),
+                'bounds': (float(lo[i, 0]), float(lo[i, 1]), float(hi[i, 0]), float(hi[i, 1])),
+                'z_min': float(lo[i, 2])}
+               for i in np.nonzero(keep)[0]]
+    return labels, regions
+
+
+def rasterize_faces(vertices, faces, xs, ys):
+    """
+    삼각형들의 XY 투영이 덮는 격자 노드 mask (len(ys), len(xs)).
+    노드를 하나도 덮지 않는 작은 삼각형은 무게중심에서 가장 가까운 노드를 표시한다.
+    """
+    mask = np.zeros((ys.shape[0], xs.shape[0]), dtype=bool)
+    f = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    if f.shape[0] == 0:
+        return mask
+    tri = np.asarray(vertices, dtype=np.float64)[f][:, :, :2]
+    _, ci, cj, _ = triangle_nodes(tri, xs, ys)
+    mask[cj, ci] = True
+
+    dx, dy = xs[1] - xs[0], ys[1] - ys[0]
+    nx, ny = xs.shape[0], ys.shape[0]
+    centroid = tri.mean(axis=1)
+    ci = np.clip(np.rint((centroid[:, 0] - xs[0]) / dx), 0, nx - 1).astype(np.int64)
+    cj = np.clip(np.rint((centroid[:, 1] - ys[0]) / dy), 0, ny - 1).astype(np.int64)
+    mask[cj, ci] = True
+    return mask
+
+
+def dilate(mask, radius):
+    """원형(반경 radius 셀) 팽창. 축 별 이동 OR을 행 별 반폭으로 조합한다."""
+    mask = np.asarray(mask, dtype=bool)
+    if radius <= 0:
+        return mask.copy()
+    ny, nx = mask.shape
+    padded = np.pad(mask, radius)
+    out = np.zeros_like(mask)
+    for di in range(-radius, radius + 1):
+        half = int(np.floor(np.sqrt(radius * radius - di * di)))
+        rows = padded[radius + di:radius + di + ny]
+        for dj in range(-half, half + 1):
+            out |= rows[:, radius + dj:radius + dj + nx]
+    return out
+
+
+def support_footprint(meshes, xs, ys, overhang_angle=OVERHANG_ANGLE, margin=0.5, min_area=0.0):
+    """
+    meshes((vertices, faces) 목록)의 overhang 영역 아래만 덮는 heightmap 격자 mask.
+
+    영역 면을 격자에 래스터화하고 margin(mm)만큼 팽창한다 (heightfield_to_mesh는 노드 4개가 모두
+    mask 안인 칸만 쓰므로 최소 한 칸은 팽창한다).
+
+    Returns:
+        (mask (len(ys), len(xs)) bool, 영역 목록 — overhang_regions 참고)
+    """
+    mask = np.zeros((ys.shape[0], xs.shape[0]), dtype=bool)
+    regions = []
+    for vertices, faces in meshes:
+        labels, found = overhang_regions(vertices, faces, overhang_angle, min_area)
+        regions.extend(found)
+        f = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        mask |= rasterize_faces(vertices, f[labels >= 0], xs, ys)
+    cell = min(xs[1] - xs[0], ys[1] - ys[0])
+    return dilate(mask, max(1, int(np.ceil(margin / cell)))), regions
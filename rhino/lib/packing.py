@@ -0,0 +1,123 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 빌드 플레이트 위에 (product + 서포트) 그룹의 XY footprint 사각형을 배치하는 skyline 패킹 모듈.
+# 각 사각형을 skyline(현재 채워진 윗선) 위에서 가장 낮고 왼쪽인 위치(bottom-left)에 놓으며,
+# 90도 회전도 함께 시도한다. 플레이트가 차면 다음 플레이트를 연다.
+
+import numpy as np
+
+
+def _fit(skyline, i, w, plate_w):
+    """skyline[i] 시작점에 폭 w를 놓을 때의 바닥 높이 (놓을 수 없으면 None)."""
+    x = skyline[i][0]
+    if x + w > plate_w + 1e-9:
+        return None
+    y = 0.0
+    remaining = w
+    j = i
+    while remaining > 1e-9:
+        if j >= len(skyline):
+            return None
+        y = max(y, skyline[j][1])
+        remaining -= skyline[j][2]
+        j += 1
+    return y
+
+
+def _place(skyline, i, w, h, y):
+    """skyline[i]에서 시작하는 폭 w, 윗면 y + h 구간을 skyline에 반영한다."""
+    x = skyline[i][0]
+    new = [x, y + h, w]
+    end = x + w
+    out = skyline[:i] + [new]
+    for seg in skyline[i:]:
+        sx, sy, sw = seg
+        if sx + sw <= end + 1e-9:
+            continue            # 새 구간에 완전히 덮임
+        if sx < end:
+            seg = [end, sy, sx + sw - end]
+        out.append(seg)
+
+    # 같은 높이로 이어지는 구간 합치기
+    merged = [out[0]]
+    for seg in out[1:]:
+        if abs(seg[1] - merged[-1][1]) < 1e-9:
+            merged[-1][2] += seg[2]
+        else:
+            merged.append(seg)
+    return merged
+
+
+def pack_rectangles(sizes, plate=(140.0, 80.0), gap=2.0, margin=0.0, allow_rotate=True):
+    """
+    (w, h) 사각형들을 플레이트에 skyline bottom-left 방식으로 배치한다.
+
+    사각형 사이에는 최소 gap, 플레이트 가장자리에는 margin을 띄운다. 높은 사각형부터 놓고,
+    한 플레이트에 더 들어가지 않으면 다음 플레이트를 연다. 플레이트보다 큰 사각형은 배치하지 않는다.
+
+    Returns:
+        (placements, stats)
+        placements: (N, 4) 배열 [x, y, rotated(0/1), plate 번호]. x, y는 (회전 후) 사각형의 최소 모서리.
+                    배치하지 못한 행은 plate = -1.
+        stats: {'plates', 'utilization' (플레이트 별 면적 비율 리스트), 'mean_utilization', 'unplaced'}
+    """
+    sizes = np.asarray(sizes, dtype=np.float64).reshape(-1, 2)
+    n = sizes.shape[0]
+    plate_w = float(plate[0]) - 2.0 * margin + gap
+    plate_h = float(plate[1]) - 2.0 * margin + gap
+    placements = np.zeros((n, 4))
+    placements[:, 3] = -1
+
+    # 각 사각형에 gap을 더해서 배치하면 이웃 사이 간격이 gap이 된다
+    padded = sizes + gap
+    order = np.lexsort((-padded.max(axis=1), -padded.min(axis=1)))
+
+    plates = []                 # 플레이트 별 skyline
+    used_area = []
+    unplaced = []
+    for k in order.tolist():
+        w0, h0 = padded[k]
+        options = [(w0, h0, 0)]
+        if allow_rotate and abs(w0 - h0) > 1e-9:
+            options.append((h0, w0, 1))
+        if not any(w <= plate_w + 1e-9 and h <= plate_h + 1e-9 for w, h, _ in options):
+            unplaced.append(k)
+            continue
+
+        placed = False
+        for p, skyline in enumerate(plates + [None]):
+            if skyline is None:
+                skyline = [[0.0, 0.0, plate_w]]
+                plates.append(skyline)
+                used_area.append(0.0)
+            best = None
+            for w, h, rot in options:
+                for i in range(len(skyline)):
+                    y = _fit(skyline, i, w, plate_w)
+                    if y is None or y + h > plate_h + 1e-9:
+                        continue
+                    score = (y + h, skyline[i][0])
+                    if best is None or score < best[0]:
+                        best = (score, i, w, h, y, rot)
+            if best is None:
+                continue
+            _, i, w, h, y, rot = best
+            placements[k] = (skyline[i][0] + margin, y + margin, rot, p)
+            plates[p] = _place(skyline, i, w, h, y)
+            used_area[p] += sizes[k, 0] * sizes[k, 1]
+            placed = True
+            break
+        if not placed:
+            unplaced.append(k)
+
+    plate_area = float(plate[0]) * float(plate[1])
+    utilization = [float(a / plate_area) for a in used_area]
+    stats = {
+        'plates': len(plates),
+        'utilization': utilization,
+        'mean_utilization': float(np.mean(utilization)) if utilization else 0.0,
+        'unplaced': sorted(unplaced),
+    }
+    return placements, stats
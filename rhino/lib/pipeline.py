@@ -0,0 +1,151 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# Rhino 없이 실행되는 서포트 생성 파이프라인 (AddSupport.main과 같은 순서).
+#   뒤집기 → Z=0.5로 내리기 → 샘플링(heightmap) → 서포트 생성 → offset clearance → 내보내기
+# clearance는 기본이 Z 평행이동(heightfield), params['voxel']을 주면 voxel 엔진의 3D offset (lib.voxel).
+
+import os
+import time
+
+import numpy as np
+
+from lib.heightmap import (grid_axes, rasterize_underside, support_top,
+                           apply_clearance, heightfield_to_mesh)
+from lib.overhang import support_footprint
+from lib.stl import read_stl, StlWriter
+from lib.trace import stage
+from lib.trimesh import TriangleMesh
+from lib.voxel import voxel_support
+
+
+DEFAULT_PARAMS = {
+    'drop_z': 0.5,          # 뒤집은 뒤 product 최저점 높이
+    'scale_xy': 1.05,       # 서포트 베이스 XY 스케일 (ScaleXY)
+    'base_z': 0.0,          # 서포트 바닥 높이
+    'top_z': 5.0,           # 서포트 베이스 박스 높이
+    'cell': 0.1,            # heightmap 격자 간격 (mm)
+    'lift': 0.2,            # 서포트 윗면을 올리는 양 (패치 곡면 +Z 0.2와 동일)
+    'sigma_k': 2.0,         # 윗면 샘플 필터 (2 sigma)
+    'use_bvh': False,       # True 이면 캐시된 BVH로 Ray 교차 (heightmap 격자에서는 binning이 더 빠름)
+    'footprint': False,     # True 이면 overhang 영역 아래로만 서포트를 세운다 (lib.overhang)
+    'overhang_angle': 45.0, # 법선과 -Z 사이 각이 이보다 작은 면이 overhang (도)
+    'footprint_margin': 0.5,  # overhang footprint 팽창 폭 (mm)
+    'voxel': None,          # voxel 크기 (mm). 주면 Z 평행이동 대신 3D clearance (lib.voxel)
+}
+
+
+def flip_and_drop(vertices, drop_z=0.5):
+    """main()과 같이 X축 기준 180도 회전 후 최저점이 drop_z에 오도록 이동한다."""
+    v = np.array(vertices, dtype=np.float64)
+    v[:, 1] *= -1.0
+    v[:, 2] *= -1.0
+    v[:, 2] += drop_z - v[:, 2].min()
+    return v
+
+
+def scaled_bounds(meshes, factor=1.05):
+    """ScaleXY와 같은 규칙으로 XY bbox를 중심 기준 factor배 한 (min_x, min_y, max_x, max_y)."""
+    pts = np.concatenate([np.asarray(v, dtype=np.float64) for v, _ in meshes])
+    lo = pts[:, :2].min(axis=0)
+    hi = pts[:, :2].max(axis=0)
+    center = (lo + hi) * 0.5
+    half = (hi - lo) * 0.5 * factor
+    return center[0] - half[0], center[1] - half[1], center[0] + half[0], center[1] + half[1]
+
+
+def support_field(meshes, params=None):
+    """
+    offset과 무관한 서포트 heightfield (xs, ys, heights, underside)를 만든다. 실패하면 None.
+
+    Args:
+        meshes: (vertices, faces) 튜플 리스트 (이미 뒤집고 내린 product)
+    """
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    min_x, min_y, max_x, max_y = scaled_bounds(meshes, p['scale_xy'])
+    with stage('sampling') as st:
+        xs, ys = grid_axes(min_x, max_x, min_y, max_y, p['cell'])
+        underside = rasterize_underside(meshes, xs, ys, p['base_z'], p['use_bvh'])
+        st.set(rays=int(underside.size))
+    with stage('patch_fit'):
+        heights = support_top(underside, lift=p['lift'], top_z=p['top_z'],
+                              sigma_k=p['sigma_k'], base_z=p['base_z'])
+    if heights is None:
+        return None
+    if p['footprint']:
+        with stage('footprint') as st:
+            mask, regions = support_footprint(meshes, xs, ys, p['overhang_angle'], p['footprint_margin'])
+            heights = np.where(mask, heights, np.nan)
+            st.set(regions=len(regions), cells=int(np.count_nonzero(mask)))
+    return xs, ys, heights, underside
+
+
+def support_mesh(field, offset, base_z=0.0, meshes=None, voxel=None):
+    """
+    heightfield에 offset clearance를 적용해 닫힌 메쉬 (vertices, faces)로 만든다.
+    voxel과 meshes(product)를 주면 Z 평행이동 대신 product를 3D로 offset만큼 팽창해서 뺀다.
+    """
+    xs, ys, heights, underside = field
+    if voxel is not None and meshes is not None:
+        return voxel_support(xs, ys, heights, meshes, offset, base_z=base_z, voxel=voxel)
+    if abs(offset) > 1e-6:
+        heights = apply_clearance(heights, underside, offset, base_z=base_z)
+    return heightfield_to_mesh(xs, ys, heights, base_z=base_z)
+
+
+def build_supports(vertices, faces, offsets, params=None):
+    """
+    product 하나에 대해 offset 별 서포트를 만든다 (필드는 한 번만 계산).
+
+    Returns:
+        (product_vertices, faces, [(support_vertices, support_faces) 또는 None, ...])
+    """
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    # float32/int32 복사본 하나를 제자리에서 뒤집고 내린다 (flip_and_drop과 같은 결과)
+    product = TriangleMesh(vertices, faces, copy=True)
+    product.scale(1.0, -1.0, -1.0)
+    product.translate(0.0, 0.0, p['drop_z'] - float(product.vertices[:, 2].min()))
+    vertices, faces = product
+    field = support_field([product], p)
+    supports = []
+    for offset in offsets:
+        if field is None:
+            supports.append(None)
+            continue
+        with stage('mesh_boolean') as st:
+            sv, sf = support_mesh(field, offset, p['base_z'], [product], p['voxel'])
+            st.set(offset=offset)
+            st.geometry([(sv, sf)])
+        supports.append((sv, sf) if sf.shape[0] else None)
+    return vertices, faces, supports
+
+
+def process_file(path, out_dir, offsets, params=None):
+    """
+    메쉬 파일 하나를 처리해서 offset 별로 product + 서포트를 한 STL로 내보낸다.
+
+    예외는 잡아서 결과 dict의 'error'에 담는다 (배치 전체가 멈추지 않도록).
+    """
+    start = time.time()
+    name = os.path.splitext(os.path.basename(path))[0]
+    result = {'input': path, 'outputs': [], 'faces': 0, 'error': None}
+    try:
+        # 같은 좌표 정점을 합쳐야 overhang 영역(면 인접)이 triangle soup으로 쪼개지지 않는다
+        vertices, faces = read_stl(path, weld=True)
+        if faces.shape[0] == 0:
+            raise ValueError('no triangles in file')
+        result['faces'] = int(faces.shape[0])
+        vertices, faces, supports = build_supports(vertices, faces, offsets, params)
+        for offset, support in zip(offsets, supports):
+            if support is None:
+                continue
+            out_path = os.path.join(out_dir, '{}_{:.2f}.stl'.format(name, offset))
+            with StlWriter(out_path) as writer:
+                writer.add(vertices, faces)
+                writer.add(*support)
+            result['outputs'].append(out_path)
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+    result['seconds'] = time.time() - start
+    return result
@@ -0,0 +1,276 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# RhinoCommon 없이 NumPy 배열만으로 수직(+Z) Ray 교차를 일괄 계산하는 모듈.
+# vertices: (V, 3) float 배열, faces: (F, 3) int 배열 (삼각형 인덱스)
+
+import numpy as np
+
+from lib.bvh import get_bvh
+
+
+# 한 번에 처리할 삼각형 수 (삼각형 x 점 후보 쌍 배열의 메모리 상한 조절용)
+TRIANGLE_CHUNK = 65536
+DET_EPS = 1e-12
+
+
+def _bin_points(px, py):
+    """XY 점들을 균일 격자 bin에 넣고 bin 별 점 범위를 반환한다."""
+    n = px.shape[0]
+    x0, x1 = float(px.min()), float(px.max())
+    y0, y1 = float(py.min()), float(py.max())
+    wx = x1 - x0
+    wy = y1 - y0
+
+    # 점 하나당 bin 하나 정도가 되도록 bin 크기 결정
+    if wx > 0.0 and wy > 0.0:
+        cell = np.sqrt(wx * wy / float(n))
+    else:
+        cell = max(wx, wy) / float(n)
+    if cell <= 0.0:
+        cell = 1.0
+
+    nbx = int(wx / cell) + 1
+    nby = int(wy / cell) + 1
+    bx = np.clip(((px - x0) / cell).astype(np.int64), 0, nbx - 1)
+    by = np.clip(((py - y0) / cell).astype(np.int64), 0, nby - 1)
+    key = by * nbx + bx
+
+    order = np.argsort(key, kind='stable')
+    sorted_key = key[order]
+    bins = np.arange(nbx * nby, dtype=np.int64)
+    start = np.searchsorted(sorted_key, bins, side='left')
+    end = np.searchsorted(sorted_key, bins, side='right')
+    return (x0, y0, cell, nbx, nby), order, start, end
+
+
+def _expand(counts):
+    """counts[i]개씩 반복되는 (소유 인덱스, 로컬 인덱스) 쌍을 만든다."""
+    owner = np.repeat(np.arange(counts.shape[0], dtype=np.int64), counts)
+    offsets = np.cumsum(counts) - counts
+    local = np.arange(owner.shape[0], dtype=np.int64) - offsets[owner]
+    return owner, local
+
+
+def _vertical_candidates(vertices, faces, px, py, z0):
+    """
+    삼각형 청크 단위로 (점 인덱스, 삼각형 인덱스, hit Z) 를 생성한다.
+
+    XY bbox가 겹치는 (삼각형, 점) 쌍만 만든 뒤, +Z 방향으로 특수화한
+    Möller–Trumbore 테스트를 한 번에 적용한다. 양면 모두 hit으로 본다
+    (Intersection.MeshRay와 동일).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    if faces.shape[0] == 0 or px.shape[0] == 0:
+        return
+
+    (x0, y0, cell, nbx, nby), order, start, end = _bin_points(px, py)
+
+    for c0 in range(0, faces.shape[0], TRIANGLE_CHUNK):
+        tri = faces[c0:c0 + TRIANGLE_CHUNK]
+        v0 = vertices[tri[:, 0]]
+        v1 = vertices[tri[:, 1]]
+        v2 = vertices[tri[:, 2]]
+
+        tmin_x = np.minimum(np.minimum(v0[:, 0], v1[:, 0]), v2[:, 0])
+        tmax_x = np.maximum(np.maximum(v0[:, 0], v1[:, 0]), v2[:, 0])
+        tmin_y = np.minimum(np.minimum(v0[:, 1], v1[:, 1]), v2[:, 1])
+        tmax_y = np.maximum(np.maximum(v0[:, 1], v1[:, 1]), v2[:, 1])
+
+        # 삼각형 XY bbox가 덮는 bin 범위 (점 영역 밖이면 제외)
+        bx0 = np.floor((tmin_x - x0) / cell).astype(np.int64)
+        bx1 = np.floor((tmax_x - x0) / cell).astype(np.int64)
+        by0 = np.floor((tmin_y - y0) / cell).astype(np.int64)
+        by1 = np.floor((tmax_y - y0) / cell).astype(np.int64)
+        inside = (bx1 >= 0) & (by1 >= 0) & (bx0 < nbx) & (by0 < nby)
+        if not np.any(inside):
+            continue
+        tri_idx = np.nonzero(inside)[0]
+        bx0 = np.clip(bx0[tri_idx], 0, nbx - 1)
+        bx1 = np.clip(bx1[tri_idx], 0, nbx - 1)
+        by0 = np.clip(by0[tri_idx], 0, nby - 1)
+        by1 = np.clip(by1[tri_idx], 0, nby - 1)
+
+        # (삼각형, bin) 쌍 전개
+        wx = bx1 - bx0 + 1
+        nb = wx * (by1 - by0 + 1)
+        owner, local = _expand(nb)
+        bins = (by0[owner] + local // wx[owner]) * nbx + bx0[owner] + local % wx[owner]
+        pair_tri = tri_idx[owner]
+
+        # (삼각형, 점) 쌍 전개
+        counts = end[bins] - start[bins]
+        owner, local = _expand(counts)
+        pt = order[start[bins][owner] + local]
+        ti = pair_tri[owner]
+        if pt.shape[0] == 0:
+            continue
+
+        a = v0[ti]
+        e1 = v1[ti] - a
+        e2 = v2[ti] - a
+        # d = (0, 0, 1) 이므로 p = d x e2 = (-e2y, e2x, 0)
+        det = e1[:, 1] * e2[:, 0] - e1[:, 0] * e2[:, 1]
+        ok = np.abs(det) > DET_EPS
+        inv = np.zeros_like(det)
+        inv[ok] = 1.0 / det[ok]
+
+        sx = px[pt] - a[:, 0]
+        sy = py[pt] - a[:, 1]
+        sz = z0 - a[:, 2]
+        u = (sy * e2[:, 0] - sx * e2[:, 1]) * inv
+        # q = s x e1
+        qx = sy * e1[:, 2] - sz * e1[:, 1]
+        qy = sz * e1[:, 0] - sx * e1[:, 2]
+        qz = sx * e1[:, 1] - sy * e1[:, 0]
+        v = qz * inv
+        t = (e2[:, 0] * qx + e2[:, 1] * qy + e2[:, 2] * qz) * inv
+
+        hit = ok & (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0) & (t >= 0.0)
+        if np.any(hit):
+            yield pt[hit], ti[hit] + c0, z0 + t[hit]
+
+
+def vertical_ray_hits(vertices, faces, px, py, z0=0.0, return_index=False):
+    """
+    (px, py) 각 점에서 z0 높이의 +Z 방향 Ray를 쏘아 가장 가까운 hit의 Z를 반환한다.
+
+    Returns:
+        (N,) float 배열. hit이 없으면 nan.
+        return_index=True 이면 (z, 삼각형 인덱스) 튜플을 반환한다 (miss는 -1).
+    """
+    px = np.asarray(px, dtype=np.float64).ravel()
+    py = np.asarray(py, dtype=np.float64).ravel()
+    best = np.full(px.shape[0], np.inf)
+    best_tri = np.full(px.shape[0], -1, dtype=np.int64)
+
+    for pt, ti, z in _vertical_candidates(vertices, faces, px, py, float(z0)):
+        # 점 별 최소 Z만 남긴 뒤 기존 결과와 비교
+        order = np.lexsort((z, pt))
+        pt, ti, z = pt[order], ti[order], z[order]
+        first = np.ones(pt.shape[0], dtype=bool)
+        first[1:] = pt[1:] != pt[:-1]
+        pt, ti, z = pt[first], ti[first], z[first]
+        better = z < best[pt]
+        best[pt[better]] = z[better]
+        best_tri[pt[better]] = ti[better]
+
+    best[np.isinf(best)] = np.nan
+    if return_index:
+        return best, best_tri
+    return best
+
+
+def grid_coordinates(min_x, max_x, min_y, max_y, num_x, num_y):
+    """Sample_points와 같은 규칙(양 끝 포함, iy 바깥 / ix 안쪽 순서)으로 격자 XY를 만든다."""
+    xs = np.linspace(min_x, max_x, num_x) if num_x > 1 else np.array([float(min_x)])
+    ys = np.linspace(min_y, max_y, num_y) if num_y > 1 else np.array([float(min_y)])
+    gx, gy = np.meshgrid(xs, ys)
+    return gx.ravel(), gy.ravel()
+
+
+def first_hits(meshes, px, py, z0=0.0, use_bvh=False):
+    """
+    여러 메쉬 (vertices, faces) 에 대해 점 별 가장 가까운 hit Z를 반환한다.
+
+    use_bvh=True 이면 메쉬 별로 캐시된 BVH(lib.bvh)를 사용한다. 격자 수직 Ray에서는 기본 binning이
+    보통 더 빠르다: bridge3-256 (면 ~197k) 기준 BVH 빌드 ~0.2초, 빌드된 뒤에도 BVH가 이기는 것은
+    Ray 수가 면 수의 1% 이하일 때뿐이다 (15x30: 0.02 vs 0.06초, 100x200: 0.57 vs 0.13초).
+    같은 형상에 작은 격자를 여러 번 쏠 때만 켠다.
+    """
+    px = np.asarray(px, dtype=np.float64).ravel()
+    py = np.asarray(py, dtype=np.float64).ravel()
+    best = np.full(px.shape[0], np.nan)
+    for vertices, faces in meshes:
+        if use_bvh:
+            origins = np.column_stack((px, py, np.full(px.shape[0], float(z0))))
+            t, _ = get_bvh(vertices, faces).intersect_rays(origins, (0.0, 0.0, 1.0))
+            z = np.where(np.isfinite(t), z0 + t, np.nan)
+        else:
+            z = vertical_ray_hits(vertices, faces, px, py, z0)
+        best = np.fmin(best, z)
+    return best
+
+
+def sample_ray_grid(meshes, min_x, max_x, min_y, max_y, num_x=15, num_y=30, z0=0.0, use_bvh=False):
+    """
+    Sample_points의 NumPy 버전. 격자 전체의 수직 Ray를 한 번에 교차시킨다.
+
+    Returns:
+        (N, 3) hit 포인트 배열. Sample_points와 동일한 순서로 hit한 점만 포함.
+    """
+    px, py = grid_coordinates(min_x, max_x, min_y, max_y, num_x, num_y)
+    z = first_hits(meshes, px, py, z0, use_bvh)
+    hit = ~np.isnan(z)
+    return np.column_stack((px[hit], py[hit], z[hit]))
+
+
+def adaptive_samples(meshes, min_x, max_x, min_y, max_y, start_x=8, start_y=15, max_depth=2,
+                     tol=0.2, max_rays=None, z0=0.0, use_bvh=False):
+    """
+    거친 격자에서 시작해 hit 높이 차이가 tol보다 큰 칸만 4분할하며 샘플링하는 quadtree 샘플러.
+
+    한 칸의 네 모서리 중 일부만 hit한 칸(크라운 경계)도 분할한다. 모든 노드는 가장 세밀한
+    격자(간격 = 거친 간격 / 2**max_depth) 위에 있으므로 이웃 칸이 공유하는 노드는 한 번만 쏜다.
+    max_rays를 주면 높이 차이가 큰 칸부터 예산 안에서만 분할한다.
+
+    Returns:
+        (points (N,3), ray_count). points는 Sample_points와 같이 Y 바깥 / X 안쪽 순서.
+    """
+    scale = 2 ** int(max_depth)
+    nfx = (max(2, int(start_x)) - 1) * scale + 1
+    nfy = (max(2, int(start_y)) - 1) * scale + 1
+    fx = np.linspace(min_x, max_x, nfx)
+    fy = np.linspace(min_y, max_y, nfy)
+    z = np.full((nfy, nfx), np.nan)
+    done = np.zeros((nfy, nfx), dtype=bool)
+    rays = 0
+
+    def shoot(ii, jj):
+        # 아직 쏘지 않은 노드만 한 번에 교차
+        nonlocal rays
+        key = np.unique(ii * nfx + jj)
+        key = key[~done.ravel()[key]]
+        if key.shape[0] == 0:
+            return
+        ii, jj = key // nfx, key % nfx
+        z[ii, jj] = first_hits(meshes, fx[jj], fy[ii], z0, use_bvh)
+        done[ii, jj] = True
+        rays += key.shape[0]
+
+    ci, cj = np.meshgrid(np.arange(0, nfy - 1, scale), np.arange(0, nfx - 1, scale), indexing='ij')
+    ci, cj = ci.ravel(), cj.ravel()
+    shoot(np.repeat(np.arange(0, nfy, scale), (nfx - 1) // scale + 1),
+          np.tile(np.arange(0, nfx, scale), (nfy - 1) // scale + 1))
+
+    size = scale
+    while size > 1 and ci.shape[0]:
+        corners = np.stack((z[ci, cj], z[ci, cj + size], z[ci + size, cj], z[ci + size, cj + size]))
+        hit = ~np.isnan(corners)
+        nhit = hit.sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            spread = np.where(nhit > 0, np.nanmax(np.where(hit, corners, -np.inf), axis=0) -
+                              np.nanmin(np.where(hit, corners, np.inf), axis=0), 0.0)
+        mixed = (nhit > 0) & (nhit < 4)
+        split = np.nonzero(mixed | (spread > tol))[0]
+
+        if max_rays is not None:
+            # 경계 칸을 먼저, 그다음 높이 차이가 큰 순서. 칸당 새 노드는 최대 5개
+            priority = np.where(mixed[split], np.inf, spread[split])
+            split = split[np.argsort(-priority, kind='stable')]
+            split = split[:max(0, (int(max_rays) - rays) // 5)]
+        if split.shape[0] == 0:
+            break
+
+        half = size // 2
+        si, sj = ci[split], cj[split]
+        shoot(np.concatenate((si, si + half, si + half, si + half, si + size)),
+              np.concatenate((sj + half, sj, sj + half, sj + size, sj + half)))
+        ci = np.concatenate((si, si, si + half, si + half))
+        cj = np.concatenate((sj, sj + half, sj, sj + half))
+        size = half
+
+    ii, jj = np.nonzero(done & ~np.isnan(z))
+    return np.column_stack((fx[jj], fy[ii], z[ii, jj])), rays
@@ -1,67 +1,193 @@
 #! python 3
 # env: /Users/joonholee/Joon/1-Project/3d_print/rhino/lib
 
-def reload_and_import_modules(prefix='ortho', modules_to_reload={}):
+# 스크립트를 다시 실행할 때 바뀐 모듈만 다시 불러오는 리로더.
+#   1. 모듈 소스의 (mtime, 크기)를 기록해 두고, 달라졌으면 sha1로 실제 변경 여부를 확인
+#   2. 소스의 import 문(ast)으로 모듈 간 의존 관계를 구해서
+#   3. 바뀐 모듈과 그 모듈을 import하는 모듈만 의존 순서(의존 대상 먼저)로 reload
+# 강제 gc.collect()는 하지 않는다. 기록은 _state에 두며, 이 모듈 자체가 reload되어도 유지된다.
+
+import ast
+import hashlib
+import importlib
+import os
+import sys
+import time
+
+# 모듈 이름 → {'mtime', 'size', 'hash', 'deps', 'seconds'}
+_state = globals().get('_state', {})
+
+
+def _source_path(module):
+    path = getattr(module, '__file__', None)
+    if not path or not path.endswith('.py') or not os.path.exists(path):
+        return None
+    return path
+
+
+def _parse_deps(source):
     """
-    특정 접두사로 시작하는 모든 모듈과 특정 모듈들을 리로드하고 자동으로 임포트합니다.
-    
+    소스의 import 문이 가리키는 모듈 이름들 (함수 안의 import 포함, from a import b는 a와 a.b 둘 다).
+    검사 대상과 관계없이 모두 기록하고 쓸 때 대상과 교집합을 구한다 (대상이 나중에 늘어나도 맞도록).
+    """
+    deps = set()
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return deps
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                deps.add(alias.name)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            deps.add(node.module)
+            for alias in node.names:
+                deps.add(node.module + '.' + alias.name)
+    return deps
+
+
+def _scan(name, path):
+    """
+    모듈 소스 상태를 확인해서 바뀌었으면 True를 반환하고 _state를 갱신한다.
+    (mtime, 크기)가 같으면 읽지 않고, 다르면 내용 sha1까지 비교한다 (저장만 다시 한 경우 등).
+    """
+    st = os.stat(path)
+    entry = _state.get(name)
+    if entry is not None and entry['mtime'] == st.st_mtime_ns and entry['size'] == st.st_size:
+        return False
+    with open(path, 'rb') as fp:
+        source = fp.read()
+    digest = hashlib.sha1(source).hexdigest()
+    changed = entry is None or entry['hash'] != digest
+    if entry is None:
+        entry = _state[name] = {'seconds': 0.0}
+    entry.update(mtime=st.st_mtime_ns, size=st.st_size, hash=digest)
+    if changed or 'deps' not in entry:
+        entry['deps'] = _parse_deps(source)
+    return changed
+
+
+def _dependency_order(names):
+    """names를 의존 대상이 먼저 오도록 정렬한다 (순환이 있으면 남은 것은 원래 순서대로)."""
+    names = list(names)
+    pending = set(names)
+    order = []
+    while pending:
+        ready = [n for n in names if n in pending and not (_state.get(n, {}).get('deps', set()) & pending)]
+        if not ready:
+            ready = [n for n in names if n in pending]
+        for n in ready:
+            order.append(n)
+            pending.discard(n)
+    return order
+
+
+def reload_and_import_modules(prefix='ortho', modules_to_reload={}, force=False):
+    """
+    특정 모듈들 중 소스가 바뀐 모듈과 그 모듈에 의존하는 모듈만 리로드하고 자동으로 임포트합니다.
+
     Args:
-        prefix (str): 리로드할 모듈의 접두사
+        prefix (str): 변경 여부를 함께 검사할 모듈의 접두사 (예전처럼 무조건 지우지는 않는다)
         modules_to_reload (dict): 리로드할 모듈 정보 (키: 모듈 경로, 값: 임포트 방식)
                                  임포트 방식은 'all'(* 임포트) 또는 특정 객체 리스트가 될 수 있습니다.
-    
+                                 같은 패키지(예: 'lib.')의 이미 로드된 모듈도 의존 관계 계산에 포함된다.
+        force (bool): True이면 변경 여부와 관계없이 모두 리로드
+
     Returns:
         dict: 임포트된 모듈과 객체들
     """
-    import sys
-    import importlib
-    import gc
-    
-    # 결과를 저장할 딕셔너리
+    start = time.perf_counter()
     imported_objects = {}
-    
-    # 1. 접두사로 시작하는 모든 모듈 제거
-    for key in list(sys.modules.keys()):
-        if key.startswith(prefix):
-            del sys.modules[key]
-    
-    # 2. 특정 모듈 리로드 및 임포트
-    for module_path, import_type in modules_to_reload.items():
+
+    # 1. 검사 대상: 요청 모듈 + 같은 패키지/접두사의 로드된 모듈 (이 모듈 자신은 제외)
+    roots = {path.split('.')[0] + '.' for path in modules_to_reload}
+    candidates = set(modules_to_reload)
+    for key in list(sys.modules):
+        if key.startswith(prefix) or any(key.startswith(root) for root in roots):
+            candidates.add(key)
+    candidates.discard(__name__)
+
+    # 2. 변경 검사 (로드되지 않은 모듈은 새로 import)
+    changed = set()
+    missing = []
+    for name in sorted(candidates):
+        module = sys.modules.get(name)
+        if module is None:
+            missing.append(name)
+            continue
+        path = _source_path(module)
+        if path is None:
+            continue
+        if _scan(name, path) or force:
+            changed.add(name)
+
+    # 3. 바뀐 모듈을 import하는 모듈도 다시 불러와야 새 객체를 참조한다
+    dirty = set(changed)
+    grew = True
+    while grew:
+        grew = False
+        for name in candidates - dirty:
+            if _state.get(name, {}).get('deps', set()) & dirty:
+                dirty.add(name)
+                grew = True
+
+    # 4. 의존 순서대로 reload / import
+    reloaded = []
+    took = {}
+    for name in _dependency_order(sorted(dirty)) + missing:
+        t0 = time.perf_counter()
         try:
-            # 모듈 리로드
-            module = importlib.import_module(module_path)
-            reloaded_module = importlib.reload(module)
-            
-            # 모듈 자체를 결과에 저장
-            imported_objects[module_path] = reloaded_module
-            
-            # 글로벌 네임스페이스에 모듈 추가
-            calling_frame = sys._getframe(1)
-            
-            # import_type에 따라 다르게 처리
-            if import_type == 'all':
-                # * 임포트: 모든 공개 객체 임포트
-                for attr_name in dir(reloaded_module):
-                    # 언더스코어로 시작하지 않는 속성만 임포트
-                    if not attr_name.startswith('_'):
-                        attr_value = getattr(reloaded_module, attr_name)
-                        calling_frame.f_globals[attr_name] = attr_value
-                        imported_objects[attr_name] = attr_value
-            elif isinstance(import_type, list):
-                # 특정 객체만 임포트
-                for attr_name in import_type:
-                    if hasattr(reloaded_module, attr_name):
-                        attr_value = getattr(reloaded_module, attr_name)
-                        calling_frame.f_globals[attr_name] = attr_value
-                        imported_objects[attr_name] = attr_value
-            
-            print(f"{module_path} reload and import completed")
-            
+            module = sys.modules.get(name)
+            if module is None:
+                importlib.import_module(name)
+            else:
+                importlib.reload(module)
+            reloaded.append(name)
         except Exception as e:
-            print(f"{module_path} reload and import failed: {e}")
-    
-    # 3. 가비지 컬렉션 실행
-    collected = gc.collect()
-    print(f"Garbage collection: {collected} objects collected")
-    
-    return imported_objects
\ No newline at end of file
+            print(f"{name} reload failed: {e}")
+            continue
+        took[name] = time.perf_counter() - t0
+
+    # 5. 새로 import된 모듈(이 import가 끌어온 같은 패키지/접두사 모듈 포함)의 기준 상태를 기록한다.
+    #    기록이 없으면 다음 실행에서 바뀐 모듈로 보고 다시 reload하게 된다.
+    for key in sorted(sys.modules):
+        if key == __name__ or key in _state:
+            continue
+        if key in candidates or key.startswith(prefix) or any(key.startswith(root) for root in roots):
+            path = _source_path(sys.modules[key])
+            if path is not None:
+                _scan(key, path)
+    for name, seconds in took.items():
+        if name in _state:
+            _state[name]['seconds'] = seconds
+
+    # 6. 호출한 스크립트의 글로벌 네임스페이스에 이름 주입
+    calling_frame = sys._getframe(1)
+    for module_path, import_type in modules_to_reload.items():
+        module = sys.modules.get(module_path)
+        if module is None:
+            print(f"{module_path} import failed")
+            continue
+        imported_objects[module_path] = module
+
+        if import_type == 'all':
+            # * 임포트: 모든 공개 객체 임포트
+            names = [attr_name for attr_name in dir(module) if not attr_name.startswith('_')]
+        elif isinstance(import_type, list):
+            # 특정 객체만 임포트
+            names = [attr_name for attr_name in import_type if hasattr(module, attr_name)]
+        else:
+            names = []
+        for attr_name in names:
+            attr_value = getattr(module, attr_name)
+            calling_frame.f_globals[attr_name] = attr_value
+            imported_objects[attr_name] = attr_value
+
+    # 7. 보고: 건너뛴 모듈의 마지막 reload 시간 합 = 절약한 시간 (추정)
+    skipped = sorted(n for n in candidates if n not in reloaded and n in _state)
+    saved = sum(_state[n]['seconds'] for n in skipped)
+    elapsed = time.perf_counter() - start
+    print("reload: {} reloaded ({}), {} unchanged | {:.3f}s, saved ~{:.3f}s".format(
+        len(reloaded), ', '.join(reloaded) or '-', len(skipped), elapsed, saved))
+
+    return imported_objects
@@ -0,0 +1,242 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 문서를 임시 작업 공간으로 쓰지 않는 scratch 형상 컨텍스트.
+# 복사/변환/임시 보관은 메모리에서 하고, 최종 결과만 commit()에서 한 번에 문서에 추가한다
+# (문서 객체 별 오버헤드와 Undo 기록이 쌓이지 않는다).
+#
+#   scratch = ScratchContext(sc.doc, make_attributes=ObjectAttributesFromSpec)
+#   h = scratch.load(product_id)              # 문서 객체의 형상/속성 복사본
+#   s = scratch.add(support_mesh, layer='print_support', name='support')
+#   scratch.transform([h, s], xform)
+#   ids = scratch.commit()                    # handle → 문서 id (Undo 기록 1개)
+#
+# 문서는 Objects.Add / Objects.Find만 있으면 되므로 Rhino 없이 MemoryDocument로 시험할 수 있다.
+# 형상은 RhinoCommon 형상(Duplicate / Transform / GetBoundingBox) 또는 lib.trimesh.TriangleMesh.
+
+import uuid
+
+import numpy as np
+
+try:
+    from System import Guid
+    EMPTY_ID = Guid.Empty           # RhinoCommon Objects.Add 실패 값
+except ImportError:
+    EMPTY_ID = uuid.UUID(int=0)     # MemoryDocument 실패 값
+
+
+def _duplicate(geometry):
+    if hasattr(geometry, 'Duplicate'):
+        return geometry.Duplicate()
+    return geometry.copy()
+
+
+def _transform(geometry, xform):
+    if hasattr(geometry, 'Transform'):
+        return bool(geometry.Transform(xform))
+    geometry.transform(xform)
+    return True
+
+
+def _bounds(geometry):
+    """(2, 3) [min, max] (유효하지 않으면 NaN)."""
+    if hasattr(geometry, 'GetBoundingBox'):
+        bb = geometry.GetBoundingBox(True)
+        if not bb.IsValid:
+            return np.full((2, 3), np.nan)
+        return np.array(((bb.Min.X, bb.Min.Y, bb.Min.Z), (bb.Max.X, bb.Max.Y, bb.Max.Z)))
+    return geometry.bounds()
+
+
+class _Item:
+    __slots__ = ('geometry', 'spec', 'base', 'temporary')
+
+    def __init__(self, geometry, spec, base, temporary):
+        self.geometry = geometry
+        self.spec = spec
+        self.base = base
+        self.temporary = temporary
+
+
+class ScratchContext:
+    """
+    메모리 내 형상 모음. handle(정수)로 형상을 가리키며 commit() 전에는 문서를 건드리지 않는다.
+
+    Args:
+        doc: 결과를 추가할 문서 (Objects.Add(geometry, attributes) / Objects.Find(id))
+        make_attributes: (spec dict, base 속성 또는 None) → 문서 속성 객체. 없으면 spec dict를 그대로 넘긴다.
+                         spec 키: 'layer', 'name', 'user_text' (키 → 문자열)
+        prepare_geometry: 추가 직전 형상 변환 (예: TriangleMesh → Rhino Mesh). 없으면 그대로.
+        undo_label: commit을 묶을 Undo 기록 이름 (문서에 BeginUndoRecord가 있을 때)
+    """
+
+    def __init__(self, doc, make_attributes=None, prepare_geometry=None, undo_label='scratch commit'):
+        self.doc = doc
+        self.make_attributes = make_attributes
+        self.prepare_geometry = prepare_geometry
+        self.undo_label = undo_label
+        self._items = {}
+        self._next = 0
+        self.committed = {}         # handle → 문서 id
+        self.failed = []            # commit에서 문서가 거부한 handle (Objects.Add가 Guid.Empty 반환)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, handle):
+        return handle in self._items
+
+    def add(self, geometry, layer=None, name=None, user_text=None, base=None, temporary=False):
+        """형상을 보관하고 handle을 반환한다. temporary=True이면 commit되지 않는 임시 형상."""
+        spec = {'user_text': dict(user_text or {})}
+        if layer is not None:
+            spec['layer'] = layer
+        if name is not None:
+            spec['name'] = name
+        handle = self._next
+        self._next += 1
+        self._items[handle] = _Item(geometry, spec, base, temporary)
+        return handle
+
+    def load(self, object_id):
+        """문서 객체의 형상/속성 복사본을 보관한다 (CopyObjects 대체). 없으면 None."""
+        obj = self.doc.Objects.Find(object_id)
+        if obj is None:
+            return None
+        base = obj.Attributes.Duplicate() if hasattr(obj.Attributes, 'Duplicate') else obj.Attributes
+        return self.add(_duplicate(obj.Geometry), base=base)
+
+    def copy(self, handle, temporary=None):
+        item = self._items[handle]
+        new = self.add(_duplicate(item.geometry), base=item.base,
+                       temporary=item.temporary if temporary is None else temporary)
+        self._items[new].spec = {k: (dict(v) if isinstance(v, dict) else v) for k, v in item.spec.items()}
+        return new
+
+    def geometry(self, handle):
+        return self._items[handle].geometry
+
+    def discard(self, handles):
+        for handle in handles:
+            self._items.pop(handle, None)
+
+    def transform(self, handles, xform):
+        """형상들을 제자리에서 변환한다 (Rhino Transform 또는 TriangleMesh용 4x4 행렬)."""
+        ok = True
+        for handle in handles:
+            ok = _transform(self._items[handle].geometry, xform) and ok
+        return ok
+
+    def set(self, handles, layer=None, name=None):
+        for handle in handles:
+            spec = self._items[handle].spec
+            if layer is not None:
+                spec['layer'] = layer
+            if name is not None:
+                spec['name'] = name
+
+    def set_user_text(self, handles, key, text):
+        for handle in handles:
+            self._items[handle].spec['user_text'][key] = text
+
+    def bounding_boxes(self, handles):
+        """(N, 2, 3) [min, max] (lib.globals.BoundingBoxes와 같은 형식)."""
+        if not handles:
+            return np.zeros((0, 2, 3))
+        return np.stack([_bounds(self._items[h].geometry) for h in handles])
+
+    def bbox_stats(self, handles):
+        """lib.globals.bbox_stats와 같은 {'min', 'max', 'size', 'centroid'} (유효한 형상이 없으면 None)."""
+        boxes = self.bounding_boxes(list(handles))
+        valid = ~np.isnan(boxes[:, 0, 0]) if boxes.shape[0] else np.zeros(0, dtype=bool)
+        if not np.any(valid):
+            return None
+        lo = boxes[valid, 0].min(axis=0)
+        hi = boxes[valid, 1].max(axis=0)
+        return {'min': lo, 'max': hi, 'size': hi - lo, 'centroid': (lo + hi) * 0.5}
+
+    def commit(self, handles=None):
+        """
+        임시가 아닌 형상(또는 handles)을 문서에 한 번에 추가하고 보관에서 뺀다.
+        Undo 기록은 하나로 묶는다. 추가된 handle → 문서 id dict를 반환한다.
+        문서가 거부한 형상(유효하지 않은 메쉬 등)은 경고를 출력하고 self.failed에 남긴다.
+        """
+        handles = [h for h in (self._items if handles is None else handles)
+                   if h in self._items and not self._items[h].temporary]
+        record = self.doc.BeginUndoRecord(self.undo_label) if hasattr(self.doc, 'BeginUndoRecord') else None
+        added = {}
+        try:
+            for handle in handles:
+                item = self._items.pop(handle)
+                geometry = item.geometry
+                if self.prepare_geometry is not None:
+                    geometry = self.prepare_geometry(geometry)
+                attributes = item.spec if self.make_attributes is None else self.make_attributes(item.spec, item.base)
+                object_id = self.doc.Objects.Add(geometry, attributes)
+                if object_id is None or object_id == EMPTY_ID:
+                    self.failed.append(handle)
+                    print("[scratch] Warning: document rejected {} (layer={}, name={})".format(
+                        type(geometry).__name__, item.spec.get('layer'), item.spec.get('name')))
+                    continue
+                added[handle] = object_id
+        finally:
+            if record is not None:
+                self.doc.EndUndoRecord(record)
+        self.committed.update(added)
+        return added
+
+    def ids(self, handles):
+        """commit된 handle들의 문서 id (commit되지 않은 handle은 빠진다)."""
+        return [self.committed[h] for h in handles if h in self.committed]
+
+
+class _MemoryObject:
+    __slots__ = ('Id', 'Geometry', 'Attributes')
+
+    def __init__(self, object_id, geometry, attributes):
+        self.Id = object_id
+        self.Geometry = geometry
+        self.Attributes = attributes
+
+
+class _MemoryObjects:
+    def __init__(self):
+        self._objects = {}
+
+    def Add(self, geometry, attributes=None):
+        if geometry is None:
+            return EMPTY_ID
+        object_id = uuid.uuid4()
+        self._objects[object_id] = _MemoryObject(object_id, geometry, attributes)
+        return object_id
+
+    def Find(self, object_id):
+        return self._objects.get(object_id)
+
+    def Delete(self, object_id, quiet=True):
+        return self._objects.pop(object_id, None) is not None
+
+    def __iter__(self):
+        return iter(self._objects.values())
+
+    def __len__(self):
+        return len(self._objects)
+
+
+class MemoryDocument:
+    """Rhino 문서 대역 (Objects.Add / Find / Delete, Undo 기록 수). ScratchContext 시험용."""
+
+    def __init__(self):
+        self.Objects = _MemoryObjects()
+        self.undo_records = []
+        self._open = None
+
+    def BeginUndoRecord(self, description):
+        self._open = len(self.undo_records) + 1
+        self.undo_records.append(description)
+        return self._open
+
+    def EndUndoRecord(self, serial):
+        self._open = None
+        return True
@@ -0,0 +1,127 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+
+# 파라미터 입력이 선언된 단계(stage)들의 의존 그래프. 결과를 메모이즈해서
+# 파라미터가 바뀌면 그 파라미터를 읽는 단계와 그 아래 단계만 다시 계산한다.
+#
+#   graph = StageGraph({'lift': 0.2, 'offset': 0.1})
+#   graph.add('sampling', sample_fn, params=['sampler'])
+#   graph.add('patch_fit', fit_fn, deps=['sampling'], params=['lift'])
+#   graph.add('clearance', clear_fn, deps=['patch_fit'], params=['offset'], fallback=no_clearance)
+#   graph.get('clearance')          # 처음에는 전부 계산
+#   graph.set(offset=0.16)
+#   graph.get('clearance')          # clearance만 다시 계산
+#   graph.enable('clearance', False)  # 실행 중 단계 끄기 (fallback 사용)
+
+from lib.trace import stage as trace_stage, tracing
+
+
+class _Stage:
+    __slots__ = ('name', 'fn', 'deps', 'params', 'enabled', 'fallback', 'describe')
+
+    def __init__(self, name, fn, deps, params, enabled, fallback, describe):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.params = tuple(params)
+        self.enabled = enabled
+        self.fallback = fallback
+        self.describe = describe
+
+
+class StageGraph:
+    """
+    메모이즈되는 단계 그래프.
+
+    단계 함수는 fn(*의존 단계 결과, **선언한 파라미터) 형태로 호출된다. 단계의 메모 키는
+    (켜짐 여부, 의존 단계의 버전들, 선언한 파라미터 값)이며, 다시 계산될 때마다 버전이 올라가
+    아래 단계도 다시 계산된다. 각 실행은 lib.trace 단계로 기록된다.
+    """
+
+    def __init__(self, params=None):
+        self.params = dict(params or {})
+        self._stages = {}
+        self._memo = {}         # name -> (key, value)
+        self._version = {}      # name -> 계산 횟수
+        self.log = []           # (name, 'run' | 'hit')
+
+    def add(self, name, fn, deps=(), params=(), enabled=True, fallback=None, describe=None):
+        """
+        단계를 등록한다.
+
+        Args:
+            deps: 입력으로 받을 단계 이름들 (이미 등록된 단계여야 한다)
+            params: 읽는 파라미터 이름들
+            fallback: 단계가 꺼졌을 때 fn 대신 같은 인자로 호출할 함수
+                      (None이면 첫 번째 의존 단계 결과를 그대로 넘긴다)
+            describe: 결과 → trace에 남길 수치 dict를 만드는 함수
+        """
+        for dep in deps:
+            if dep not in self._stages:
+                raise KeyError('unknown dependency {!r} for stage {!r}'.format(dep, name))
+        self._stages[name] = _Stage(name, fn, deps, params, enabled, fallback, describe)
+        self._version.setdefault(name, 0)
+        return self
+
+    def set(self, **params):
+        """파라미터를 바꾼다. 값이 같으면 아무 단계도 무효화되지 않는다."""
+        self.params.update(params)
+
+    def enable(self, name, on=True):
+        """단계를 실행 중에 켜거나 끈다."""
+        self._stages[name].enabled = bool(on)
+
+    def __contains__(self, name):
+        return name in self._stages
+
+    def is_enabled(self, name):
+        return self._stages[name].enabled
+
+    def invalidate(self, name=None):
+        """메모를 지운다 (name이 없으면 전체). 외부 상태(문서 객체 등)가 바뀌었을 때 사용."""
+        for key in ([name] if name else list(self._memo)):
+            self._memo.pop(key, None)
+
+    def _key(self, st):
+        values = []
+        for p in st.params:
+            if p not in self.params:
+                raise KeyError('stage {!r} reads missing parameter {!r}'.format(st.name, p))
+            values.append(repr(self.params[p]))
+        return (st.enabled, tuple(self._version[d] for d in st.deps), tuple(values))
+
+    def get(self, name):
+        """단계 결과를 반환한다. 입력이 바뀌지 않았으면 메모된 값을 그대로 쓴다."""
+        st = self._stages[name]
+        inputs = [self.get(dep) for dep in st.deps]
+        key = self._key(st)
+        memo = self._memo.get(name)
+        if memo is not None and memo[0] == key:
+            self.log.append((name, 'hit'))
+            return memo[1]
+
+        kwargs = {p: self.params[p] for p in st.params}
+        with trace_stage(name) as tr:
+            if st.enabled:
+                value = st.fn(*inputs, **kwargs)
+            elif st.fallback is not None:
+                value = st.fallback(*inputs, **kwargs)
+            else:
+                value = inputs[0] if inputs else None
+            tr.set(enabled=st.enabled)
+            # describe는 trace가 켜져 있을 때만 호출한다 (꺼져 있으면 단계 평가에 추가 비용 없음)
+            if st.describe is not None and value is not None and tracing():
+                tr.set(**st.describe(value))
+        self._memo[name] = (key, value)
+        self._version[name] += 1
+        self.log.append((name, 'run'))
+        return value
+
+    def peek(self, name):
+        """이미 계산된 결과가 있으면 반환하고, 없으면 계산하지 않고 None을 반환한다."""
+        memo = self._memo.get(name)
+        return None if memo is None else memo[1]
+
+    def runs(self):
+        """지금까지 실제로 계산된 단계 이름 목록 (메모 적중 제외)."""
+        return [name for name, kind in self.log if kind == 'run']
@@ -0,0 +1,139 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# Rhino 없이 STL 파일을 (vertices, faces) 배열로 읽고 쓰는 모듈.
+# binary STL은 np.memmap으로 파일을 그대로 구조체 배열로 보므로 삼각형 별 Python 객체가 없다.
+
+import numpy as np
+
+
+STL_HEADER_SIZE = 80
+STL_COUNT_SIZE = 4
+STL_DATA_OFFSET = STL_HEADER_SIZE + STL_COUNT_SIZE
+
+STL_DTYPE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attr', '<u2'),
+])
+
+
+def _binary_count(path):
+    """binary STL이면 삼각형 수, 아니면 None."""
+    with open(path, 'rb') as f:
+        head = f.read(STL_DATA_OFFSET)
+        f.seek(0, 2)
+        size = f.tell()
+    if len(head) < STL_DATA_OFFSET:
+        return None
+    count = int(np.frombuffer(head[STL_HEADER_SIZE:], dtype='<u4')[0])
+    if size != STL_DATA_OFFSET + count * STL_DTYPE.itemsize:
+        return None
+    return count
+
+
+def load_triangles(path):
+    """
+    binary STL을 복사 없이 memmap 구조체 배열로 연다 (필드: normal, vertices, attr).
+
+    data['vertices']는 (F, 3, 3) float32 view이다. binary STL이 아니면 ValueError.
+    """
+    count = _binary_count(path)
+    if count is None:
+        raise ValueError('not a binary STL: {}'.format(path))
+    if count == 0:
+        return np.zeros(0, dtype=STL_DTYPE)
+    return np.memmap(path, dtype=STL_DTYPE, mode='r', offset=STL_DATA_OFFSET, shape=(count,))
+
+
+def weld_exact(vertices):
+    """좌표가 비트 단위로 같은 정점을 합친다. (unique_vertices, inverse)를 반환."""
+    v = np.ascontiguousarray(vertices) + 0.0     # -0.0 → 0.0
+    rows = v.view(np.dtype((np.void, v.dtype.itemsize * 3))).ravel()
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+    return v[first], inverse.ravel()
+
+
+def read_stl(path, weld=False):
+    """
+    STL(binary/ascii)을 읽어 (vertices (V,3) float32, faces (F,3) int64)를 반환한다.
+
+    weld=False 이면 정점은 삼각형마다 따로 저장되고(V = 3F), True 이면 같은 좌표의 정점을 합친다.
+    """
+    if _binary_count(path) is not None:
+        vertices = np.asarray(load_triangles(path)['vertices']).reshape(-1, 3)
+    else:
+        with open(path, 'r') as f:
+            tokens = [line.split()[1:4] for line in f if line.lstrip().startswith('vertex')]
+        vertices = np.array(tokens, dtype=np.float32).reshape(-1, 3)
+
+    if weld:
+        vertices, inverse = weld_exact(vertices)
+        return vertices, inverse.reshape(-1, 3).astype(np.int64)
+    return vertices, np.arange(vertices.shape[0], dtype=np.int64).reshape(-1, 3)
+
+
+def _records(vertices, faces):
+    """(vertices, faces)로 STL 레코드 구조체 배열을 만든다 (법선 포함)."""
+    tri = np.asarray(vertices, dtype=np.float64)[np.asarray(faces, dtype=np.int64)]
+    normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    length = np.linalg.norm(normals, axis=1)
+    normals[length > 0] /= length[length > 0, None]
+
+    data = np.zeros(tri.shape[0], dtype=STL_DTYPE)
+    data['normal'] = normals
+    data['vertices'] = tri
+    return data
+
+
+def _header(header):
+    return header[:STL_HEADER_SIZE].ljust(STL_HEADER_SIZE, b'\0')
+
+
+def write_stl(path, vertices, faces, header=b'3d_print'):
+    """(vertices, faces)를 binary STL로 한 번에 저장한다."""
+    data = _records(vertices, faces)
+    with open(path, 'wb') as f:
+        f.write(_header(header))
+        f.write(np.array([data.shape[0]], dtype='<u4').tobytes())
+        data.tofile(f)
+
+
+class StlWriter:
+    """
+    여러 메쉬(product + 서포트 등)를 하나의 binary STL로 순서대로 흘려 쓰는 writer.
+
+    메모리에는 현재 쓰는 파트 하나만 올라가며, 삼각형 수는 close()에서 헤더에 기록한다.
+
+        with StlWriter(path) as w:
+            w.add(product_vertices, product_faces)
+            w.add(support_vertices, support_faces)
+    """
+
+    def __init__(self, path, header=b'3d_print'):
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'wb')
+        self._file.write(_header(header))
+        self._file.write(b'\0' * STL_COUNT_SIZE)
+
+    def add(self, vertices, faces):
+        data = _records(vertices, faces)
+        data.tofile(self._file)
+        self.count += data.shape[0]
+        return data.shape[0]
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.seek(STL_HEADER_SIZE)
+        self._file.write(np.array([self.count], dtype='<u4').tobytes())
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,159 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 샘플 포인트로 XY → Z 높이 함수를 맞추는 모듈 (Brep.CreatePatch 대체).
+# thin-plate spline(φ(r) = r² log r) + 1차 다항식을 정규화 최소제곱으로 풀고,
+# 결과는 임의의 XY 점/격자에서 바로 계산할 수 있다. 이동/스케일은 메모리에서 좌표 변환으로 처리한다.
+
+import numpy as np
+
+
+# 이 개수를 넘으면 중심점을 골라 최소제곱으로 푼다 (행렬 크기 상한)
+MAX_CENTERS = 1024
+EVAL_CHUNK = 4096
+
+
+def sigma_mask(zs, k=2.0):
+    """평균에서 k 시그마 이내인 값이면 True (Cut_brep의 2 sigma 필터와 동일 기준)."""
+    zs = np.asarray(zs, dtype=np.float64)
+    if zs.shape[0] < 2:
+        return np.ones(zs.shape[0], dtype=bool)
+    sigma = zs.std()
+    if sigma <= 1e-9:
+        return np.ones(zs.shape[0], dtype=bool)
+    return np.abs(zs - zs.mean()) <= k * sigma
+
+
+def _tps_kernel(a, b):
+    """a (N,2), b (M,2) 사이의 thin-plate 커널 행렬 (N, M)."""
+    d2 = np.sum((a[:, None, :] - b[None, :, :]) ** 2, axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 0.5 * d2 * np.log(d2)
+    k[d2 <= 0.0] = 0.0
+    return k
+
+
+def _poly(xy):
+    return np.column_stack((np.ones(xy.shape[0]), xy))
+
+
+class HeightSurface:
+    """
+    thin-plate spline 높이 함수 z = f(x, y).
+
+    내부적으로는 정규화된 좌표에서 맞춘 뒤, 바깥에서 준 XY 스케일/이동과 Z 이동을
+    평가할 때 역변환으로 적용한다 (Brep을 문서에 넣고 ScaleObject 할 필요가 없다).
+    """
+
+    def __init__(self, centers, weights, coeffs, shift, norm):
+        self.centers = centers      # 정규화 좌표의 중심점 (M, 2)
+        self.weights = weights      # 커널 가중치 (M,)
+        self.coeffs = coeffs        # 1차 다항식 계수 (3,)
+        self.shift = shift          # 정규화: (xy - shift) / norm
+        self.norm = norm
+        self.scale = np.ones(2)     # XY 변환: world = scale * xy + offset
+        self.offset = np.zeros(2)
+        self.dz = 0.0               # Z 이동
+        self.bounds = None          # 피팅에 쓴 점들의 XY bbox (스케일 반영), (min_x, min_y, max_x, max_y)
+
+    def _copy(self):
+        out = HeightSurface(self.centers, self.weights, self.coeffs, self.shift, self.norm)
+        out.offset = self.offset.copy()
+        out.scale = self.scale.copy()
+        out.dz = self.dz
+        out.bounds = self.bounds
+        return out
+
+    def translated(self, dz):
+        """Z 방향으로 dz 만큼 올린 곡면을 반환한다."""
+        out = self._copy()
+        out.dz += float(dz)
+        return out
+
+    def scaled(self, sx, sy, center):
+        """XY를 center 기준으로 (sx, sy)배 한 곡면을 반환한다 (Z 스케일 1)."""
+        cx, cy = float(center[0]), float(center[1])
+        out = self._copy()
+        # world' = c + s (world - c) = (s * scale) xy + c + s (offset - c)
+        s = np.array((sx, sy), dtype=np.float64)
+        c = np.array((cx, cy))
+        out.scale = s * self.scale
+        out.offset = c + s * (self.offset - c)
+        if self.bounds is not None:
+            x0, y0, x1, y1 = self.bounds
+            out.bounds = (cx + sx * (x0 - cx), cy + sy * (y0 - cy), cx + sx * (x1 - cx), cy + sy * (y1 - cy))
+        return out
+
+    def __call__(self, x, y):
+        """(x, y) 배열에서 높이를 계산한다 (같은 shape으로 반환)."""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        shape = np.broadcast(x, y).shape
+        xy = np.column_stack((np.broadcast_to(x, shape).ravel(), np.broadcast_to(y, shape).ravel()))
+        # 스케일 역변환 후 정규화
+        xy = (xy - self.offset) / self.scale
+        uv = (xy - self.shift) / self.norm
+
+        z = np.empty(uv.shape[0])
+        for c0 in range(0, uv.shape[0], EVAL_CHUNK):
+            part = uv[c0:c0 + EVAL_CHUNK]
+            z[c0:c0 + EVAL_CHUNK] = _tps_kernel(part, self.centers) @ self.weights + _poly(part) @ self.coeffs
+        return z.reshape(shape) + self.dz
+
+    def grid(self, xs, ys):
+        """X/Y 축 좌표로 (len(ys), len(xs)) 높이 격자를 계산한다 (heightmap과 같은 배치)."""
+        gx, gy = np.meshgrid(xs, ys)
+        return self(gx, gy)
+
+
+def fit_surface(points, smoothing=1e-3, sigma_k=2.0, max_centers=MAX_CENTERS):
+    """
+    (N, 3) 포인트를 k 시그마 필터 후 thin-plate spline으로 맞춘다.
+
+    Args:
+        smoothing: 정규화 계수 (0이면 보간, 클수록 평평해짐). 정규화 좌표 기준
+        sigma_k: Z 필터 기준 (None이면 필터 생략)
+    Returns:
+        (HeightSurface, 사용한 포인트 수). 점이 3개 미만이면 (None, 개수)
+    """
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if sigma_k is not None:
+        pts = pts[sigma_mask(pts[:, 2], sigma_k)]
+    n = pts.shape[0]
+    if n < 3:
+        return None, n
+
+    xy = pts[:, :2]
+    lo = xy.min(axis=0)
+    hi = xy.max(axis=0)
+    shift = (lo + hi) * 0.5
+    norm = max(float(np.max(hi - lo)) * 0.5, 1e-9)
+    uv = (xy - shift) / norm
+    z = pts[:, 2]
+
+    if n <= max_centers:
+        # [K + λI  P] [w]   [z]
+        # [P^T     0] [a] = [0]
+        centers = uv
+        k = _tps_kernel(uv, uv) + smoothing * np.eye(n)
+        p = _poly(uv)
+        a = np.zeros((n + 3, n + 3))
+        a[:n, :n] = k
+        a[:n, n:] = p
+        a[n:, :n] = p.T
+        rhs = np.concatenate((z, np.zeros(3)))
+        sol = np.linalg.lstsq(a, rhs, rcond=None)[0]
+    else:
+        # 중심점을 고르게 골라 min |K w + P a - z|² + λ wᵀ K_cc w
+        centers = uv[np.linspace(0, n - 1, max_centers).astype(np.int64)]
+        k = _tps_kernel(uv, centers)
+        design = np.column_stack((k, _poly(uv)))
+        reg = np.zeros((design.shape[1], design.shape[1]))
+        reg[:max_centers, :max_centers] = smoothing * n * _tps_kernel(centers, centers)
+        sol = np.linalg.lstsq(design.T @ design + reg, design.T @ z, rcond=None)[0]
+
+    m = centers.shape[0]
+    surface = HeightSurface(centers, sol[:m], sol[m:], shift, norm)
+    surface.bounds = (float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1]))
+    return surface, n
@@ -0,0 +1,121 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 벤치마크용 가상 크라운/브릿지 메쉬 생성 모듈 (실제 스캔 없이 Rhino 밖에서 사용).
+# 크라운은 교합면 cusp 무늬가 있는 돔 바깥면 + 안쪽으로 두께만큼 들어간 안쪽면 + 마진 링으로 된 닫힌 껍질이다.
+# 좌표는 mm, 교합면이 +Z (스캔 방향). 파이프라인에서 뒤집어 사용한다.
+
+import numpy as np
+
+
+def _dome(segments, rings, rx, ry, height, cusps, cusp_depth, seed_phase=0.0):
+    """
+    극점 1개 + rings개 링(각 segments개 정점)으로 된 돔 정점 배열 (1 + rings*segments, 3).
+
+    θ는 극점(교합면 중심) 0 → 마진 π/2, 마지막 링은 z=0.
+    """
+    theta = np.linspace(0.0, np.pi / 2.0, rings + 1)[1:]
+    phi = np.linspace(0.0, 2.0 * np.pi, segments, endpoint=False)
+    t, p = np.meshgrid(theta, phi, indexing='ij')
+
+    # 교합면 근처에서만 커지는 cusp 요철 (마진 링은 변형 없음)
+    bump = cusp_depth * np.cos(cusps * p + seed_phase) * np.sin(2.0 * t) ** 2
+    fissure = 0.35 * cusp_depth * np.cos(2.0 * cusps * p) * np.sin(3.0 * t) ** 2 * (t < np.pi / 3.0)
+    z = (height + bump - fissure) * np.cos(t)
+    # 옆면이 거의 수직이 되도록 반경은 sin(θ)^0.6
+    r = np.sin(t) ** 0.6
+    ring_xyz = np.stack((rx * r * np.cos(p), ry * r * np.sin(p), z), axis=-1).reshape(-1, 3)
+    pole = np.array([[0.0, 0.0, height + cusp_depth * 0.2]])
+    return np.concatenate((pole, ring_xyz))
+
+
+def _dome_faces(segments, rings, start):
+    """_dome 정점 배치에 대한 삼각형 (바깥에서 볼 때 반시계 = 법선 바깥)."""
+    j = np.arange(segments)
+    jn = (j + 1) % segments
+    ring = lambda i: start + 1 + i * segments
+    faces = [np.column_stack((np.full(segments, start), ring(0) + j, ring(0) + jn))]
+    for i in range(rings - 1):
+        a = ring(i) + j
+        b = ring(i) + jn
+        c = ring(i + 1) + jn
+        d = ring(i + 1) + j
+        faces.append(np.column_stack((a, d, c)))
+        faces.append(np.column_stack((a, c, b)))
+    return np.concatenate(faces)
+
+
+def crown_mesh(segments=64, rx=5.0, ry=4.5, height=6.5, thickness=0.7, cusps=4, cusp_depth=0.6,
+               center=(0.0, 0.0), phase=0.0):
+    """
+    속이 빈 크라운 모양의 닫힌 메쉬를 만든다. 면 수는 대략 segments².
+
+    Returns:
+        (vertices (V,3) float64, faces (F,3) int64)
+    """
+    segments = max(8, int(segments))
+    rings = max(2, segments // 4)
+    outer = _dome(segments, rings, rx, ry, height, cusps, cusp_depth, phase)
+    inner = _dome(segments, rings, rx - thickness, ry - thickness, height - thickness,
+                  cusps, cusp_depth * 0.5, phase)
+    n = outer.shape[0]
+
+    outer_faces = _dome_faces(segments, rings, 0)
+    inner_faces = _dome_faces(segments, rings, n)[:, ::-1]     # 안쪽면은 법선이 공동(cavity) 쪽
+
+    # 마진 링: 바깥 마지막 링과 안쪽 마지막 링을 잇는 바닥 띠 (법선 -Z)
+    j = np.arange(segments)
+    jn = (j + 1) % segments
+    o = 1 + (rings - 1) * segments
+    a, b = o + j, o + jn
+    c, d = n + o + jn, n + o + j
+    rim = np.concatenate((np.column_stack((a, c, b)), np.column_stack((a, d, c))))
+
+    vertices = np.concatenate((outer, inner))
+    vertices[:, 0] += center[0]
+    vertices[:, 1] += center[1]
+    return vertices, np.concatenate((outer_faces, inner_faces, rim)).astype(np.int64)
+
+
+def box_mesh(min_pt, max_pt):
+    """축 정렬 박스의 닫힌 삼각형 메쉬 (법선 바깥)."""
+    x0, y0, z0 = min_pt
+    x1, y1, z1 = max_pt
+    vertices = np.array([(x0, y0, z0), (x1, y0, z0), (x1, y1, z0), (x0, y1, z0),
+                         (x0, y0, z1), (x1, y0, z1), (x1, y1, z1), (x0, y1, z1)], dtype=np.float64)
+    faces = np.array([(0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7),
+                      (0, 1, 5), (0, 5, 4), (1, 2, 6), (1, 6, 5),
+                      (2, 3, 7), (2, 7, 6), (3, 0, 4), (3, 4, 7)], dtype=np.int64)
+    return vertices, faces
+
+
+def merge_meshes(parts):
+    """(vertices, faces) 목록을 인덱스를 이어 붙여 하나로 합친다 (용접하지 않음)."""
+    vertices = []
+    faces = []
+    offset = 0
+    for v, f in parts:
+        vertices.append(np.asarray(v, dtype=np.float64))
+        faces.append(np.asarray(f, dtype=np.int64) + offset)
+        offset += vertices[-1].shape[0]
+    return np.concatenate(vertices), np.concatenate(faces)
+
+
+def bridge_mesh(units=3, segments=64, spacing=8.5, connector=(2.0, 2.5), **crown_kw):
+    """
+    units개 크라운을 X 방향으로 늘어놓고 이웃 사이를 박스 연결부로 이은 브릿지 메쉬.
+
+    연결부는 크라운과 겹치는 별도 닫힌 껍질이다 (Boolean 합치기 없음).
+    """
+    parts = []
+    for i in range(units):
+        cx = (i - (units - 1) * 0.5) * spacing
+        parts.append(crown_mesh(segments, center=(cx, 0.0), phase=0.7 * i, **crown_kw))
+    width, thick = connector
+    height = crown_kw.get('height', 6.5)
+    for i in range(units - 1):
+        x0 = (i - (units - 1) * 0.5) * spacing + spacing * 0.3
+        x1 = x0 + spacing * 0.4
+        parts.append(box_mesh((x0, -width * 0.5, height * 0.45), (x1, width * 0.5, height * 0.45 + thick)))
+    return merge_meshes(parts)
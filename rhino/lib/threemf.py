@@ -0,0 +1,190 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 플레이트의 product/서포트 메쉬를 3MF (정점 공유, 객체 별 이름/메타데이터)로 흘려 쓰는 모듈.
+# 3MF는 zip 안의 XML(3D/3dmodel.model)이므로 파트를 하나씩 XML로 바꿔 zip 스트림에 쓰고,
+# 메모리에는 현재 파트 하나만 올라간다. 필요하면 같은 파트를 binary STL(lib.stl.StlWriter)에도 쓴다.
+#
+#   with ThreeMFWriter(path, title='plate-1', stl_path='plate-1.stl') as w:
+#       w.add('crown-11', vertices, faces, {'offset': 0.14})
+#   parts = read_3mf(path)           # [(name, vertices, faces, metadata), ...]
+
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from lib.stl import StlWriter, weld_exact
+
+
+MODEL_PATH = '3D/3dmodel.model'
+CORE_NS = 'http://schemas.microsoft.com/3dmanufacturing/core/2015/02'
+VENDOR_NS = 'urn:3d_print:metadata'         # 객체/파일 메타데이터용 자체 네임스페이스
+VENDOR_PREFIX = 'd3p'
+# 3MF core 규격이 정의한 메타데이터 이름. 나머지 이름은 네임스페이스를 붙여야 한다 (d3p:layer 등).
+WELL_KNOWN_METADATA = ('Title', 'Designer', 'Description', 'Copyright', 'LicenseTerms', 'Rating',
+                       'CreationDate', 'ModificationDate', 'Application')
+CHUNK = 65536               # XML로 바꿀 때 한 번에 처리하는 정점/삼각형 수
+COMPRESS_LEVEL = 1          # deflate 레벨 (XML은 1에서도 충분히 줄고, 쓰기 시간 대부분이 압축이다)
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>')
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/' + MODEL_PATH + '" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>')
+
+_VERTEX = '<vertex x="%.5f" y="%.5f" z="%.5f"/>'
+_TRIANGLE = '<triangle v1="%d" v2="%d" v3="%d"/>'
+
+
+def _metadata_name(key):
+    """규격에 없는 이름에는 자체 네임스페이스 접두어를 붙인다 (이미 접두어가 있으면 그대로)."""
+    key = str(key)
+    if key in WELL_KNOWN_METADATA or ':' in key:
+        return key
+    return VENDOR_PREFIX + ':' + key
+
+
+def _metadata(values, indent):
+    return ''.join('{}<metadata name={}>{}</metadata>\n'.format(indent, quoteattr(_metadata_name(k)), escape(str(v)))
+                   for k, v in values.items())
+
+
+def indexed_mesh(vertices, faces):
+    """
+    좌표가 같은 정점을 합치고 퇴화 삼각형을 뺀 (vertices (V,3), faces (F,3)).
+    STL처럼 삼각형마다 정점이 따로 있는 입력도 정점을 공유하게 된다.
+    """
+    v = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    f = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    used, inverse = np.unique(f, return_inverse=True)
+    v, weld = weld_exact(v[used])
+    f = weld[inverse.ravel()].reshape(-1, 3)
+    ok = (f[:, 0] != f[:, 1]) & (f[:, 1] != f[:, 2]) & (f[:, 2] != f[:, 0])
+    return v, f[ok]
+
+
+class ThreeMFWriter:
+    """
+    메쉬 파트를 3MF 하나로 순서대로 흘려 쓰는 writer (stl_path가 있으면 binary STL도 함께).
+
+    각 파트는 이름과 메타데이터를 가진 <object>가 되고, close()에서 모든 객체를 <build>에 놓는다.
+    """
+
+    def __init__(self, path, title=None, stl_path=None, metadata=None, unit='millimeter'):
+        self.path = path
+        self.count = 0
+        self.triangles = 0
+        self._ids = []
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL)
+        self._zip.writestr('[Content_Types].xml', CONTENT_TYPES)
+        self._zip.writestr('_rels/.rels', RELS)
+        self._model = self._zip.open(MODEL_PATH, 'w', force_zip64=True)
+        self._stl = StlWriter(stl_path) if stl_path else None
+
+        header = dict(metadata or {})
+        if title:
+            header.setdefault('Title', title)
+        header.setdefault('Application', '3d_print')
+        header.setdefault('CreationDate', time.strftime('%Y-%m-%d'))
+        self._write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<model unit="{}" xml:lang="en-US" xmlns="{}" xmlns:{}="{}">\n'.format(
+                        unit, CORE_NS, VENDOR_PREFIX, VENDOR_NS))
+        self._write(_metadata(header, ' '))
+        self._write(' <resources>\n')
+
+    def _write(self, text):
+        self._model.write(text.encode('utf-8'))
+
+    def add(self, name, vertices, faces, metadata=None):
+        """파트 하나를 <object>로 쓴다. 정점은 공유되도록 합친다. 쓴 삼각형 수를 반환한다."""
+        v, f = indexed_mesh(vertices, faces)
+        if f.shape[0] == 0:
+            return 0
+        object_id = len(self._ids) + 1
+        self._write('  <object id="{}" type="model" name={}>\n'.format(object_id, quoteattr(str(name))))
+        if metadata:
+            self._write('   <metadatagroup>\n' + _metadata(metadata, '    ') + '   </metadatagroup>\n')
+        self._write('   <mesh>\n    <vertices>\n')
+        for start in range(0, v.shape[0], CHUNK):
+            block = v[start:start + CHUNK]
+            self._write((_VERTEX * block.shape[0]) % tuple(block.ravel().tolist()))
+        self._write('\n    </vertices>\n    <triangles>\n')
+        for start in range(0, f.shape[0], CHUNK):
+            block = f[start:start + CHUNK]
+            self._write((_TRIANGLE * block.shape[0]) % tuple(block.ravel().tolist()))
+        self._write('\n    </triangles>\n   </mesh>\n  </object>\n')
+        self._ids.append((object_id, str(name)))
+
+        if self._stl is not None:
+            self._stl.add(v, f)
+        self.count += 1
+        self.triangles += int(f.shape[0])
+        return int(f.shape[0])
+
+    def close(self):
+        if self._zip is None:
+            return
+        self._write(' </resources>\n <build>\n')
+        for object_id, name in self._ids:
+            self._write('  <item objectid="{}" partnumber={}/>\n'.format(object_id, quoteattr(name)))
+        self._write(' </build>\n</model>\n')
+        self._model.close()
+        self._zip.close()
+        self._zip = None
+        if self._stl is not None:
+            self._stl.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_3mf(path, parts, title=None, stl_path=None, metadata=None):
+    """
+    (name, vertices, faces, metadata) 파트들을 3MF로 저장한다. parts는 생성기여도 되며
+    한 번에 한 파트만 메모리에 둔다. (객체 수, 삼각형 수)를 반환한다.
+    """
+    with ThreeMFWriter(path, title=title, stl_path=stl_path, metadata=metadata) as writer:
+        for name, vertices, faces, meta in parts:
+            writer.add(name, vertices, faces, meta)
+    return writer.count, writer.triangles
+
+
+def read_3mf(path):
+    """
+    3MF의 객체들을 [(name, vertices (V,3) float64, faces (F,3) int64, metadata dict), ...]로 읽는다.
+    메타데이터 이름의 자체 네임스페이스 접두어(d3p:)는 떼어낸다. (검증/테스트용, 메쉬 객체만 지원)
+    """
+    ns = '{' + CORE_NS + '}'
+    prefix = VENDOR_PREFIX + ':'
+    parts = []
+    with zipfile.ZipFile(path) as zf, zf.open(MODEL_PATH) as fp:
+        for _, elem in ET.iterparse(fp):
+            if elem.tag != ns + 'object':
+                continue
+            mesh = elem.find(ns + 'mesh')
+            if mesh is not None:
+                v = np.array([(float(e.get('x')), float(e.get('y')), float(e.get('z')))
+                              for e in mesh.find(ns + 'vertices')], dtype=np.float64).reshape(-1, 3)
+                f = np.array([(int(e.get('v1')), int(e.get('v2')), int(e.get('v3')))
+                              for e in mesh.find(ns + 'triangles')], dtype=np.int64).reshape(-1, 3)
+                meta = {}
+                for e in elem.iter(ns + 'metadata'):
+                    name = e.get('name')
+                    meta[name[len(prefix):] if name.startswith(prefix) else name] = e.text or ''
+                parts.append((elem.get('name'), v, f, meta))
+            elem.clear()
+    return parts
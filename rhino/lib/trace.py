@@ -0,0 +1,196 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+
+# create_support 단계별 시간/형상 수/메모리를 JSON trace로 남기는 프로파일러.
+#
+#   start_trace('create_supports', path)      # 켜기 (안 켜면 stage()는 아무것도 하지 않는다)
+#   with stage('sampling') as st:
+#       points = Sample_points(...)
+#       st.set(points=len(points))
+#   stop_trace()                              # path에 JSON 저장
+#
+# 메모리는 tracemalloc 기준(Python/NumPy 할당) 단계 내 최대 증가량이다. RhinoCommon 네이티브 메모리는 포함되지 않는다.
+# 단계는 중첩될 수 있다. 안쪽 단계가 peak를 초기화하기 전의 peak는 바깥 단계로 넘겨서 바깥 peak가 지워지지 않는다.
+
+import json
+import os
+import time
+import tracemalloc
+
+
+_current = None
+
+
+class _NullStage:
+    """trace가 꺼져 있을 때 쓰는 아무것도 하지 않는 stage (공유 인스턴스 하나)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **values):
+        pass
+
+    def geometry(self, items):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def geometry_counts(items):
+    """
+    메쉬/Brep, TriangleMesh 또는 (vertices, faces) 배열 목록의 (정점 수, 면 수) 합계.
+
+    RhinoCommon 객체는 Vertices.Count / Faces.Count, 배열 튜플은 shape[0]을 사용한다.
+    """
+    vertices = faces = 0
+    for item in items or []:
+        if item is None:
+            continue
+        if isinstance(item, tuple):
+            vertices += int(item[0].shape[0])
+            faces += int(item[1].shape[0])
+        elif hasattr(item, 'face_count'):
+            # lib.trimesh.TriangleMesh
+            vertices += int(item.vertex_count)
+            faces += int(item.face_count)
+        else:
+            try:
+                vertices += int(item.Vertices.Count)
+                faces += int(item.Faces.Count)
+            except AttributeError:
+                pass
+    return vertices, faces
+
+
+class Stage:
+    """한 단계의 측정값. with 블록이 끝날 때 Trace에 기록된다."""
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.record = {'name': name}
+        self._peak = 0              # 안쪽 단계가 reset_peak()로 지운 구간의 peak (절대값)
+
+    def __enter__(self):
+        if self.trace.memory:
+            if self.trace._open:
+                # reset_peak()가 지우기 전에 지금까지의 peak를 바깥 단계에 넘긴다
+                parent = self.trace._open[-1]
+                parent._peak = max(parent._peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self._mem0 = tracemalloc.get_traced_memory()[0]
+        self.trace._open.append(self)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record['seconds'] = time.perf_counter() - self._t0
+        if self.trace._open and self.trace._open[-1] is self:
+            self.trace._open.pop()
+        if self.trace.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._peak)
+            self.record['peak_bytes'] = max(0, peak - self._mem0)
+            self.record['retained_bytes'] = current - self._mem0
+            if self.trace._open:
+                parent = self.trace._open[-1]
+                parent._peak = max(parent._peak, peak)
+        if exc_type is not None:
+            self.record['error'] = '{}: {}'.format(exc_type.__name__, exc)
+        self.trace.stages.append(self.record)
+        return False
+
+    def set(self, **values):
+        """단계 결과 수치(포인트 수, 조각 수 등)를 기록한다."""
+        self.record.update(values)
+
+    def geometry(self, items):
+        """단계가 만든 형상의 정점/면 수를 기록한다."""
+        vertices, faces = geometry_counts(items)
+        self.record['vertices'] = vertices
+        self.record['faces'] = faces
+
+
+class Trace:
+    """
+    한 번의 실행(run)에 대한 단계 기록.
+
+    Args:
+        name: run 이름
+        path: stop_trace()에서 JSON을 저장할 경로 (None이면 저장하지 않음)
+        memory: True 이면 tracemalloc으로 단계별 메모리 측정 (측정 중에는 할당이 느려진다)
+    """
+
+    def __init__(self, name, path=None, memory=True):
+        self.name = name
+        self.path = path
+        self.memory = memory
+        self.stages = []
+        self._open = []             # 열려 있는 Stage (바깥 → 안쪽)
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._own_tracemalloc = False
+
+    def stage(self, name):
+        return Stage(self, name)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'started': self.started,
+            'seconds': time.perf_counter() - self._t0,
+            'stages': self.stages,
+        }
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+def start_trace(name, path=None, memory=True):
+    """trace를 켜고 Trace를 반환한다. 이미 켜져 있으면 새 trace로 바꾼다."""
+    global _current
+    trace = Trace(name, path, memory)
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        trace._own_tracemalloc = True
+    _current = trace
+    return trace
+
+
+def stop_trace():
+    """trace를 끄고 결과 dict를 반환한다 (path가 있으면 JSON 저장). 켜져 있지 않으면 None."""
+    global _current
+    trace = _current
+    if trace is None:
+        return None
+    _current = None
+    if trace._own_tracemalloc:
+        tracemalloc.stop()
+    result = trace.to_dict()
+    saved = trace.save()
+    if saved:
+        print('[trace] saved:', saved)
+    return result
+
+
+def tracing():
+    """trace가 켜져 있으면 True (꺼져 있을 때 trace용 값 계산을 건너뛰는 데 쓴다)."""
+    return _current is not None
+
+
+def stage(name):
+    """현재 trace의 단계를 연다. trace가 꺼져 있으면 공유 no-op 객체를 반환한다."""
+    if _current is None:
+        return _NULL_STAGE
+    return _current.stage(name)
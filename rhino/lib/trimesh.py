@@ -0,0 +1,172 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# 메모리 내 파이프라인용 배열 기반 삼각형 메쉬 (float32 정점, int32 면).
+# RhinoCommon Mesh 대신 단계 사이에 넘겨서 DuplicateMesh / Transform 복사를 줄인다.
+#   - 변환(translate / scale / rotate_z / transform)은 제자리에서 버퍼를 고쳐 쓴다
+#   - view / select_faces / translated는 바뀌지 않는 버퍼(면 또는 정점)를 복사하지 않고 공유한다
+#   - v, f = mesh 처럼 풀 수 있어서 (vertices, faces) 튜플을 받는 lib 함수에 그대로 넘길 수 있다
+# RhinoCommon 변환은 파이프라인 가장자리에서만 한다 (lib.globals.MeshToTriangleMesh / TriangleMeshToMesh).
+
+import numpy as np
+
+
+TRANSFORM_CHUNK = 1 << 16       # transform()이 한 번에 곱하는 정점 수 (임시 버퍼 크기 상한)
+
+
+class TriangleMesh:
+    """
+    float32 (V, 3) 정점과 int32 (F, 3) 면 배열을 가진 삼각형 메쉬.
+
+    생성자는 dtype/연속성이 이미 맞으면 배열을 복사하지 않는다 (copy=True이면 항상 복사).
+    """
+
+    __slots__ = ('vertices', 'faces')
+
+    def __init__(self, vertices, faces, copy=False):
+        if copy:
+            vertices = np.array(vertices, dtype=np.float32)
+            faces = np.array(faces, dtype=np.int32)
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self.faces = np.ascontiguousarray(faces, dtype=np.int32).reshape(-1, 3)
+
+    @classmethod
+    def _wrap(cls, vertices, faces):
+        """검사/변환 없이 버퍼를 그대로 쓰는 생성 (내부용)."""
+        mesh = cls.__new__(cls)
+        mesh.vertices = vertices
+        mesh.faces = faces
+        return mesh
+
+    @classmethod
+    def empty(cls):
+        return cls._wrap(np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.int32))
+
+    @classmethod
+    def concatenate(cls, meshes):
+        """여러 메쉬를 한 번의 할당으로 합친다 (면 인덱스는 정점 오프셋만큼 이동)."""
+        meshes = [m for m in meshes if m is not None]
+        nv = sum(m.vertices.shape[0] for m in meshes)
+        nf = sum(m.faces.shape[0] for m in meshes)
+        vertices = np.empty((nv, 3), dtype=np.float32)
+        faces = np.empty((nf, 3), dtype=np.int32)
+        v0 = f0 = 0
+        for m in meshes:
+            v1 = v0 + m.vertices.shape[0]
+            f1 = f0 + m.faces.shape[0]
+            vertices[v0:v1] = m.vertices
+            np.add(m.faces, v0, out=faces[f0:f1])
+            v0, f0 = v1, f1
+        return cls._wrap(vertices, faces)
+
+    def __iter__(self):
+        yield self.vertices
+        yield self.faces
+
+    def __repr__(self):
+        return 'TriangleMesh(vertices={}, faces={})'.format(self.vertices.shape[0], self.faces.shape[0])
+
+    @property
+    def vertex_count(self):
+        return self.vertices.shape[0]
+
+    @property
+    def face_count(self):
+        return self.faces.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.vertices.nbytes + self.faces.nbytes
+
+    def bounds(self):
+        """(2, 3) [min, max] (정점이 없으면 NaN)."""
+        if self.vertices.shape[0] == 0:
+            return np.full((2, 3), np.nan)
+        return np.stack((self.vertices.min(axis=0), self.vertices.max(axis=0))).astype(np.float64)
+
+    def triangles(self):
+        """(F, 3, 3) 삼각형 꼭짓점 좌표 (float64 복사본)."""
+        return self.vertices[self.faces].astype(np.float64)
+
+    def face_normals(self):
+        """(F, 3) 단위 면 법선 (면적 0인 면은 0)."""
+        tri = self.triangles()
+        n = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        length = np.linalg.norm(n, axis=1)
+        n[length > 0] /= length[length > 0, None]
+        return n
+
+    def volume(self):
+        """부호 있는 부피 (닫힌 메쉬이고 법선이 바깥이면 양수)."""
+        tri = self.triangles()
+        return float(np.einsum('ij,ij->i', tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum() / 6.0)
+
+    # ------------------------------------------------------------ 제자리 변환
+    def translate(self, dx, dy, dz):
+        self.vertices += np.array((dx, dy, dz), dtype=np.float32)
+        return self
+
+    def scale(self, sx, sy=None, sz=None, center=(0.0, 0.0, 0.0)):
+        sy = sx if sy is None else sy
+        sz = sx if sz is None else sz
+        c = np.array(center, dtype=np.float32)
+        self.vertices -= c
+        self.vertices *= np.array((sx, sy, sz), dtype=np.float32)
+        self.vertices += c
+        if sx * sy * sz < 0:
+            self.flip()
+        return self
+
+    def rotate_z(self, angle, center=(0.0, 0.0)):
+        """center를 지나는 Z축 기준 angle(라디안) 회전."""
+        c, s = np.cos(angle), np.sin(angle)
+        m = np.eye(4)
+        m[:2, :2] = ((c, -s), (s, c))
+        m[:2, 3] = (center[0] - c * center[0] + s * center[1], center[1] - s * center[0] - c * center[1])
+        return self.transform(m)
+
+    def transform(self, matrix):
+        """4x4 아핀 행렬을 제자리에서 적용한다 (정점 TRANSFORM_CHUNK개 단위, 거울 변환이면 면 방향도 뒤집기)."""
+        m = np.asarray(matrix, dtype=np.float64).reshape(4, 4)
+        rot = m[:3, :3].T.astype(np.float32)
+        shift = m[:3, 3].astype(np.float32)
+        tmp = np.empty((min(TRANSFORM_CHUNK, self.vertices.shape[0]), 3), dtype=np.float32)
+        for start in range(0, self.vertices.shape[0], TRANSFORM_CHUNK):
+            block = self.vertices[start:start + TRANSFORM_CHUNK]
+            out = tmp[:block.shape[0]]
+            np.matmul(block, rot, out=out)
+            np.add(out, shift, out=block)
+        if np.linalg.det(m[:3, :3]) < 0:
+            self.flip()
+        return self
+
+    def flip(self):
+        """면 방향(법선)을 제자리에서 뒤집는다."""
+        self.faces[:, [1, 2]] = self.faces[:, [2, 1]]
+        return self
+
+    # ------------------------------------------------------------ 공유 view
+    def view(self):
+        """두 버퍼를 모두 공유하는 새 메쉬 객체."""
+        return self._wrap(self.vertices, self.faces)
+
+    def translated(self, dx, dy, dz):
+        """이동한 정점 버퍼를 새로 만들고 면 버퍼는 공유한다."""
+        return self._wrap(self.vertices + np.array((dx, dy, dz), dtype=np.float32), self.faces)
+
+    def select_faces(self, index):
+        """
+        면 일부만 가진 메쉬 (정점 버퍼 공유). index가 slice이면 면 배열도 view,
+        정수/불리언 배열이면 면 인덱스만 복사된다.
+        """
+        faces = self.faces[index]
+        return self._wrap(self.vertices, faces.reshape(-1, 3))
+
+    def compact(self):
+        """면이 참조하지 않는 정점을 뺀 새 메쉬 (버퍼 새로 할당)."""
+        used, inverse = np.unique(self.faces, return_inverse=True)
+        return self._wrap(self.vertices[used], inverse.reshape(-1, 3).astype(np.int32))
+
+    def copy(self):
+        return self._wrap(self.vertices.copy(), self.faces.copy())
@@ -0,0 +1,208 @@
+#! python 3
+# env: /Users/joonholee/Joon/1-Project/3d_print/rhino
+# r: numpy
+
+# Rhino user text에 넣는 값을 위한 작은 타입 지정 바이너리 포맷 (pickle + base64 대체).
+#
+#   텍스트 = 'u1' + ('z' 압축 | 'r' 원본) + base64(바이너리)
+#
+# 지원 타입: None, bool, int, float, str, bytes, NumPy 배열/스칼라, list/tuple, dict(str 키).
+# 배열은 dtype/shape + 원시 바이트로 저장하고, 읽을 때 np.frombuffer view로 복사 없이 꺼낸다.
+# dict는 키 → (offset, length) 목차를 앞에 두므로 decode()가 돌려주는 LazyDict는
+# 접근한 키만 해석한다. 임의 객체를 실행하는 pickle과 달리 데이터만 복원한다.
+
+import base64
+import struct
+import zlib
+from collections.abc import Mapping
+
+import numpy as np
+
+
+PREFIX = 'u1'
+COMPRESS_MIN_BYTES = 64
+
+
+def _pack(value, out):
+    """value를 바이너리로 out(bytearray)에 덧붙인다."""
+    if isinstance(value, np.generic) and not isinstance(value, np.ndarray):
+        value = value.item()
+
+    if value is None:
+        out += b'N'
+    elif value is True:
+        out += b'T'
+    elif value is False:
+        out += b'F'
+    elif isinstance(value, int):
+        if -2 ** 31 <= value < 2 ** 31:
+            out += b'i' + struct.pack('<i', value)
+        else:
+            out += b'q' + struct.pack('<q', value)
+    elif isinstance(value, float):
+        out += b'f' + struct.pack('<d', value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        out += b's' + struct.pack('<I', len(data)) + data
+    elif isinstance(value, (bytes, bytearray)):
+        out += b'B' + struct.pack('<I', len(value)) + bytes(value)
+    elif isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError('object arrays are not supported')
+        arr = np.ascontiguousarray(value)
+        dtype = arr.dtype.str.encode('ascii')
+        out += b'a' + struct.pack('<B', len(dtype)) + dtype + struct.pack('<B', arr.ndim)
+        out += struct.pack('<{}Q'.format(arr.ndim), *arr.shape)
+        out += struct.pack('<Q', arr.nbytes) + arr.tobytes()
+    elif isinstance(value, (list, tuple)):
+        out += b'l' + struct.pack('<I', len(value))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        # 목차: 키, 본문 시작 위치(본문 영역 기준)
+        bodies = []
+        for key in value:
+            if not isinstance(key, str):
+                raise TypeError('dict keys must be str, got {}'.format(type(key).__name__))
+            name = key.encode('utf-8')
+            if len(name) > 255:
+                raise ValueError('dict key too long: {!r}'.format(key))
+            body = bytearray()
+            _pack(value[key], body)
+            bodies.append((name, body))
+        out += b'd' + struct.pack('<I', len(bodies))
+        offset = 0
+        for key, body in bodies:
+            out += struct.pack('<B', len(key)) + key + struct.pack('<I', offset)
+            offset += len(body)
+        out += struct.pack('<I', offset)
+        for _, body in bodies:
+            out += body
+    else:
+        raise TypeError('unsupported user text value type: {}'.format(type(value).__name__))
+
+
+def _unpack(buf, pos, lazy=True):
+    """buf[pos:]의 값 하나를 해석해 (값, 다음 위치)를 반환한다."""
+    tag = buf[pos:pos + 1]
+    pos += 1
+    if tag == b'N':
+        return None, pos
+    if tag == b'T':
+        return True, pos
+    if tag == b'F':
+        return False, pos
+    if tag == b'i':
+        return struct.unpack_from('<i', buf, pos)[0], pos + 4
+    if tag == b'q':
+        return struct.unpack_from('<q', buf, pos)[0], pos + 8
+    if tag == b'f':
+        return struct.unpack_from('<d', buf, pos)[0], pos + 8
+    if tag in (b's', b'B'):
+        n = struct.unpack_from('<I', buf, pos)[0]
+        data = bytes(buf[pos + 4:pos + 4 + n])
+        return (data.decode('utf-8') if tag == b's' else data), pos + 4 + n
+    if tag == b'a':
+        n = buf[pos]
+        dtype = np.dtype(bytes(buf[pos + 1:pos + 1 + n]).decode('ascii'))
+        pos += 1 + n
+        ndim = buf[pos]
+        shape = struct.unpack_from('<{}Q'.format(ndim), buf, pos + 1)
+        pos += 1 + 8 * ndim
+        nbytes = struct.unpack_from('<Q', buf, pos)[0]
+        pos += 8
+        arr = np.frombuffer(buf, dtype=dtype, count=nbytes // max(1, dtype.itemsize), offset=pos)
+        return arr.reshape(shape), pos + nbytes
+    if tag == b'l':
+        n = struct.unpack_from('<I', buf, pos)[0]
+        pos += 4
+        items = []
+        for _ in range(n):
+            item, pos = _unpack(buf, pos, lazy)
+            items.append(item)
+        return items, pos
+    if tag == b'd':
+        n = struct.unpack_from('<I', buf, pos)[0]
+        pos += 4
+        index = {}
+        for _ in range(n):
+            klen = buf[pos]
+            key = bytes(buf[pos + 1:pos + 1 + klen]).decode('utf-8')
+            index[key] = struct.unpack_from('<I', buf, pos + 1 + klen)[0]
+            pos += 1 + klen + 4
+        total = struct.unpack_from('<I', buf, pos)[0]
+        pos += 4
+        value = LazyDict(buf, pos, index)
+        if not lazy:
+            value = value.to_dict()
+        return value, pos + total
+    raise ValueError('corrupt user text value (tag {!r})'.format(tag))
+
+
+class LazyDict(Mapping):
+    """dict 값을 키 별로 필요할 때만 해석하는 읽기 전용 매핑 (한 번 해석한 값은 보관)."""
+
+    def __init__(self, buf, start, index):
+        self._buf = buf
+        self._start = start
+        self._index = index
+        self._values = {}
+
+    def __getitem__(self, key):
+        if key not in self._values:
+            self._values[key] = _unpack(self._buf, self._start + self._index[key])[0]
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def to_dict(self):
+        """중첩된 LazyDict까지 모두 해석한 일반 dict."""
+        out = {}
+        for key in self._index:
+            value = self[key]
+            out[key] = value.to_dict() if isinstance(value, LazyDict) else value
+        return out
+
+    def __repr__(self):
+        return 'LazyDict({})'.format(list(self._index))
+
+
+def encode(value, compress=None):
+    """
+    값을 user text 문자열로 만든다.
+
+    compress: None이면 COMPRESS_MIN_BYTES 이상이고 실제로 줄어들 때만 zlib 압축, True/False는 강제
+    """
+    raw = bytearray()
+    _pack(value, raw)
+    raw = bytes(raw)
+    flag = 'r'
+    if compress or (compress is None and len(raw) >= COMPRESS_MIN_BYTES):
+        packed = zlib.compress(raw, 6)
+        if compress or len(packed) < len(raw):
+            raw = packed
+            flag = 'z'
+    return PREFIX + flag + base64.b64encode(raw).decode('ascii')
+
+
+def is_encoded(text):
+    return isinstance(text, str) and text.startswith(PREFIX) and len(text) > len(PREFIX) and \
+        text[len(PREFIX)] in 'rz'
+
+
+def decode(text, lazy=True):
+    """
+    encode()로 만든 문자열을 값으로 되돌린다. dict는 lazy=True이면 LazyDict.
+    배열은 읽기 전용 view이다 (수정하려면 복사).
+    """
+    if not is_encoded(text):
+        raise ValueError('not an encoded user text value')
+    data = base64.b64decode(text[len(PREFIX) + 1:])
+    if text[len(PREFIX)] == 'z':
+        data = zlib.decompress(data)
+    value, _ = _unpack(memoryview(data), 0, lazy)
+    return value
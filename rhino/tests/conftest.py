@@ -0,0 +1,6 @@
+# lib.* 모듈을 Rhino 없이 테스트한다. AddSupport.py와 같이 rhino/ 폴더를 import 경로에 둔다.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,10 @@
+import os
+
+from BatchSupport import stl_paths
+
+
+def test_stl_paths_match_any_case_once(tmp_path):
+    for name in ('b.stl', 'a.STL', 'c.Stl', 'notes.txt', 'd.stl.bak'):
+        (tmp_path / name).write_bytes(b'')
+    (tmp_path / 'folder.stl').mkdir()
+    assert [os.path.basename(p) for p in stl_paths(str(tmp_path))] == ['a.STL', 'b.stl', 'c.Stl']
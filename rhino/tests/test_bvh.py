@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from lib.bvh import BVH, closest_point_on_triangles, get_bvh
+from lib.synthetic import crown_mesh
+
+
+@pytest.fixture(scope='module')
+def crown():
+    return crown_mesh(24)
+
+
+def brute_force_rays(vertices, faces, origins, directions):
+    """모든 (Ray, 삼각형) 쌍의 Möller–Trumbore 교차 중 가장 가까운 t (miss는 inf)."""
+    tri = vertices[faces]
+    e1 = tri[:, 1] - tri[:, 0]
+    e2 = tri[:, 2] - tri[:, 0]
+    best = np.full(origins.shape[0], np.inf)
+    for q in range(origins.shape[0]):
+        d = directions[q]
+        p = np.cross(d, e2)
+        det = np.einsum('ij,ij->i', e1, p)
+        ok = np.abs(det) > 1e-12
+        inv = np.where(ok, 1.0 / np.where(ok, det, 1.0), 0.0)
+        s = origins[q] - tri[:, 0]
+        u = np.einsum('ij,ij->i', s, p) * inv
+        qv = np.cross(s, e1)
+        v = (qv @ d) * inv
+        t = np.einsum('ij,ij->i', e2, qv) * inv
+        hit = ok & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 0)
+        if hit.any():
+            best[q] = t[hit].min()
+    return best
+
+
+def test_rays_match_brute_force(crown):
+    vertices, faces = crown
+    rng = np.random.default_rng(1)
+    origins = rng.uniform((-6, -6, -3), (6, 6, 9), (300, 3))
+    directions = rng.normal(size=(300, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    t, tri = BVH(vertices, faces, leaf_size=4).intersect_rays(origins, directions)
+    expected = brute_force_rays(vertices, faces, origins, directions)
+    assert np.array_equal(np.isfinite(t), np.isfinite(expected))
+    assert np.isfinite(t).sum() > 50
+    np.testing.assert_allclose(t[np.isfinite(t)], expected[np.isfinite(expected)], atol=1e-9)
+    assert np.all(tri[np.isfinite(t)] >= 0)
+
+
+def test_tree_covers_every_triangle_once(crown):
+    vertices, faces = crown
+    # 같은 자리에 겹친 삼각형 (Morton 코드가 같아 절반 분할로 나뉘는 구간)
+    stacked = np.concatenate((faces, np.repeat(faces[:1], 40, axis=0)))
+    bvh = BVH(vertices, stacked, leaf_size=4)
+    leaf = bvh.node_left < 0
+    assert bvh.node_count[leaf].max() <= 4
+    assert bvh.node_count[leaf].sum() == stacked.shape[0]
+    np.testing.assert_array_equal(np.sort(bvh.perm), np.arange(stacked.shape[0]))
+    inner = np.nonzero(~leaf)[0]
+    for child in (bvh.node_left[inner], bvh.node_left[inner] + 1):
+        assert np.all(bvh.node_min[child] >= bvh.node_min[inner])
+        assert np.all(bvh.node_max[child] <= bvh.node_max[inner])
+
+
+def test_closest_points_match_brute_force(crown):
+    vertices, faces = crown
+    rng = np.random.default_rng(2)
+    points = rng.uniform((-7, -7, -2), (7, 7, 9), (200, 3))
+    _, distance, _ = BVH(vertices, faces).closest_points(points)
+    tri = vertices[faces]
+    for q in range(0, 200, 10):
+        p = np.repeat(points[q:q + 1], faces.shape[0], axis=0)
+        cp = closest_point_on_triangles(p, tri[:, 0], tri[:, 1], tri[:, 2])
+        assert distance[q] == pytest.approx(np.sqrt(np.sum((cp - p) ** 2, axis=1)).min(), abs=1e-9)
+
+
+def test_overlap_boxes_match_brute_force(crown):
+    vertices, faces = crown
+    rng = np.random.default_rng(3)
+    lo = rng.uniform((-6, -6, -1), (5, 5, 6), (40, 3))
+    hi = lo + rng.uniform(0.2, 3.0, (40, 3))
+    box, tri = BVH(vertices, faces).overlap_boxes(lo, hi)
+    t = vertices[faces]
+    tmin, tmax = t.min(axis=1), t.max(axis=1)
+    for b in range(40):
+        expected = np.nonzero(np.all((tmin <= hi[b]) & (tmax >= lo[b]), axis=1))[0]
+        np.testing.assert_array_equal(np.sort(tri[box == b]), expected)
+
+
+def test_get_bvh_caches_by_content(crown):
+    vertices, faces = crown
+    assert get_bvh(vertices, faces) is get_bvh(vertices.copy(), faces.copy())
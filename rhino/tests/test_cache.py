@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+from lib.cache import DiskCache
+from lib.synthetic import box_mesh
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = DiskCache(str(tmp_path / 'cache'))
+    key = cache.key([box_mesh((0, 0, 0), (1, 1, 1))], {'cell': 0.1})
+    assert cache.get(key) is None
+    heights = np.linspace(0, 1, 12).reshape(3, 4)
+    cache.put(key, heights=heights, label='crown')
+    value = cache.get(key)
+    np.testing.assert_array_equal(value['heights'], heights)
+    assert value['label'] == 'crown'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_depends_on_geometry_and_params():
+    cache = DiskCache()
+    a = box_mesh((0, 0, 0), (1, 1, 1))
+    b = box_mesh((0, 0, 0), (1, 1, 2))
+    assert cache.key([a], {'cell': 0.1}) == cache.key([a], {'cell': 0.1})
+    assert cache.key([a], {'cell': 0.1}) != cache.key([b], {'cell': 0.1})
+    assert cache.key([a], {'cell': 0.1}) != cache.key([a], {'cell': 0.2})
+
+
+def test_evicts_least_recently_used(tmp_path):
+    root = str(tmp_path / 'cache')
+    cache = DiskCache(root, max_bytes=10 ** 9)
+    blob = np.zeros(1000)
+    for i, key in enumerate(('a', 'b', 'c')):
+        cache.put(key, data=blob)
+        os.utime(os.path.join(root, key + '.npz'), (1000 + i, 1000 + i))
+    cache.get('a')                                  # a가 가장 최근
+    size = os.path.getsize(os.path.join(root, 'a.npz'))
+    cache.max_bytes = 2 * size
+    assert cache.evict() == 1
+    assert sorted(os.listdir(root)) == ['a.npz', 'c.npz']
+    cache.clear()
+    assert os.listdir(root) == []
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from lib.engrave import CUT_MARGIN, clear_glyph_cache, engraving_cutter, glyph_mesh, text_layout
+from lib.meshclean import mesh_report
+from lib.synthetic import box_mesh
+
+
+def signed_volume(vertices, faces):
+    tri = vertices[faces]
+    return np.einsum('ij,ij->i', tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum() / 6.0
+
+
+@pytest.mark.parametrize('char', ['0', 'A', 'H', '8'])
+def test_glyph_is_a_closed_prism(char):
+    clear_glyph_cache()
+    vertices, faces = glyph_mesh(char, 7.0, 1.0)
+    assert mesh_report(faces)['watertight']
+    assert signed_volume(vertices, faces) > 0
+    assert glyph_mesh(char, 7.0, 1.0)[0] is vertices
+    assert glyph_mesh('~', 7.0, 1.0) is None
+
+
+def test_layout_is_centered():
+    vertices, faces, glyph, skipped = text_layout('A~B', 7.0, 1.0)
+    assert skipped == ['~']
+    assert set(glyph.tolist()) == {0, 2}
+    mid = (vertices[:, :2].min(axis=0) + vertices[:, :2].max(axis=0)) * 0.5
+    np.testing.assert_allclose(mid, 0.0, atol=1e-9)
+
+
+def test_cutter_sits_on_the_wall():
+    # x = 10 평면 벽 (박스 -X 면)
+    wall = box_mesh((10, -20, -20), (12, 20, 20))
+    size, depth = 3.5, 0.3
+    vertices, faces, skipped = engraving_cutter(*wall, 'AB', size, depth, origin=(0, 0, 0))
+    assert skipped == []
+    assert mesh_report(faces)['watertight']
+    assert signed_volume(vertices, faces) > 0
+    np.testing.assert_allclose(np.unique(np.round(vertices[:, 0], 9)), (10 - CUT_MARGIN, 10 + depth))
+
+    missed = engraving_cutter(*wall, 'AB', size, depth, origin=(0, 0, 0), max_distance=5.0)
+    assert missed[1].shape[0] == 0 and missed[2] == ['A', 'B']
@@ -0,0 +1,55 @@
+import numpy as np
+
+from lib.heightmap import (apply_clearance, fill_holes, grid_axes, heightfield_to_mesh, rasterize_top,
+                           rasterize_underside, support_top)
+from lib.meshclean import mesh_report
+from lib.raycast import first_hits
+from lib.synthetic import crown_mesh
+
+
+def volume(vertices, faces):
+    tri = vertices[faces]
+    return np.einsum('ij,ij->i', tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum() / 6.0
+
+
+def test_heightfield_mesh_is_watertight_with_holes():
+    xs, ys = grid_axes(0.0, 4.0, 0.0, 3.0, 0.25)
+    gx, gy = np.meshgrid(xs, ys)
+    heights = 1.0 + 0.3 * np.sin(gx) * np.cos(gy)
+    heights[5:8, 6:9] = np.nan                      # 안쪽 구멍
+    heights[0, :4] = np.nan                         # 가장자리 홈
+    vertices, faces = heightfield_to_mesh(xs, ys, heights, base_z=0.0)
+    report = mesh_report(faces)
+    assert report['watertight']
+    assert volume(vertices, faces) > 0
+
+    full_v, full_f = heightfield_to_mesh(xs, ys, np.ones_like(heights), base_z=0.0)
+    assert mesh_report(full_f)['watertight']
+    assert abs(volume(full_v, full_f) - 4.0 * 3.0) < 1e-9
+
+
+def test_mask_and_empty_field():
+    xs, ys = grid_axes(0.0, 1.0, 0.0, 1.0, 0.5)
+    heights = np.ones((ys.shape[0], xs.shape[0]))
+    vertices, faces = heightfield_to_mesh(xs, ys, heights, mask=np.zeros_like(heights, dtype=bool))
+    assert faces.shape == (0, 3)
+
+
+def test_rasterized_underside_matches_ray_hits():
+    meshes = [crown_mesh(16)]
+    xs, ys = grid_axes(-5.0, 5.0, -4.0, 4.0, 0.5)
+    under = rasterize_underside(meshes, xs, ys, z0=-1.0)
+    gx, gy = np.meshgrid(xs, ys)
+    np.testing.assert_array_equal(under.ravel(), first_hits(meshes, gx.ravel(), gy.ravel(), -1.0))
+    top = rasterize_top(meshes, xs, ys, z_top=20.0)
+    hit = ~np.isnan(under)
+    assert np.all(top[hit] >= under[hit])
+
+
+def test_clearance_and_support_top():
+    under = np.array([[1.0, np.nan], [2.0, 0.3]])
+    heights = support_top(under, lift=0.2, top_z=5.0)
+    assert not np.isnan(heights).any()
+    out = apply_clearance(np.full((2, 2), 3.0), under, 0.5)
+    np.testing.assert_allclose(out, [[0.5, 3.0], [1.5, np.nan]])
+    assert not np.isnan(fill_holes(under)).any()
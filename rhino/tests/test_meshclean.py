@@ -0,0 +1,65 @@
+import numpy as np
+
+from lib.meshclean import clean_mesh, face_components, mesh_report, orient_faces, weld_vertices
+from lib.synthetic import box_mesh, crown_mesh, merge_meshes
+
+
+def signed_volume(vertices, faces):
+    tri = vertices[faces]
+    return np.einsum('ij,ij->i', tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum() / 6.0
+
+
+def test_weld_merges_a_triangle_soup_within_tolerance():
+    vertices, faces = crown_mesh(16)
+    soup = vertices[faces].reshape(-1, 3)
+    soup += np.random.default_rng(6).uniform(-2e-7, 2e-7, soup.shape)
+    v, f = weld_vertices(soup, np.arange(soup.shape[0]).reshape(-1, 3), tol=1e-6)
+    assert v.shape[0] == vertices.shape[0]
+    np.testing.assert_allclose(v[f], vertices[faces], atol=1e-6)
+    assert mesh_report(f)['watertight']
+
+
+def test_weld_keeps_vertices_farther_than_tolerance():
+    v = np.array([(0, 0, 0), (1e-3, 0, 0), (1, 0, 0), (0, 1, 0)], dtype=float)
+    out, f = weld_vertices(v, np.array([(0, 2, 3), (1, 2, 3)]), tol=1e-6)
+    assert out.shape[0] == 4
+
+
+def test_orient_restores_outward_normals():
+    vertices, faces = crown_mesh(16)
+    rng = np.random.default_rng(7)
+    scrambled = faces.copy()
+    flip = rng.random(faces.shape[0]) < 0.4
+    scrambled[flip] = scrambled[flip][:, ::-1]
+    scrambled = scrambled[:, ::-1] if signed_volume(vertices, scrambled) > 0 else scrambled
+
+    oriented, flipped, conflicts = orient_faces(vertices, scrambled)
+    assert conflicts == 0
+    assert flipped > 0
+    assert signed_volume(vertices, oriented) > 0
+    np.testing.assert_array_equal(oriented, faces)
+
+
+def test_clean_mesh_reports_and_components():
+    a = box_mesh((0, 0, 0), (1, 1, 1))
+    b = box_mesh((2, 0, 0), (3, 1, 1))
+    vertices, faces = merge_meshes([a, b])
+    soup = vertices[faces].reshape(-1, 3)
+    v, f, normals, report = clean_mesh(soup, np.arange(soup.shape[0]).reshape(-1, 3))
+    assert v.shape[0] == 16 and f.shape[0] == 24
+    assert report['watertight'] and report['orientation_conflicts'] == 0
+    np.testing.assert_allclose(np.linalg.norm(normals, axis=1), 1.0)
+    labels = face_components(f)
+    assert set(labels.tolist()) == {0, 1}
+    assert mesh_report(f[:-1])['boundary_edges'] == 3
+
+
+def test_orient_many_components_at_once():
+    vertices, faces = merge_meshes([box_mesh((3 * i, 0, 0), (3 * i + 1, 1, 1)) for i in range(500)])
+    rng = np.random.default_rng(3)
+    flip = rng.random(faces.shape[0]) < 0.3
+    scrambled = faces.copy()
+    scrambled[flip] = scrambled[flip][:, ::-1]
+    oriented, flipped, conflicts = orient_faces(vertices, scrambled)
+    np.testing.assert_array_equal(oriented, faces)
+    assert flipped == int(flip.sum()) and conflicts == 0
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from lib.orient import best_orientation, rotation_to_up, score_directions, sphere_directions
+from lib.synthetic import box_mesh, crown_mesh
+
+
+def rotation(axis, angle):
+    axis = np.asarray(axis, dtype=float) / np.linalg.norm(axis)
+    k = np.array(((0, -axis[2], axis[1]), (axis[2], 0, -axis[0]), (-axis[1], axis[0], 0)))
+    return np.eye(3) + np.sin(angle) * k + (1 - np.cos(angle)) * k @ k
+
+
+@pytest.mark.parametrize('up', [(0, 0, 1), (0, 0, -1), (1, 2, 3), (0.3, -0.1, -1.0)])
+def test_rotation_to_up(up):
+    r = rotation_to_up(up)
+    np.testing.assert_allclose(r @ r.T, np.eye(3), atol=1e-12)
+    assert np.linalg.det(r) == pytest.approx(1.0)
+    np.testing.assert_allclose(r @ (np.asarray(up) / np.linalg.norm(up)), (0, 0, 1), atol=1e-12)
+
+
+def test_box_overhang_and_height():
+    vertices, faces = box_mesh((0, 0, 0), (4, 2, 1))
+    terms = score_directions(vertices, faces, [(0, 0, 1), (1, 0, 0)])
+    np.testing.assert_allclose(terms['overhang'], (8.0, 2.0), rtol=1e-6)
+    np.testing.assert_allclose(terms['height'], (1.0, 4.0))
+    np.testing.assert_allclose(terms['volume'], (0.0, 0.0), atol=1e-6)
+
+
+def test_best_orientation_recovers_a_tilted_crown():
+    vertices, faces = crown_mesh(24)
+    # 기본 방향(-Z를 +Z로)에서 25도 기울인 크라운
+    tilt = rotation((1.0, 0.4, 0.0), np.radians(25.0))
+    tilted = vertices @ tilt.T
+    flat = best_orientation(vertices, faces, count=128)
+    result = best_orientation(tilted, faces, count=128)
+    expected = tilt @ flat['up']
+    assert np.degrees(np.arccos(np.clip(result['up'] @ expected, -1, 1))) < 8.0
+    assert result['score'] <= result['default']['score']
+    np.testing.assert_allclose(result['rotation'] @ result['up'], (0, 0, 1), atol=1e-9)
+    assert result['evaluated'] > 129
+
+
+def test_sphere_directions_are_unit():
+    dirs = sphere_directions(100)
+    np.testing.assert_allclose(np.linalg.norm(dirs, axis=1), 1.0)
+    assert abs(dirs.mean(axis=0)).max() < 0.05
@@ -0,0 +1,50 @@
+import numpy as np
+
+from lib.heightmap import grid_axes
+from lib.overhang import classify_faces, dilate, overhang_regions, rasterize_faces, support_footprint
+from lib.synthetic import box_mesh, merge_meshes
+
+
+def test_box_bottom_is_the_only_overhang():
+    vertices, faces = box_mesh((0, 0, 1), (2, 3, 2))
+    overhang, area, down = classify_faces(vertices, faces)
+    np.testing.assert_array_equal(np.nonzero(overhang)[0], (0, 1))
+    np.testing.assert_allclose(area[overhang].sum(), 6.0)
+    labels, regions = overhang_regions(vertices, faces)
+    assert len(regions) == 1
+    assert regions[0]['projected'] == 6.0 and regions[0]['z_min'] == 1.0
+    assert regions[0]['bounds'] == (0.0, 0.0, 2.0, 3.0)
+    assert (labels >= 0).sum() == 2
+
+
+def test_min_area_drops_small_regions():
+    small = box_mesh((5, 5, 1), (5.2, 5.2, 2))
+    big = box_mesh((0, 0, 1), (2, 2, 2))
+    vertices, faces = merge_meshes([small, big])
+    labels, regions = overhang_regions(vertices, faces, min_area=1.0)
+    assert len(regions) == 1 and regions[0]['projected'] == 4.0
+    assert not (labels[:12] >= 0).any()
+
+
+def test_dilate_is_a_disc():
+    mask = np.zeros((11, 11), dtype=bool)
+    mask[5, 5] = True
+    out = dilate(mask, 3)
+    jj, ii = np.nonzero(out)
+    np.testing.assert_array_equal((ii - 5) ** 2 + (jj - 5) ** 2 <= 9, True)
+    assert out.sum() == 29
+
+
+def test_footprint_covers_only_the_overhang():
+    xs, ys = grid_axes(-1, 7, -1, 4, 0.1)
+    overhang = box_mesh((0, 0, 1), (2, 3, 2))
+    vertices, faces = overhang
+    bottom = rasterize_faces(vertices, faces[:2], xs, ys)
+    gx, gy = np.meshgrid(xs, ys)
+    inside = (gx > 0.05) & (gx < 1.95) & (gy > 0.05) & (gy < 2.95)
+    assert bottom[inside].all()
+
+    mask, regions = support_footprint([overhang], xs, ys, margin=0.5)
+    assert len(regions) == 1
+    assert mask[inside].all()
+    assert not mask[(gx > 2.65) | (gy > 3.65)].any()
@@ -0,0 +1,40 @@
+import numpy as np
+
+from lib.packing import pack_rectangles
+
+
+def footprints(sizes, placements):
+    w = np.where(placements[:, 2] > 0, sizes[:, 1], sizes[:, 0])
+    h = np.where(placements[:, 2] > 0, sizes[:, 0], sizes[:, 1])
+    return np.column_stack((placements[:, 0], placements[:, 1], placements[:, 0] + w, placements[:, 1] + h))
+
+
+def test_packed_rectangles_do_not_overlap():
+    rng = np.random.default_rng(8)
+    sizes = rng.uniform(5.0, 30.0, (60, 2))
+    plate, gap, margin = (140.0, 80.0), 2.0, 3.0
+    placements, stats = pack_rectangles(sizes, plate, gap=gap, margin=margin)
+    assert stats['unplaced'] == []
+    assert stats['plates'] == int(placements[:, 3].max()) + 1
+    boxes = footprints(sizes, placements)
+    assert np.all(boxes[:, :2] >= margin - 1e-9)
+    assert np.all(boxes[:, 2] <= plate[0] - margin + 1e-9)
+    assert np.all(boxes[:, 3] <= plate[1] - margin + 1e-9)
+    for p in range(stats['plates']):
+        b = boxes[placements[:, 3] == p]
+        # 같은 플레이트의 두 사각형은 한 축에서 gap 이상 떨어져 있다
+        apart_x = (b[:, None, 0] >= b[None, :, 2] + gap - 1e-9) | (b[None, :, 0] >= b[:, None, 2] + gap - 1e-9)
+        apart_y = (b[:, None, 1] >= b[None, :, 3] + gap - 1e-9) | (b[None, :, 1] >= b[:, None, 3] + gap - 1e-9)
+        separate = apart_x | apart_y
+        np.fill_diagonal(separate, True)
+        assert separate.all()
+    area = sizes[:, 0] * sizes[:, 1]
+    assert abs(sum(stats['utilization']) * plate[0] * plate[1] - area.sum()) < 1e-6
+
+
+def test_rotation_and_oversized_rectangles():
+    placements, stats = pack_rectangles([(70.0, 130.0), (200.0, 10.0)], (140.0, 80.0), gap=2.0)
+    assert placements[0, 2] == 1 and placements[0, 3] == 0
+    assert stats['unplaced'] == [1]
+    placements, _ = pack_rectangles([(70.0, 130.0)], (140.0, 80.0), allow_rotate=False)
+    assert placements[0, 3] == -1
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+from lib.meshclean import mesh_report
+from lib.pipeline import build_supports, flip_and_drop, process_file
+from lib.stl import read_stl, write_stl
+from lib.synthetic import crown_mesh
+from lib.trace import start_trace, stop_trace
+from lib.trimesh import TriangleMesh
+
+PARAMS = {'cell': 0.25}
+
+
+def test_flip_and_drop():
+    vertices, _ = crown_mesh(16)
+    v = flip_and_drop(vertices, drop_z=0.5)
+    assert v[:, 2].min() == 0.5
+    np.testing.assert_allclose(v[:, 0], vertices[:, 0])
+    np.testing.assert_allclose(v[:, 1], -vertices[:, 1])
+
+
+def test_build_supports_per_offset():
+    vertices, faces = crown_mesh(24)
+    product_v, product_f, supports = build_supports(vertices, faces, [0.0, 0.1], PARAMS)
+    assert product_v[:, 2].min() == np.float32(0.5)
+    assert len(supports) == 2
+    volumes = []
+    for sv, sf in supports:
+        assert mesh_report(sf)['watertight']
+        assert sv[:, 2].min() == 0.0
+        volumes.append(TriangleMesh(sv, sf).volume())
+    assert 0.0 < volumes[1] < volumes[0]
+
+
+def test_process_file(tmp_path):
+    path = str(tmp_path / 'crown.stl')
+    write_stl(path, *crown_mesh(24))
+    result = process_file(path, str(tmp_path), [0.1], PARAMS)
+    assert result['error'] is None and result['faces'] > 0
+    assert [os.path.basename(p) for p in result['outputs']] == ['crown_0.10.stl']
+    v, f = read_stl(result['outputs'][0])
+    assert f.shape[0] > result['faces']
+
+    bad = str(tmp_path / 'empty.stl')
+    open(bad, 'wb').write(b'\0' * 84)
+    assert process_file(bad, str(tmp_path), [0.1], PARAMS)['error'] is not None
+
+
+def test_batch_footprint_sees_one_region(tmp_path):
+    path = str(tmp_path / 'crown.stl')
+    write_stl(path, *crown_mesh(64))
+    start_trace('footprint', memory=False)
+    try:
+        result = process_file(path, str(tmp_path), [0.1], dict(PARAMS, footprint=True))
+    finally:
+        trace = stop_trace()
+    assert result['error'] is None and result['outputs']
+    footprint = [s for s in trace['stages'] if s['name'] == 'footprint']
+    assert [s['regions'] for s in footprint] == [1]
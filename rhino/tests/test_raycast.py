@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from lib.raycast import adaptive_samples, first_hits, sample_ray_grid, vertical_ray_hits
+from lib.synthetic import bridge_mesh, crown_mesh
+
+
+@pytest.fixture(scope='module')
+def crown():
+    return crown_mesh(24)
+
+
+def brute_force_vertical(vertices, faces, px, py, z0):
+    """모든 (점, 삼각형) 쌍의 XY barycentric 검사로 z0 위 가장 낮은 hit Z (miss는 nan)."""
+    tri = vertices[faces]
+    a, b, c = tri[:, 0], tri[:, 1], tri[:, 2]
+    d = (b[:, 1] - c[:, 1]) * (a[:, 0] - c[:, 0]) + (c[:, 0] - b[:, 0]) * (a[:, 1] - c[:, 1])
+    ok = np.abs(d) > 1e-15
+    out = np.full(px.shape[0], np.nan)
+    for q in range(px.shape[0]):
+        l0 = ((b[:, 1] - c[:, 1]) * (px[q] - c[:, 0]) + (c[:, 0] - b[:, 0]) * (py[q] - c[:, 1])) / np.where(ok, d, 1)
+        l1 = ((c[:, 1] - a[:, 1]) * (px[q] - c[:, 0]) + (a[:, 0] - c[:, 0]) * (py[q] - c[:, 1])) / np.where(ok, d, 1)
+        l2 = 1 - l0 - l1
+        z = l0 * a[:, 2] + l1 * b[:, 2] + l2 * c[:, 2]
+        hit = ok & (l0 >= 0) & (l1 >= 0) & (l2 >= 0) & (z >= z0)
+        if hit.any():
+            out[q] = z[hit].min()
+    return out
+
+
+def test_vertical_hits_match_brute_force(crown):
+    vertices, faces = crown
+    rng = np.random.default_rng(4)
+    px, py = rng.uniform(-6, 6, (2, 400))
+    for z0 in (-1.0, 3.0):
+        expected = brute_force_vertical(vertices, faces, px, py, z0)
+        z = vertical_ray_hits(vertices, faces, px, py, z0)
+        np.testing.assert_array_equal(np.isnan(z), np.isnan(expected))
+        np.testing.assert_allclose(z[~np.isnan(z)], expected[~np.isnan(expected)], atol=1e-9)
+
+
+def test_bvh_and_binned_paths_agree():
+    meshes = [bridge_mesh(units=2, segments=16)]
+    rng = np.random.default_rng(5)
+    px, py = rng.uniform((-10, -6), (10, 6), (500, 2)).T
+    a = first_hits(meshes, px, py, -1.0)
+    b = first_hits(meshes, px, py, -1.0, use_bvh=True)
+    np.testing.assert_array_equal(np.isnan(a), np.isnan(b))
+    np.testing.assert_allclose(a[~np.isnan(a)], b[~np.isnan(b)], atol=1e-9)
+
+
+def test_grid_samples_are_hits_in_row_order(crown):
+    points = sample_ray_grid([crown], -6, 6, -5, 5, num_x=9, num_y=7, z0=-1.0)
+    assert points.shape[1] == 3 and 0 < points.shape[0] <= 63
+    order = np.lexsort((points[:, 0], points[:, 1]))
+    np.testing.assert_array_equal(order, np.arange(points.shape[0]))
+
+
+def test_adaptive_samples_stay_within_budget(crown):
+    points, rays = adaptive_samples([crown], -6, 6, -5, 5, max_rays=300, z0=-1.0)
+    assert rays <= 300 + 5
+    full, _ = adaptive_samples([crown], -6, 6, -5, 5, z0=-1.0)
+    assert points.shape[0] <= full.shape[0]
+    expected = first_hits([crown], points[:, 0], points[:, 1], -1.0)
+    np.testing.assert_allclose(points[:, 2], expected)
@@ -0,0 +1,56 @@
+import os
+import re
+import sys
+
+import pytest
+
+from lib import reload as reloader
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    root = tmp_path / 'rlpkg'
+    root.mkdir()
+    (root / '__init__.py').write_text('')
+    (root / 'base.py').write_text('VALUE = 1\n')
+    (root / 'top.py').write_text('from rlpkg.base import VALUE\n\nTOP = VALUE + 1\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(reloader, '_state', {})
+    yield root
+    for name in [n for n in sys.modules if n == 'rlpkg' or n.startswith('rlpkg.')]:
+        del sys.modules[name]
+
+
+def run(capsys):
+    objects = reloader.reload_and_import_modules(prefix='rlpkg.', modules_to_reload={'rlpkg.top': ['TOP']})
+    out = capsys.readouterr().out
+    return objects, re.search(r'reload: (\d+) reloaded \(([^)]*)\)', out).group(2)
+
+
+def touch(path, text):
+    stat = os.stat(path)
+    path.write_text(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_unchanged_tree_reloads_nothing(package, capsys):
+    objects, reloaded = run(capsys)
+    assert reloaded == 'rlpkg.top'
+    assert objects['TOP'] == 2
+    # rlpkg.base는 rlpkg.top이 끌어온 모듈이지만 첫 실행에서 기준 상태가 기록된다
+    assert run(capsys)[1] == '-'
+
+
+def test_changed_dependency_reloads_dependents(package, capsys):
+    run(capsys)
+    touch(package / 'base.py', 'VALUE = 10\n')
+    objects, reloaded = run(capsys)
+    assert reloaded == 'rlpkg.base, rlpkg.top'
+    assert objects['TOP'] == 11
+    assert run(capsys)[1] == '-'
+
+
+def test_resave_without_change_is_skipped(package, capsys):
+    run(capsys)
+    touch(package / 'base.py', 'VALUE = 1\n')
+    assert run(capsys)[1] == '-'
@@ -0,0 +1,49 @@
+import numpy as np
+
+from lib.scratch import MemoryDocument, ScratchContext
+from lib.synthetic import box_mesh
+from lib.trimesh import TriangleMesh
+
+
+def box(lo, hi):
+    return TriangleMesh(*box_mesh(lo, hi))
+
+
+def test_commit_adds_in_one_undo_record():
+    doc = MemoryDocument()
+    scratch = ScratchContext(doc)
+    a = scratch.add(box((0, 0, 0), (1, 1, 1)), layer='print_support', name='support')
+    b = scratch.add(box((2, 0, 0), (3, 1, 1)))
+    scratch.add(box((5, 5, 5), (6, 6, 6)), temporary=True)
+    scratch.transform([a, b], np.array(((1, 0, 0, 10), (0, 1, 0, 0), (0, 0, 1, 0), (0, 0, 0, 1)), dtype=float))
+
+    added = scratch.commit()
+    assert sorted(added) == [a, b]
+    assert len(doc.Objects) == 2
+    assert doc.undo_records == ['scratch commit']
+    obj = doc.Objects.Find(added[a])
+    assert obj.Attributes['layer'] == 'print_support'
+    np.testing.assert_allclose(obj.Geometry.bounds(), ((10, 0, 0), (11, 1, 1)))
+    assert scratch.ids([b, a]) == [added[b], added[a]]
+
+
+def test_load_leaves_the_document_object_untouched():
+    doc = MemoryDocument()
+    object_id = doc.Objects.Add(box((0, 0, 0), (1, 1, 1)), {'layer': 'product'})
+    scratch = ScratchContext(doc)
+    h = scratch.load(object_id)
+    scratch.transform([h], np.diag((2.0, 2.0, 2.0, 1.0)))
+    np.testing.assert_allclose(doc.Objects.Find(object_id).Geometry.bounds(), ((0, 0, 0), (1, 1, 1)))
+    np.testing.assert_allclose(scratch.bbox_stats([h])['size'], (2, 2, 2))
+
+
+def test_rejected_geometry_is_reported():
+    doc = MemoryDocument()
+    scratch = ScratchContext(doc)
+    good = scratch.add(box((0, 0, 0), (1, 1, 1)))
+    bad = scratch.add(None)
+    added = scratch.commit()
+    assert list(added) == [good]
+    assert scratch.failed == [bad]
+    assert scratch.ids([good, bad]) == [added[good]]
+    assert len(doc.Objects) == 1
@@ -0,0 +1,73 @@
+import pytest
+
+from lib.stages import StageGraph
+from lib.trace import start_trace, stop_trace
+
+
+def build(calls):
+    graph = StageGraph({'scale': 2.0, 'offset': 0.1})
+
+    def stage(name, fn):
+        def run(*args, **kwargs):
+            calls.append(name)
+            return fn(*args, **kwargs)
+        return run
+
+    graph.add('gather', stage('gather', lambda: [1.0, 2.0]))
+    graph.add('mesh_arrays', stage('mesh_arrays', lambda g: [v * 10 for v in g]), deps=['gather'])
+    graph.add('bounds', stage('bounds', lambda g, scale: max(g) * scale), deps=['gather'], params=['scale'])
+    graph.add('sampling', stage('sampling', lambda g, arrays, box: sum(arrays) + box),
+              deps=['gather', 'mesh_arrays', 'bounds'])
+    graph.add('clearance', stage('clearance', lambda s, offset: s - offset), deps=['sampling'], params=['offset'],
+              fallback=lambda s, offset: s)
+    return graph
+
+
+def test_only_stages_reading_a_changed_param_rerun():
+    calls = []
+    graph = build(calls)
+    assert graph.get('clearance') == pytest.approx(33.9)
+    calls.clear()
+    graph.set(offset=0.5)
+    assert graph.get('clearance') == pytest.approx(33.5)
+    assert calls == ['clearance']
+    calls.clear()
+    graph.set(scale=3.0)
+    graph.get('clearance')
+    assert calls == ['bounds', 'sampling', 'clearance']
+
+
+def test_invalidated_dependency_reruns_dependents():
+    calls = []
+    graph = build(calls)
+    graph.get('sampling')
+    calls.clear()
+    graph.invalidate('mesh_arrays')
+    graph.get('sampling')
+    assert calls == ['mesh_arrays', 'sampling']
+
+
+def test_disabled_stage_uses_fallback_and_unknown_deps_fail():
+    graph = build([])
+    graph.enable('clearance', False)
+    assert graph.get('clearance') == pytest.approx(34.0)
+    with pytest.raises(KeyError):
+        graph.add('late', lambda x: x, deps=['missing'])
+
+
+def test_describe_runs_only_while_tracing():
+    described = []
+    graph = StageGraph({'n': 3})
+    graph.add('points', lambda n: list(range(n)), params=['n'],
+              describe=lambda value: described.append(len(value)) or {'points': len(value)})
+    graph.get('points')
+    assert described == []
+
+    graph.set(n=4)
+    start_trace('describe', memory=False)
+    try:
+        graph.get('points')
+    finally:
+        result = stop_trace()
+    assert described == [4]
+    assert result['stages'][0]['points'] == 4
@@ -0,0 +1,42 @@
+import numpy as np
+
+from lib.stl import StlWriter, load_triangles, read_stl, weld_exact, write_stl
+from lib.synthetic import box_mesh, crown_mesh
+
+
+def test_binary_round_trip(tmp_path):
+    vertices, faces = crown_mesh(16)
+    path = str(tmp_path / 'crown.stl')
+    write_stl(path, vertices, faces)
+    v, f = read_stl(path)
+    assert v.dtype == np.float32 and f.shape == faces.shape
+    np.testing.assert_allclose(v[f], vertices[faces], atol=1e-5)
+
+    welded_v, welded_f = read_stl(path, weld=True)
+    assert welded_v.shape[0] == vertices.shape[0]
+    np.testing.assert_allclose(welded_v[welded_f], vertices[faces], atol=1e-5)
+
+    normals = np.asarray(load_triangles(path)['normal'])
+    np.testing.assert_allclose(np.linalg.norm(normals, axis=1), 1.0, atol=1e-6)
+
+
+def test_writer_streams_parts(tmp_path):
+    path = str(tmp_path / 'plate.stl')
+    a = box_mesh((0, 0, 0), (1, 1, 1))
+    b = box_mesh((2, 0, 0), (3, 1, 1))
+    with StlWriter(path) as writer:
+        writer.add(*a)
+        writer.add(*b)
+    v, f = read_stl(path)
+    assert f.shape[0] == 24
+    np.testing.assert_allclose(v[f][12:], b[0][b[1]])
+
+
+def test_ascii_and_weld_exact(tmp_path):
+    path = tmp_path / 'tri.stl'
+    path.write_text('solid t\n facet normal 0 0 1\n  outer loop\n   vertex 0 0 0\n   vertex 1 0 0\n'
+                    '   vertex 0 1 0\n  endloop\n endfacet\nendsolid t\n')
+    v, f = read_stl(str(path))
+    np.testing.assert_array_equal(v, [(0, 0, 0), (1, 0, 0), (0, 1, 0)])
+    unique, inverse = weld_exact(np.array([(0.0, 0, 0), (-0.0, 0, 0), (1, 0, 0)]))
+    assert unique.shape[0] == 2 and inverse[0] == inverse[1]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from lib.surface import fit_surface, sigma_mask
+
+
+def plane_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(-5, 5, size=(n, 2))
+    return np.column_stack((xy, 1.0 + 0.2 * xy[:, 0] - 0.1 * xy[:, 1]))
+
+
+@pytest.mark.parametrize('n, max_centers', [(200, 1024), (600, 128)])
+def test_plane_is_reproduced(n, max_centers):
+    surface, used = fit_surface(plane_points(n), smoothing=1e-6, sigma_k=None, max_centers=max_centers)
+    assert used == n
+    xs = np.linspace(-4, 4, 9)
+    ys = np.linspace(-3, 3, 7)
+    gx, gy = np.meshgrid(xs, ys)
+    np.testing.assert_allclose(surface.grid(xs, ys), 1.0 + 0.2 * gx - 0.1 * gy, atol=1e-3)
+
+
+def test_transforms_match_moved_points():
+    pts = plane_points(150)
+    pts[:, 2] += 0.3 * np.sin(pts[:, 0])
+    surface, _ = fit_surface(pts, sigma_k=None)
+    moved = surface.scaled(1.5, 0.5, (1.0, 2.0)).translated(0.25)
+    x, y = np.array((0.5, -2.0)), np.array((1.0, 3.0))
+    expected = surface(1.0 + (x - 1.0) / 1.5, 2.0 + (y - 2.0) / 0.5) + 0.25
+    np.testing.assert_allclose(moved(x, y), expected, atol=1e-9)
+    assert surface.dz == 0.0
+
+
+def test_sigma_filter_and_too_few_points():
+    zs = np.zeros(50)
+    zs[0] = 100.0
+    mask = sigma_mask(zs)
+    assert not mask[0] and mask[1:].all()
+    assert sigma_mask(np.ones(5)).all()
+    assert fit_surface(np.zeros((2, 3))) == (None, 2)
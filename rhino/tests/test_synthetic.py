@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from lib.meshclean import face_components, mesh_report
+from lib.synthetic import bridge_mesh, crown_mesh
+
+
+def signed_volume(vertices, faces):
+    tri = vertices[faces]
+    return np.einsum('ij,ij->i', tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum() / 6.0
+
+
+@pytest.mark.parametrize('segments', [8, 32, 64])
+def test_crown_is_a_closed_shell(segments):
+    vertices, faces = crown_mesh(segments)
+    assert mesh_report(faces)['watertight']
+    assert signed_volume(vertices, faces) > 0
+    assert face_components(faces).max() == 0
+    assert vertices[:, 2].min() == pytest.approx(0.0, abs=1e-9)
+
+
+def test_bridge_parts():
+    vertices, faces = bridge_mesh(units=3, segments=16)
+    labels = face_components(faces)
+    assert labels.max() + 1 == 5                   # 크라운 3 + 연결부 2
+    assert mesh_report(faces)['watertight']
+    assert signed_volume(vertices, faces) > 0
@@ -0,0 +1,45 @@
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from lib.synthetic import box_mesh, crown_mesh
+from lib.threemf import CORE_NS, MODEL_PATH, VENDOR_NS, read_3mf, write_3mf
+
+
+def test_round_trip_shares_vertices(tmp_path):
+    cv, cf = crown_mesh(16)
+    bv, bf = box_mesh((0, 0, 0), (1, 2, 3))
+    # STL처럼 삼각형마다 정점이 따로 있는 입력
+    soup = bv[bf].reshape(-1, 3)
+    path = str(tmp_path / 'plate.3mf')
+    parts = [('crown', cv, cf, None), ('box', soup, np.arange(soup.shape[0]).reshape(-1, 3), {'offset': 0.14})]
+    count, triangles = write_3mf(path, parts)
+    assert (count, triangles) == (2, cf.shape[0] + bf.shape[0])
+
+    parts = read_3mf(path)
+    assert [p[0] for p in parts] == ['crown', 'box']
+    name, v, f, meta = parts[1]
+    assert v.shape[0] == 8
+    np.testing.assert_allclose(np.sort(v[f].reshape(-1, 3), axis=0), np.sort(soup, axis=0), atol=1e-5)
+    np.testing.assert_allclose(parts[0][1][parts[0][2]], cv[cf], atol=1e-5)
+    assert meta == {'offset': '0.14'}
+
+
+def test_custom_metadata_is_namespaced(tmp_path):
+    path = str(tmp_path / 'plate.3mf')
+    v, f = box_mesh((0, 0, 0), (1, 1, 1))
+    write_3mf(path, [('support', v, f, {'layer': 'print_support', 'Description': 'support'})],
+              title='plate 1', metadata={'plate': 1})
+    with zipfile.ZipFile(path) as zf:
+        text = zf.read(MODEL_PATH).decode('utf-8')
+    assert 'xmlns:d3p="{}"'.format(VENDOR_NS) in text.splitlines()[1]
+    root = ET.fromstring(text)
+    ns = '{' + CORE_NS + '}'
+    header = {e.get('name'): e.text for e in root.findall(ns + 'metadata')}
+    assert header['Title'] == 'plate 1'
+    assert header['d3p:plate'] == '1'
+    names = [e.get('name') for e in root.iter(ns + 'metadata')]
+    assert all(':' in n or n in ('Title', 'Application', 'CreationDate', 'Description') for n in names)
+
+    assert read_3mf(path)[0][3] == {'layer': 'print_support', 'Description': 'support'}
@@ -0,0 +1,37 @@
+import numpy as np
+
+from lib.trace import geometry_counts, stage, start_trace, stop_trace
+
+
+MB = 1 << 20
+
+
+def test_nested_stage_keeps_outer_peak():
+    start_trace('test')
+    try:
+        with stage('outer'):
+            big = np.ones(8 * MB, dtype=np.uint8)
+            del big
+            with stage('inner') as st:
+                small = np.ones(MB, dtype=np.uint8)
+                st.set(items=1)
+                del small
+    finally:
+        result = stop_trace()
+    inner, outer = result['stages']
+    assert (inner['name'], outer['name']) == ('inner', 'outer')
+    assert inner['items'] == 1
+    assert MB <= inner['peak_bytes'] < 4 * MB
+    assert outer['peak_bytes'] >= 8 * MB
+
+
+def test_stage_is_a_no_op_without_trace():
+    with stage('idle') as st:
+        st.set(points=3)
+        st.geometry([])
+
+
+def test_geometry_counts_array_tuples():
+    v = np.zeros((5, 3))
+    f = np.zeros((2, 3), dtype=np.int64)
+    assert geometry_counts([(v, f), None, (v, f)]) == (10, 4)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from lib.synthetic import box_mesh
+from lib.trimesh import TriangleMesh
+
+
+def unit_box():
+    return TriangleMesh(*box_mesh((0, 0, 0), (2, 3, 4)), copy=True)
+
+
+def test_volume_and_bounds():
+    mesh = unit_box()
+    assert mesh.vertices.dtype == np.float32 and mesh.faces.dtype == np.int32
+    assert mesh.volume() == pytest.approx(24.0)
+    np.testing.assert_allclose(mesh.bounds(), ((0, 0, 0), (2, 3, 4)))
+    assert np.isnan(TriangleMesh.empty().bounds()).all()
+
+
+def test_mirror_keeps_positive_volume():
+    mesh = unit_box().scale(1.0, -1.0, -1.0)
+    assert mesh.volume() == pytest.approx(24.0)
+    mesh.scale(-1.0, 1.0, 1.0)
+    assert mesh.volume() == pytest.approx(24.0)
+    np.testing.assert_allclose(mesh.bounds(), ((-2, -3, -4), (0, 0, 0)))
+
+
+def test_rotate_z_about_center():
+    mesh = unit_box().rotate_z(np.pi / 2, center=(1.0, 1.5))
+    np.testing.assert_allclose(mesh.bounds(), ((-0.5, 0.5, 0), (2.5, 2.5, 4)), atol=1e-6)
+    assert mesh.volume() == pytest.approx(24.0, rel=1e-5)
+
+
+def test_shared_buffers():
+    mesh = unit_box()
+    moved = mesh.translated(1, 0, 0)
+    assert moved.faces is mesh.faces and moved.vertices is not mesh.vertices
+    top = mesh.select_faces(slice(2, 4))
+    assert np.shares_memory(top.faces, mesh.faces)
+    compact = top.compact()
+    assert compact.vertex_count == 4 and compact.face_count == 2
+    np.testing.assert_array_equal(compact.vertices[compact.faces], mesh.vertices[mesh.faces[2:4]])
+
+
+def test_concatenate():
+    a = unit_box()
+    b = unit_box().translate(5, 0, 0)
+    both = TriangleMesh.concatenate([a, b])
+    assert both.face_count == 24 and both.vertex_count == 16
+    assert both.volume() == pytest.approx(48.0)
+    assert both.nbytes == a.nbytes + b.nbytes
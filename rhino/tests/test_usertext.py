@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from lib.usertext import LazyDict, decode, encode, is_encoded
+
+
+VALUE = {
+    'offset': 0.14,
+    'count': 3,
+    'enabled': True,
+    'name': '크라운-11',
+    'raw': b'\x00\x01\xff',
+    'none': None,
+    'points': np.arange(12, dtype=np.float32).reshape(4, 3),
+    'ids': [1, 'two', (3.0, None)],
+    'nested': {'heights': np.linspace(0, 1, 5), 'flag': np.bool_(False)},
+}
+
+
+@pytest.mark.parametrize('compress', [None, True, False])
+def test_round_trip(compress):
+    text = encode(VALUE, compress=compress)
+    assert is_encoded(text)
+    out = decode(text, lazy=False)
+    assert set(out) == set(VALUE)
+    for key in ('offset', 'count', 'enabled', 'name', 'raw', 'none'):
+        assert out[key] == VALUE[key]
+    assert out['points'].dtype == np.float32
+    np.testing.assert_array_equal(out['points'], VALUE['points'])
+    assert list(out['ids'][:2]) == [1, 'two'] and list(out['ids'][2]) == [3.0, None]
+    np.testing.assert_array_equal(out['nested']['heights'], VALUE['nested']['heights'])
+    assert out['nested']['flag'] is False
+
+
+def test_lazy_dict_and_read_only_arrays():
+    out = decode(encode(VALUE))
+    assert isinstance(out, LazyDict)
+    assert len(out) == len(VALUE)
+    with pytest.raises(ValueError):
+        out['points'][0, 0] = 1.0
+    assert out.to_dict()['nested']['flag'] is False
+
+
+def test_rejects_foreign_text():
+    assert not is_encoded('gASVCAAAAAAAAACMBGFiY2SULg==')
+    with pytest.raises(ValueError):
+        decode('plain text')
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from lib.bvh import BVH
+from lib.meshclean import mesh_report
+from lib.pipeline import flip_and_drop, support_field
+from lib.synthetic import box_mesh, bridge_mesh, crown_mesh
+from lib.voxel import product_shells, voxel_support, voxelize
+
+
+OFFSET = 0.14
+
+
+@pytest.fixture(scope='module')
+def crown():
+    vertices, faces = crown_mesh(32)
+    meshes = [(flip_and_drop(vertices), faces)]
+    return meshes, support_field(meshes)
+
+
+def min_distance(vertices, faces, points, chunk=20000):
+    bvh = BVH(vertices, faces)
+    return min(float(bvh.closest_points(points[i:i + chunk])[1].min()) for i in range(0, points.shape[0], chunk))
+
+
+def test_support_keeps_offset_from_product(crown):
+    meshes, (xs, ys, heights, _) = crown
+    sv, sf = voxel_support(xs, ys, heights, meshes, OFFSET, voxel=0.1)
+    assert sf.shape[0] > 0
+    assert mesh_report(sf)['watertight']
+    pv, pf = meshes[0]
+    assert min_distance(pv, pf, sv) >= OFFSET
+    assert min_distance(pv, pf, sv[sf].mean(axis=1)) >= OFFSET
+
+
+def test_tiles_weld_to_the_same_mesh(crown):
+    meshes, (xs, ys, heights, _) = crown
+    sv, sf = voxel_support(xs, ys, heights, meshes, OFFSET, voxel=0.2)
+    tv, tf = voxel_support(xs, ys, heights, meshes, OFFSET, voxel=0.2, tile=7)
+    assert tf.shape == sf.shape
+    assert mesh_report(tf)['watertight']
+    np.testing.assert_allclose(np.sort(tv, axis=0), np.sort(sv, axis=0))
+
+
+def test_overlapping_shells_are_united():
+    vertices, faces = bridge_mesh(units=2, segments=24)
+    h = 0.1
+    px = np.arange(-10.0, 10.0, h) + 0.03
+    py = np.arange(-6.0, 6.0, h) + 0.01
+    pz = np.arange(-0.5, 8.0, h) + 0.02
+    inside = voxelize(product_shells([(vertices, faces)]), px, py, pz)
+    # 연결부 박스 (크라운 벽과 겹친다)
+    x0 = -0.5 * 8.5 + 8.5 * 0.3
+    x1 = x0 + 8.5 * 0.4
+    sel = np.ix_((px > x0 + h) & (px < x1 - h), np.abs(py) < 1.0 - h,
+                 (pz > 6.5 * 0.45 + h) & (pz < 6.5 * 0.45 + 2.5 - h))
+    assert inside[sel].all()
+
+
+def test_inverted_mesh_voxelizes_the_same():
+    vertices, faces = box_mesh((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))
+    p = np.linspace(-0.25, 1.25, 7) + 0.01
+    a = voxelize(product_shells([(vertices, faces)]), p, p, p)
+    b = voxelize(product_shells([(vertices, faces[:, ::-1])]), p, p, p)
+    assert a.any()
+    np.testing.assert_array_equal(a, b)